@@ -0,0 +1,357 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(SRC_DIR, "helpers", "tickers"))
+import InstrumentMaster  # type: ignore
+
+"""
+Offline micro-benchmarks of the live ingestion hot paths, with regression
+thresholds.
+
+Operations, each driven with synthetic payloads for a universe of N
+instruments (size 0 = the real master's ~2,760 active keys, larger sizes
+pad it with synthetic instruments):
+- load_instruments      LiveMarketDataRetrival.load_instruments on an
+                        N-instrument master index (load cache cleared)
+- on_message            LiveOHCLVData.handle_message for one websocket
+                        message of BATCH_SIZE ltpc ticks
+- flush                 LiveOHCLVData.seal_minute: pop a minute of N
+                        candles and write its OHLCV file
+- fetch_all_ltp_once    LiveMarketDataRetrival.fetch_all_ltp_once against
+                        a stub MarketQuoteApi (response handling only)
+- write_prices_to_file  LiveMarketDataRetrival.write_prices_to_file for N
+                        prices (temp file + rename)
+- write_minute_prices   LiveMarketMinuteDataRetrival.write_prices_to_file
+                        (one timestamped file per poll)
+
+upstox_client and websocket are replaced by stub modules in sys.modules
+before the live modules are imported, RequestScheduler permits are
+no-ops and every file is written to a temporary directory, so nothing
+touches the network.
+
+Each operation is timed per call (p50 / p95 / p99 / max) in one pass and
+its allocations measured in a second pass under tracemalloc (peak KB per
+call). Results are checked against THRESHOLDS_FILE ("<op>@<N>": {"p95_ms":
+..., "peak_kb": ...}); a size with a regression is re-measured (RETRIES),
+each operation keeping its better run, and a regression that reproduces
+exits non-zero. --update rewrites the thresholds as the current numbers
+x HEADROOM (p95 at least + SLACK_MS, or + IO_SLACK_MS for the operations
+that write files), for a new machine or an accepted change.
+
+Usage:
+    python IngestionBenchmark.py [sizes] [--repeat N] [--update] [--json results.json]
+    python IngestionBenchmark.py 2761,10000,50000
+"""
+
+# ================= CONFIG =================
+SIZES = (0, 10000, 50000)               # 0 = the real instrument master
+REPEAT = 50
+MIN_REPEAT = 10                         # for operations over the whole universe at large N
+ALLOC_REPEAT = 5                        # calls under tracemalloc (slow) per operation
+HEADROOM = 2.5                          # --update: thresholds = measured x HEADROOM ...
+SLACK_MS = 0.5                          # ... but at least measured + SLACK_MS (timer jitter on sub-ms ops)
+IO_SLACK_MS = {"flush": 2.0, "write_prices_to_file": 2.0, "write_minute_prices": 2.0}  # disk jitter
+RETRIES = 1                             # re-measures of a failing size before a regression counts
+THRESHOLDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "IngestionBenchmarkThresholds.json")
+SEED = 11
+
+
+# ================= STUBS =================
+class StubApiException(Exception):
+    def __init__(self, status=None, reason=None, http_resp=None):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.headers = {}
+
+
+class StubQuote:
+    def __init__(self, doc: Dict):
+        self.doc = doc
+
+    def to_dict(self) -> Dict:
+        return self.doc
+
+
+class StubResponse:
+    def __init__(self, data: Dict):
+        self.status = "success"
+        self.data = data
+
+
+class StubMarketQuoteApi:
+    """ltp() answers from prebuilt responses, so only the caller's handling is timed."""
+
+    def __init__(self, api_client=None):
+        self.responses: Dict[str, StubResponse] = {}
+
+    def prepare(self, chunks: List[List[str]], prices: np.ndarray):
+        i = 0
+        for keys in chunks:
+            data = {}
+            for key in keys:
+                data[key.replace("|", ":")] = StubQuote({"instrument_token": key, "last_price": float(prices[i]),
+                                                         "ltq": 1, "volume": 1000})
+                i += 1
+            self.responses[",".join(keys)] = StubResponse(data)
+
+    def ltp(self, symbol=None, api_version=None):
+        return self.responses[symbol]
+
+
+def install_stubs():
+    """Offline stand-ins for upstox_client (+ .rest) and websocket."""
+    upstox = types.ModuleType("upstox_client")
+    rest = types.ModuleType("upstox_client.rest")
+    rest.ApiException = StubApiException
+    upstox.rest = rest
+    upstox.Configuration = type("Configuration", (), {"access_token": ""})
+    upstox.ApiClient = lambda configuration=None: object()
+    upstox.MarketQuoteApi = StubMarketQuoteApi
+    upstox.HistoryApi = lambda api_client=None: object()
+
+    websocket = types.ModuleType("websocket")
+    websocket.WebSocketApp = lambda *args, **kwargs: types.SimpleNamespace(run_forever=lambda **kw: None)
+
+    sys.modules.update({"upstox_client": upstox, "upstox_client.rest": rest, "websocket": websocket})
+
+
+class NoPermits:
+    def acquire(self, endpoint, n=1):
+        return 0.0
+
+    def throttled(self, endpoint, retry_after):
+        pass
+
+
+# ================= UNIVERSES =================
+def synthetic_master(size: int, real) -> "InstrumentMaster.InstrumentMaster":
+    """The real master, padded with synthetic instruments up to `size`."""
+    extra = size - len(real.active_keys())
+    if extra <= 0:
+        return real
+    keys = real.keys + [f"NSE_EQ|INX{i:09d}" for i in range(extra)]
+    names = real.names + [f"SYNTHETIC INSTRUMENT {i} LIMITED" for i in range(extra)]
+    return InstrumentMaster.InstrumentMaster(keys, names, real.symbols + [None] * extra, real.active + [1] * extra)
+
+
+def tick_messages(keys: List[str], batch: int, rng) -> List[str]:
+    """Websocket messages (JSON) of `batch` ltpc ticks, cycling over the universe."""
+    messages = []
+    for lo in range(0, len(keys), batch):
+        chunk = keys[lo:lo + batch]
+        ltp = np.round(rng.uniform(10, 5000, len(chunk)), 2)
+        volume = rng.integers(1_000, 1_000_000, len(chunk))
+        data = {k: {"ltp": float(p), "volume": int(v), "ltq": 1} for k, p, v in zip(chunk, ltp, volume)}
+        messages.append(json.dumps({"type": "live_feed", "data": data}))
+    return messages
+
+
+# ================= MEASUREMENT =================
+def measure(fn: Callable, setup: Optional[Callable], repeat: int) -> Dict:
+    """Per-call latency percentiles, then tracemalloc peak per call in a second pass."""
+    times = np.empty(repeat)
+    for i in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        times[i] = time.perf_counter() - started
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(max(1, min(repeat, ALLOC_REPEAT))):
+            if setup is not None:
+                setup()
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            fn()
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+
+    ms = times * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"calls": repeat, "p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "max_ms": ms.max(),
+            "peak_kb": float(np.median(peaks)) / 1024}
+
+
+def run_suite(sizes=SIZES, repeat: int = REPEAT) -> Dict[str, Dict]:
+    install_stubs()
+    workdir = tempfile.mkdtemp(prefix="ingestion_bench_")
+    cwd = os.getcwd()
+    os.chdir(workdir)                    # LiveOHCLVData creates OHCLV_Data/ at import
+    try:
+        import LiveOHCLVData  # type: ignore
+        import LiveMarketDataRetrival  # type: ignore
+        import LiveMarketMinuteDataRetrival  # type: ignore
+
+        os.makedirs(LiveOHCLVData.PURE_DATA_DIR, exist_ok=True)    # imported by an earlier run_suite
+        LiveMarketDataRetrival.PERMITS = NoPermits()
+        LiveMarketMinuteDataRetrival.PERMITS = NoPermits()
+        real = InstrumentMaster.load_master(InstrumentMaster.INDEX_FILE)
+        rng = np.random.default_rng(SEED)
+        results = {}
+
+        for size in sizes:
+            master = synthetic_master(size, real)
+            keys, key_to_name = master.active_keys(), master.key_to_name()
+            n = len(keys)
+            index = os.path.join(workdir, f"master_{n}.json")
+            InstrumentMaster.save_master(master, index)
+            whole = max(MIN_REPEAT, repeat * 2761 // max(n, 2761) // 2)   # universe-wide ops at large N
+
+            # ----- load_instruments -----
+            results[f"load_instruments@{n}"] = measure(
+                lambda: LiveMarketDataRetrival.load_instruments(index),
+                lambda: InstrumentMaster._loaded.pop(index, None), whole)
+
+            # ----- on_message -----
+            LiveOHCLVData.instrument_to_name.clear()
+            LiveOHCLVData.instrument_to_name.update(key_to_name)
+            messages = tick_messages(keys, LiveOHCLVData.BATCH_SIZE, rng)
+            cursor = iter(range(10 ** 9))
+            results[f"on_message@{n}"] = measure(
+                lambda: LiveOHCLVData.handle_message(messages[next(cursor) % len(messages)]), None,
+                max(repeat, len(messages)))
+
+            # ----- flush -----
+            minute_start = datetime.now().replace(second=0, microsecond=0)
+            minute = LiveOHCLVData.minute_key(minute_start)
+            closes = np.round(rng.uniform(10, 5000, n), 2).tolist()
+            full_minute = {k: {"open": c, "high": c, "low": c, "close": c, "volume": 100} for k, c in zip(keys, closes)}
+
+            def fill_minute():
+                LiveOHCLVData.candles.clear()
+                LiveOHCLVData.candles[minute] = dict(full_minute)
+
+            results[f"flush@{n}"] = measure(lambda: LiveOHCLVData.seal_minute(minute, minute_start), fill_minute, whole)
+            LiveOHCLVData.candles.clear()
+            LiveOHCLVData.last_volume.clear()
+
+            # ----- fetch_all_ltp_once -----
+            api = StubMarketQuoteApi()
+            api.prepare(list(LiveMarketDataRetrival.chunked(keys, LiveMarketDataRetrival.CHUNK_SIZE)),
+                        np.round(rng.uniform(10, 5000, n), 2))
+            results[f"fetch_all_ltp_once@{n}"] = measure(
+                lambda: LiveMarketDataRetrival.fetch_all_ltp_once(api, keys), None, whole)
+
+            # ----- write_prices_to_file -----
+            prices = LiveMarketDataRetrival.fetch_all_ltp_once(api, keys)
+            output = os.path.join(workdir, LiveMarketDataRetrival.OUTPUT_FILE)
+            results[f"write_prices_to_file@{n}"] = measure(
+                lambda: LiveMarketDataRetrival.write_prices_to_file(output, prices, key_to_name, keys), None, whole)
+            results[f"write_minute_prices@{n}"] = measure(
+                lambda: LiveMarketMinuteDataRetrival.write_prices_to_file(prices, key_to_name, keys), None, whole)
+        return results
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ================= THRESHOLDS =================
+def load_thresholds(path: str = THRESHOLDS_FILE) -> Dict[str, Dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def check(results: Dict[str, Dict], thresholds: Dict[str, Dict]) -> List[str]:
+    """Regressions as readable lines; operations without a threshold pass."""
+    failures = []
+    for op, r in results.items():
+        limits = thresholds.get(op, {})
+        for field in ("p95_ms", "peak_kb"):
+            if field in limits and r[field] > limits[field]:
+                failures.append(f"{op}: {field} {r[field]:.2f} > {limits[field]:.2f}")
+    return failures
+
+
+def confirm(results: Dict[str, Dict], thresholds: Dict[str, Dict], repeat: int = REPEAT,
+            retries: int = RETRIES) -> List[str]:
+    """
+    check(), after re-measuring the sizes with regressions up to `retries`
+    times; each operation keeps its better run, so a one-off disk or
+    scheduler spike does not fail the gate but a real regression does.
+    """
+    for _ in range(retries):
+        failed = [op for op in results if check({op: results[op]}, thresholds)]
+        if not failed:
+            break
+        print(f"\n[INFO] Re-measuring {', '.join(failed)}")
+        again = run_suite(tuple(sorted({int(op.partition("@")[2]) for op in failed})), repeat)
+        for op in failed:
+            if op in again:
+                results[op] = min(results[op], again[op], key=lambda r: len(check({op: r}, thresholds)))
+    return check(results, thresholds)
+
+
+def slack_ms(op: str) -> float:
+    """Absolute p95 slack for "<op>@<N>"."""
+    return IO_SLACK_MS.get(op.partition("@")[0], SLACK_MS)
+
+
+def updated_thresholds(results: Dict[str, Dict], headroom: float = HEADROOM) -> Dict[str, Dict]:
+    return {op: {"p95_ms": round(max(r["p95_ms"] * headroom, r["p95_ms"] + slack_ms(op)), 3),
+                 "peak_kb": round(max(r["peak_kb"], 1.0) * headroom, 1)}
+            for op, r in results.items()}
+
+
+# ================= MAIN =================
+def main():
+    args = sys.argv[1:]
+    update = "--update" in args
+    repeat, json_path = REPEAT, None
+    if "--repeat" in args:
+        repeat = int(args[args.index("--repeat") + 1])
+    if "--json" in args:
+        json_path = args[args.index("--json") + 1]
+    positional = [a for i, a in enumerate(args) if not a.startswith("--") and (i == 0 or args[i - 1] not in ("--repeat", "--json"))]
+    sizes = tuple(int(s) for s in positional[0].split(",")) if positional else SIZES
+
+    results = run_suite(sizes, repeat)
+    thresholds = load_thresholds()
+
+    print(f"\n{'Operation':<32}{'calls':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'peak KB':>10}"
+          f"{'p95 limit':>11}")
+    print("-" * 100)
+    for op, r in results.items():
+        limit = thresholds.get(op, {}).get("p95_ms")
+        print(f"{op:<32}{r['calls']:>7}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}"
+              f"{r['max_ms']:>10.3f}{r['peak_kb']:>10.1f}{limit if limit is not None else '-':>11}")
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if update:
+        with open(THRESHOLDS_FILE, "w", encoding="utf-8") as f:
+            json.dump({**thresholds, **updated_thresholds(results)}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n✅ Thresholds updated in {os.path.basename(THRESHOLDS_FILE)} (x{HEADROOM} headroom)")
+        return
+
+    failures = confirm(results, thresholds, repeat)
+    if failures:
+        for line in failures:
+            print(f"❌ {line}")
+        raise SystemExit(1)
+    print("\n✅ No regressions against the thresholds")
+
+
+if __name__ == "__main__":
+    main()
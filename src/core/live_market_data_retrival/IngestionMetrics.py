@@ -0,0 +1,226 @@
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Dict, List, Optional, Tuple
+
+"""
+Counters, gauges and latency histograms for the live ingesters, served in
+Prometheus text format from a local HTTP endpoint.
+
+    from IngestionMetrics import REGISTRY, serve_metrics
+    TICKS = REGISTRY.counter("ticks_total", "Ticks received")
+    FLUSH = REGISTRY.histogram("flush_seconds", "Minute flush duration")
+
+    TICKS.inc(len(data))
+    with FLUSH.time():
+        ...
+    serve_metrics(9101)          # GET http://127.0.0.1:9101/metrics
+
+Recording is a lock-protected add (histograms: one bisect over a short
+bucket list), so instruments are updated per message / chunk at a cost of
+about a microsecond. Labelled series are created with .labels(k=v) and
+cached. All names are prefixed with METRIC_PREFIX.
+
+Ports in use: LiveOHCLVData 9101, LiveMarketDataRetrival 9102,
+LiveMarketMinuteDataRetrival 9103, ShardedPollCoordinator 9104, RequestScheduler 9105.
+"""
+
+# ================= CONFIG =================
+METRIC_PREFIX = "codebillion_"
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS_HOST = "127.0.0.1"
+
+
+def _label_text(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ================= METRICS =================
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.label_values = labels
+        self.lock = Lock()
+        self.children: Dict[Tuple, "_Metric"] = {}
+
+    def labels(self, **labels) -> "_Metric":
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        child = self.children.get(key)
+        if child is None:
+            with self.lock:
+                child = self.children.get(key)
+                if child is None:
+                    child = self.children[key] = self._child(key)
+        return child
+
+    def _child(self, labels):
+        return type(self)(self.name, self.help, labels)
+
+    def series(self) -> List["_Metric"]:
+        return list(self.children.values()) if self.children else [self]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for metric in self.series():
+            lines.extend(metric._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self.value = 0
+
+    def inc(self, n: float = 1) -> None:
+        with self.lock:
+            self.value += n
+
+    def _samples(self):
+        return [f"{self.name}{_label_text(self.label_values)} {_fmt(self.value)}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def set_to_current_time(self) -> None:
+        self.value = time.time()
+
+    def _samples(self):
+        return [f"{self.name}{_label_text(self.label_values)} {_fmt(self.value)}"]
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)      # last slot = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def _child(self, labels):
+        return Histogram(self.name, self.help, labels, self.buckets)
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+    def _samples(self):
+        with self.lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        lines, cumulative = [], 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            cumulative += n
+            le = 'le="' + _fmt(bound) + '"'
+            lines.append(f"{self.name}_bucket{_label_text(self.label_values, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_label_text(self.label_values)} {_fmt(total)}")
+        lines.append(f"{self.name}_count{_label_text(self.label_values)} {count}")
+        return lines
+
+
+# ================= REGISTRY =================
+class Registry:
+    def __init__(self, prefix: str = METRIC_PREFIX):
+        self.prefix = prefix
+        self.metrics: Dict[str, _Metric] = {}
+        self.lock = Lock()
+
+    def _get(self, cls, name, help_text, **kwargs):
+        full = self.prefix + name
+        with self.lock:
+            metric = self.metrics.get(full)
+            if metric is None:
+                metric = self.metrics[full] = cls(full, help_text, **kwargs)
+        return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str, buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# ================= HTTP =================
+def serve_metrics(port: int, registry: Registry = REGISTRY, host: str = METRICS_HOST) -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics from a daemon thread; returns the server (None if the port is taken)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer((host, port), Handler)
+    except OSError as e:
+        print(f"❌ Metrics endpoint not started on port {port}: {e}")
+        return None
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, daemon=True).start()
+    print(f"✅ Metrics on http://{host}:{port}/metrics")
+    return server
@@ -1,44 +1,42 @@
+import os
+import sys
 import time
 from typing import List, Dict
 
 import upstox_client
 from upstox_client.rest import ApiException
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(SRC_DIR, "helpers", "tickers"))
+from InstrumentMaster import INDEX_FILE, load_master  # type: ignore
+from PriceBus import PriceBus, LTP_BUS  # type: ignore
+from IngestionMetrics import REGISTRY, serve_metrics  # type: ignore
+from RequestScheduler import PermitClient, is_throttled, retry_after  # type: ignore
+
 ACCESS_TOKEN = ""
 
-INSTRUMENT_FILE = "stocks_only.txt"
+INSTRUMENT_FILE = INDEX_FILE
 
 OUTPUT_FILE = "ltp_latest.txt"
+WRITE_OUTPUT_FILE = False        # consumers read the shared-memory PriceBus (LTP_BUS)
 
 CHUNK_SIZE = 200
 API_VERSION = "2.0"
-SLEEP_BETWEEN_CALLS = 0.25
+SLEEP_BETWEEN_CALLS = 0.25       # pacing when the RequestScheduler service is not running
+PERMITS = PermitClient("live", fallback_delay=SLEEP_BETWEEN_CALLS)
+
+# ================= METRICS =================
+METRICS_PORT = 9102
+CHUNKS = REGISTRY.counter("ltp_chunks_total", "LTP API calls made")
+CHUNKS_FAILED = REGISTRY.counter("ltp_chunks_failed_total", "LTP API calls that raised")
+CHUNK_LATENCY = REGISTRY.histogram("ltp_chunk_seconds", "LTP API latency per chunk")
+POLL_DURATION = REGISTRY.histogram("ltp_poll_seconds", "Time to fetch every chunk once")
+INSTRUMENTS = REGISTRY.gauge("ltp_instruments", "Instruments priced in the last poll")
+LAST_POLL = REGISTRY.gauge("ltp_last_poll_timestamp_seconds", "Unix time of the last completed poll")
 
 def load_instruments(path: str) -> (List[str], Dict[str, str]): # pyright: ignore[reportInvalidTypeForm]
-    keys: List[str] = []
-    key_to_name: Dict[str, str] = {}
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            if ":" not in line:
-                continue
-            left, right = line.split(":", 1)
-
-            left = left.strip()
-            right = right.strip().rstrip(",")
-            if left.startswith('"') and left.endswith('"'):
-                inst_key = left[1:-1]
-            else:
-                inst_key = left
-            if right.startswith('"') and right.endswith('"'):
-                company_name = right[1:-1]
-            else:
-                company_name = right
-            keys.append(inst_key)
-            key_to_name[inst_key] = company_name
-
-    return keys, key_to_name
+    master = load_master(path)
+    return master.active_keys(), master.key_to_name()
 
 
 def chunked(items: List[str], n: int):
@@ -60,11 +58,19 @@ def fetch_all_ltp_once(
     all_prices: Dict[str, float] = {}
     for keys_chunk in chunked(instrument_keys, CHUNK_SIZE):
         symbol_param = ",".join(keys_chunk)
+        CHUNKS.inc()
+        PERMITS.acquire("ltp")
+        started = time.perf_counter()
         try:
             resp = quote_api.ltp(symbol=symbol_param, api_version=API_VERSION)
         except ApiException as e:
+            CHUNKS_FAILED.inc()
+            if is_throttled(e):
+                PERMITS.throttled("ltp", retry_after(e))
             print(f"[ERROR] LTP API failed for chunk: {e}")
             continue
+        finally:
+            CHUNK_LATENCY.observe(time.perf_counter() - started)
         data = getattr(resp, "data", None)
         if data is None:
             try:
@@ -80,7 +86,6 @@ def fetch_all_ltp_once(
             ltp = obj_dict.get("last_price")
             if inst_token is not None:
                 all_prices[inst_token] = ltp
-        time.sleep(SLEEP_BETWEEN_CALLS)
     return all_prices
 
 
@@ -90,7 +95,8 @@ def write_prices_to_file(
     key_to_name: Dict[str, str],
     instrument_keys: List[str]
 ) -> None:
-    with open(output_path, "w", encoding="utf-8") as f:
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         for key in instrument_keys:
             name = key_to_name.get(key, key)
             price = prices.get(key)
@@ -100,6 +106,8 @@ def write_prices_to_file(
             else:
                 line = f"{name} : {price}\n"
             f.write(line)
+    # Readers never see a half-written file
+    os.replace(tmp_path, output_path)
 def main():
     instrument_keys, key_to_name = load_instruments(INSTRUMENT_FILE)
     print(f"Loaded {len(instrument_keys)} instrument keys from {INSTRUMENT_FILE}")
@@ -108,14 +116,22 @@ def main():
         raise RuntimeError("No instrument_keys found. Check your file path/format.")
 
     quote_api = make_upstox_client()
+    serve_metrics(METRICS_PORT)
+    price_bus = PriceBus.create(LTP_BUS)
 
     while True:
         loop_start = time.time()
 
-        prices = fetch_all_ltp_once(quote_api, instrument_keys)
+        with POLL_DURATION.time():
+            prices = fetch_all_ltp_once(quote_api, instrument_keys)
+        INSTRUMENTS.set(len(prices))
+        LAST_POLL.set_to_current_time()
         print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Got LTP for {len(prices)} instruments")
-        write_prices_to_file(OUTPUT_FILE, prices, key_to_name, instrument_keys)
-        print(f"Wrote latest LTPs to {OUTPUT_FILE}")
+        published = price_bus.publish_keys(prices)
+        print(f"Published {published} LTPs to shared memory '{LTP_BUS}'")
+        if WRITE_OUTPUT_FILE:
+            write_prices_to_file(OUTPUT_FILE, prices, key_to_name, instrument_keys)
+            print(f"Wrote latest LTPs to {OUTPUT_FILE}")
         elapsed = time.time() - loop_start
         sleep_for = max(0, 60 - elapsed)
         time.sleep(sleep_for)
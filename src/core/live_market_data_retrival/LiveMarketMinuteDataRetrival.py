@@ -1,13 +1,22 @@
 import time
 from typing import List, Dict
 import os
+import sys
 from datetime import datetime
 
 import upstox_client
 from upstox_client.rest import ApiException
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(SRC_DIR, "helpers", "tickers"))
+from InstrumentMaster import INDEX_FILE, load_master  # type: ignore
+from PriceBus import PriceBus, MINUTE_BUS  # type: ignore
+from IngestionMetrics import REGISTRY, serve_metrics  # type: ignore
+from RequestScheduler import PermitClient, is_throttled, retry_after  # type: ignore
+
 ACCESS_TOKEN = ""
 
-INSTRUMENT_FILE = "StockNamesWithSymbols.txt"
+INSTRUMENT_FILE = INDEX_FILE
 
 OUTPUT_FILE = "ltp_latest.txt"
 
@@ -16,34 +25,21 @@ PURE_DATA_DIR = "Pure_Data"
 
 CHUNK_SIZE = 200
 API_VERSION = "2.0"
-SLEEP_BETWEEN_CALLS = 0.25
+SLEEP_BETWEEN_CALLS = 0.25       # pacing when the RequestScheduler service is not running
+PERMITS = PermitClient("live", fallback_delay=SLEEP_BETWEEN_CALLS)
+
+# ================= METRICS =================
+METRICS_PORT = 9103
+CHUNKS = REGISTRY.counter("ltp_chunks_total", "LTP API calls made")
+CHUNKS_FAILED = REGISTRY.counter("ltp_chunks_failed_total", "LTP API calls that raised")
+CHUNK_LATENCY = REGISTRY.histogram("ltp_chunk_seconds", "LTP API latency per chunk")
+POLL_DURATION = REGISTRY.histogram("ltp_poll_seconds", "Time to fetch every chunk once")
+INSTRUMENTS = REGISTRY.gauge("ltp_instruments", "Instruments priced in the last poll")
+LAST_POLL = REGISTRY.gauge("ltp_last_poll_timestamp_seconds", "Unix time of the last completed poll")
 
 def load_instruments(path: str) -> (List[str], Dict[str, str]): # pyright: ignore[reportInvalidTypeForm]
-    keys: List[str] = []
-    key_to_name: Dict[str, str] = {}
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            if ":" not in line:
-                continue
-            left, right = line.split(":", 1)
-
-            left = left.strip()
-            right = right.strip().rstrip(",")
-            if left.startswith('"') and left.endswith('"'):
-                inst_key = left[1:-1]
-            else:
-                inst_key = left
-            if right.startswith('"') and right.endswith('"'):
-                company_name = right[1:-1]
-            else:
-                company_name = right
-            keys.append(inst_key)
-            key_to_name[inst_key] = company_name
-
-    return keys, key_to_name
+    master = load_master(path)
+    return master.active_keys(), master.key_to_name()
 
 
 def chunked(items: List[str], n: int):
@@ -65,11 +61,19 @@ def fetch_all_ltp_once(
     all_prices: Dict[str, float] = {}
     for keys_chunk in chunked(instrument_keys, CHUNK_SIZE):
         symbol_param = ",".join(keys_chunk)
+        CHUNKS.inc()
+        PERMITS.acquire("ltp")
+        started = time.perf_counter()
         try:
             resp = quote_api.ltp(symbol=symbol_param, api_version=API_VERSION)
         except ApiException as e:
+            CHUNKS_FAILED.inc()
+            if is_throttled(e):
+                PERMITS.throttled("ltp", retry_after(e))
             print(f"[ERROR] LTP API failed for chunk: {e}")
             continue
+        finally:
+            CHUNK_LATENCY.observe(time.perf_counter() - started)
         data = getattr(resp, "data", None)
         if data is None:
             try:
@@ -85,7 +89,6 @@ def fetch_all_ltp_once(
             ltp = obj_dict.get("last_price")
             if inst_token is not None:
                 all_prices[inst_token] = ltp
-        time.sleep(SLEEP_BETWEEN_CALLS)
     return all_prices
 
 
@@ -115,12 +118,18 @@ def main():
         raise RuntimeError("No instrument_keys found. Check your file path/format.")
 
     quote_api = make_upstox_client()
+    serve_metrics(METRICS_PORT)
+    price_bus = PriceBus.create(MINUTE_BUS)
 
     while True:
         loop_start = time.time()
 
-        prices = fetch_all_ltp_once(quote_api, instrument_keys)
+        with POLL_DURATION.time():
+            prices = fetch_all_ltp_once(quote_api, instrument_keys)
+        INSTRUMENTS.set(len(prices))
+        LAST_POLL.set_to_current_time()
         print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Got LTP for {len(prices)} instruments")
+        price_bus.publish_keys(prices)
         write_prices_to_file(prices, key_to_name, instrument_keys)
         print(f"Wrote latest LTPs to {PURE_DATA_DIR}")
         elapsed = time.time() - loop_start
@@ -0,0 +1,208 @@
+import os
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+from threading import Lock
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(SRC_DIR, "helpers", "tickers"))
+from InstrumentMaster import INDEX_FILE, load_master  # type: ignore
+
+"""
+Latest-price bus in shared memory, laid out by instrument ID.
+
+A live ingester creates a segment and publishes prices into it; any number
+of processes (strategies, dashboards, exporters) attach by name and read a
+consistent snapshot with one memcpy: no files, no parsing, no half-written
+reads.
+
+Segment layout (little-endian, 8-byte aligned):
+    header   magic u64 | capacity u64 | seq u64 | timestamp f64
+    prices   f64[capacity]      latest price per instrument ID (NaN = none yet)
+    updated  f64[capacity]      epoch seconds of each instrument's last update
+
+Consistency is a seqlock: the single writer makes `seq` odd, writes, then
+makes it even again. A reader copies the arrays between two reads of `seq`
+and retries if it was odd or changed. Writes from several threads of the
+writer process are serialised with a lock; every ingester gets its own
+segment name, so there is only ever one writing process per segment.
+
+Usage:
+    bus = PriceBus.create("codebillion_ltp")          # writer
+    bus.publish_keys({"NSE_EQ|INE002A01018": 2510.5})
+
+    bus = PriceBus.attach("codebillion_ltp")          # reader
+    seq, ts, prices, updated = bus.snapshot()
+    bus.price("NSE_EQ|INE002A01018")
+
+    python PriceBus.py <name>                         # print a snapshot
+"""
+
+# ================= CONFIG =================
+MAGIC = int.from_bytes(b"CBPRICE1", "little")
+HEADER_WORDS = 4                      # magic, capacity, seq, timestamp
+MAX_READ_RETRIES = 10000
+
+LTP_BUS = "codebillion_ltp"
+MINUTE_BUS = "codebillion_minute"
+OHLCV_BUS = "codebillion_ohlcv"
+
+
+def segment_size(capacity: int) -> int:
+    return 8 * (HEADER_WORDS + 2 * capacity)
+
+
+class PriceBus:
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool, master=None):
+        self.shm = shm
+        self.owner = owner
+        self.master = master
+
+        header = np.ndarray((HEADER_WORDS,), dtype=np.uint64, buffer=shm.buf)
+        if header[0] != MAGIC:
+            raise ValueError(f"Shared memory segment {shm.name!r} is not a price bus")
+        self.capacity = int(header[1])
+
+        self._header = header
+        self._timestamp = np.ndarray((1,), dtype=np.float64, buffer=shm.buf, offset=8 * 3)
+        self.prices = np.ndarray((self.capacity,), dtype=np.float64, buffer=shm.buf, offset=8 * HEADER_WORDS)
+        self.updated = np.ndarray((self.capacity,), dtype=np.float64, buffer=shm.buf,
+                                  offset=8 * (HEADER_WORDS + self.capacity))
+        self._write_lock = Lock()
+        self._key_ids: Dict[str, Optional[int]] = {}
+
+    # ================= LIFECYCLE =================
+    @classmethod
+    def create(cls, name: str, capacity: Optional[int] = None, master=None) -> "PriceBus":
+        """Create (or take over) the segment; capacity defaults to the instrument master size."""
+        master = master or load_master(INDEX_FILE)
+        capacity = capacity or len(master)
+        try:
+            old = shared_memory.SharedMemory(name=name)
+            old.close()
+            old.unlink()
+        except FileNotFoundError:
+            pass
+
+        shm = shared_memory.SharedMemory(name=name, create=True, size=segment_size(capacity))
+        header = np.ndarray((HEADER_WORDS,), dtype=np.uint64, buffer=shm.buf)
+        header[:] = (MAGIC, capacity, 0, 0)
+        body = np.ndarray((2 * capacity,), dtype=np.float64, buffer=shm.buf, offset=8 * HEADER_WORDS)
+        body[:capacity] = np.nan
+        body[capacity:] = 0.0
+        return cls(shm, owner=True, master=master)
+
+    @classmethod
+    def attach(cls, name: str, master=None) -> "PriceBus":
+        shm = shared_memory.SharedMemory(name=name)
+        # Readers must not unlink the writer's segment when they exit
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return cls(shm, owner=False, master=master)
+
+    def close(self):
+        self._header = self._timestamp = self.prices = self.updated = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    # ================= WRITER =================
+    def publish(self, ids, prices, timestamp: Optional[float] = None) -> None:
+        """Write prices for instrument IDs as one atomic update."""
+        ids = np.asarray(ids, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        timestamp = time.time() if timestamp is None else timestamp
+        header = self._header
+        with self._write_lock:
+            header[2] += 1                      # odd: write in progress
+            self.prices[ids] = prices
+            self.updated[ids] = timestamp
+            self._timestamp[0] = timestamp
+            header[2] += 1                      # even: consistent again
+
+    def key_id(self, instrument_key: str) -> Optional[int]:
+        if instrument_key not in self._key_ids:
+            if self.master is None:
+                self.master = load_master(INDEX_FILE)
+            self._key_ids[instrument_key] = self.master.by_key(instrument_key)
+        return self._key_ids[instrument_key]
+
+    def publish_keys(self, prices: Dict[str, float], timestamp: Optional[float] = None) -> int:
+        """Publish {instrument_key: price}; unknown keys and None prices are skipped."""
+        ids, values = [], []
+        for key, price in prices.items():
+            i = self.key_id(key)
+            if i is not None and i < self.capacity and price is not None:
+                ids.append(i)
+                values.append(price)
+        if ids:
+            self.publish(ids, values, timestamp)
+        return len(ids)
+
+    # ================= READER =================
+    def snapshot(self, out: Optional[Tuple[np.ndarray, np.ndarray]] = None):
+        """
+        (seq, timestamp, prices, updated) from one consistent version.
+        Pass `out` = (prices, updated) arrays to reuse buffers across reads.
+        """
+        prices, updated = out if out is not None else (np.empty(self.capacity), np.empty(self.capacity))
+        header = self._header
+        for _ in range(MAX_READ_RETRIES):
+            before = int(header[2])
+            if before & 1:
+                time.sleep(0)
+                continue
+            np.copyto(prices, self.prices)
+            np.copyto(updated, self.updated)
+            timestamp = float(self._timestamp[0])
+            if int(header[2]) == before:
+                return before, timestamp, prices, updated
+        raise TimeoutError(f"Price bus {self.shm.name!r}: writer never quiesced")
+
+    def read(self, ids: Iterable[int]) -> np.ndarray:
+        """Consistent prices for a few instrument IDs."""
+        ids = np.asarray(list(ids), dtype=np.int64)
+        header = self._header
+        for _ in range(MAX_READ_RETRIES):
+            before = int(header[2])
+            if before & 1:
+                time.sleep(0)
+                continue
+            values = self.prices[ids]
+            if int(header[2]) == before:
+                return values
+        raise TimeoutError(f"Price bus {self.shm.name!r}: writer never quiesced")
+
+    def price(self, instrument_key: str) -> Optional[float]:
+        i = self.key_id(instrument_key)
+        if i is None or i >= self.capacity:
+            return None
+        value = float(self.read([i])[0])
+        return None if np.isnan(value) else value
+
+    @property
+    def version(self) -> int:
+        return int(self._header[2]) // 2
+
+
+# ================= MAIN =================
+def main():
+    name = sys.argv[1] if len(sys.argv) > 1 else LTP_BUS
+    bus = PriceBus.attach(name, load_master(INDEX_FILE))
+    seq, timestamp, prices, _ = bus.snapshot()
+    names = bus.master.names
+    known = np.flatnonzero(~np.isnan(prices))
+    print(f"{name}: version {seq // 2}, {len(known)}/{bus.capacity} prices, "
+          f"last update {time.strftime('%H:%M:%S', time.localtime(timestamp)) if timestamp else '-'}")
+    for i in known[:20]:
+        print(f"{names[i]} : {prices[i]}")
+    bus.close()
+
+
+if __name__ == "__main__":
+    main()
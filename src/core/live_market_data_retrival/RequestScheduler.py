@@ -0,0 +1,337 @@
+import json
+import socket
+import socketserver
+import sys
+import time
+from collections import deque
+from threading import Condition, Thread
+from typing import Dict, Optional, Sequence
+
+from IngestionMetrics import REGISTRY, serve_metrics  # type: ignore
+
+"""
+Local request scheduler shared by every process that calls the Upstox REST
+API, so a historical backfill run during market hours cannot throttle the
+live pollers.
+
+The service keeps token buckets for the account as a whole and per
+endpoint ("ltp", "historical"), and hands out permits over a local TCP
+socket (one JSON line per request and per reply). A permit takes one
+token from every bucket that applies. Requests come in two priority
+classes:
+- live:     the LTP pollers; served first, FIFO
+- backfill: historical downloads; only served while no live request is
+            waiting, and only from tokens above each bucket's `reserve`,
+            so the next live snapshot always finds its budget untouched
+
+Backfills therefore use all the spare headroom and never delay a live
+request by more than the rate itself. A 429 reported by any client
+blocks that endpoint for Retry-After seconds for everyone.
+
+Clients (PermitClient) fall back to their old fixed sleep when the
+service is not running, so every module still works on its own.
+
+Usage:
+    python RequestScheduler.py [port]                 # run the service
+
+    PERMITS = PermitClient("live", fallback_delay=0.25)
+    PERMITS.acquire("ltp")                            # before each API call
+    PERMITS.throttled("ltp", retry_after(e))          # on a 429
+"""
+
+# ================= CONFIG =================
+SCHEDULER_HOST = "127.0.0.1"
+SCHEDULER_PORT = 9130
+METRICS_PORT = 9105
+PRIORITIES = ("live", "backfill")                 # highest first
+ACCOUNT = "account"                               # buckets every request draws from
+ACQUIRE_TIMEOUT = 120.0                           # seconds a client waits for a permit
+RECONNECT_SECONDS = 5.0                           # clients retry an unavailable service this often
+MAX_IDLE_WAIT = 0.5                               # waiters re-check at least this often
+
+
+class Limit:
+    """A token bucket spec: `rate` per second, `burst` capacity, `reserve` tokens backfill may not use."""
+
+    def __init__(self, rate: float, burst: float, reserve: float = 0.0):
+        self.rate = rate
+        self.burst = burst
+        self.reserve = reserve
+
+    def __repr__(self):
+        return f"Limit(rate={self.rate:g}, burst={self.burst:g}, reserve={self.reserve:g})"
+
+
+# Upstox standard APIs: 50 requests / second and 500 / minute per account.
+# A live snapshot of the whole master is ~15 LTP calls.
+LIMITS: Dict[str, Sequence[Limit]] = {
+    ACCOUNT: (Limit(50, 50, reserve=15), Limit(500 / 60, 500, reserve=30)),
+    "ltp": (Limit(25, 25),),
+    "historical": (Limit(25, 25),),
+}
+
+# ================= METRICS =================
+PERMITS_GRANTED = REGISTRY.counter("scheduler_permits_total", "Permits granted")
+PERMITS_TIMED_OUT = REGISTRY.counter("scheduler_permits_timed_out_total", "Permit requests that timed out")
+PERMIT_WAIT = REGISTRY.histogram("scheduler_permit_wait_seconds", "Time from request to permit")
+THROTTLES = REGISTRY.counter("scheduler_throttles_total", "429s reported by clients")
+WAITING = REGISTRY.gauge("scheduler_waiting", "Requests waiting for a permit")
+
+
+# ================= SCHEDULER =================
+class TokenBucket:
+    def __init__(self, limit: Limit):
+        self.limit = limit
+        self.tokens = limit.burst
+        self.last = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.limit.burst, self.tokens + (now - self.last) * self.limit.rate)
+        self.last = now
+
+    def wait_for(self, need: float) -> float:
+        """Seconds until the bucket holds `need` tokens (0 if it does)."""
+        if self.tokens >= need:
+            return 0.0
+        if need > self.limit.burst:
+            raise ValueError(f"{need} tokens never fit {self.limit}")
+        return (need - self.tokens) / self.limit.rate
+
+
+class PermitScheduler:
+    """The scheduling core; thread safe, used in process by the service."""
+
+    def __init__(self, limits: Dict[str, Sequence[Limit]] = LIMITS):
+        self.buckets = {name: [TokenBucket(limit) for limit in specs] for name, specs in limits.items()}
+        self.cond = Condition()
+        self.queues = {priority: deque() for priority in PRIORITIES}
+        self.blocked_until: Dict[str, float] = {}
+        self.granted = {priority: 0 for priority in PRIORITIES}
+        self.waited = {priority: 0.0 for priority in PRIORITIES}
+
+    def _wait_time(self, endpoint: str, priority: str, ticket, n: float, now: float) -> float:
+        rank = PRIORITIES.index(priority)
+        if self.queues[priority][0] is not ticket or any(self.queues[p] for p in PRIORITIES[:rank]):
+            return MAX_IDLE_WAIT                            # woken when the queues move
+        wait = 0.0
+        for name in (ACCOUNT, endpoint):
+            wait = max(wait, self.blocked_until.get(name, 0.0) - now)
+            for bucket in self.buckets.get(name, ()):
+                bucket.refill(now)
+                wait = max(wait, bucket.wait_for(n + (bucket.limit.reserve if rank else 0.0)))
+        return wait
+
+    def acquire(self, endpoint: str, priority: str = "live", n: float = 1, timeout: Optional[float] = None
+                ) -> Optional[float]:
+        """Block until `n` requests to `endpoint` may be made; seconds waited, None on timeout."""
+        if priority not in self.queues:
+            raise ValueError(f"Unknown priority {priority!r}")
+        started = time.monotonic()
+        deadline = started + timeout if timeout is not None else None
+        ticket = object()
+        with self.cond:
+            self.queues[priority].append(ticket)
+            WAITING.set(sum(len(q) for q in self.queues.values()))
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._wait_time(endpoint, priority, ticket, n, now)
+                    if wait <= 0:
+                        for name in (ACCOUNT, endpoint):
+                            for bucket in self.buckets.get(name, ()):
+                                bucket.tokens -= n
+                        waited = now - started
+                        self.granted[priority] += 1
+                        self.waited[priority] += waited
+                        PERMITS_GRANTED.labels(endpoint=endpoint, priority=priority).inc()
+                        PERMIT_WAIT.labels(priority=priority).observe(waited)
+                        return waited
+                    if deadline is not None and now >= deadline:
+                        PERMITS_TIMED_OUT.labels(priority=priority).inc()
+                        return None
+                    self.cond.wait(min(wait, MAX_IDLE_WAIT, deadline - now if deadline is not None else wait))
+            finally:
+                self.queues[priority].remove(ticket)
+                WAITING.set(sum(len(q) for q in self.queues.values()))
+                self.cond.notify_all()
+
+    def throttled(self, endpoint: str, retry_after: float):
+        """The API answered 429: nobody calls `endpoint` for `retry_after` seconds."""
+        THROTTLES.labels(endpoint=endpoint).inc()
+        with self.cond:
+            now = time.monotonic()
+            self.blocked_until[endpoint] = max(self.blocked_until.get(endpoint, 0.0), now + retry_after)
+            for bucket in self.buckets.get(endpoint, ()):
+                bucket.refill(now)
+                bucket.tokens = min(bucket.tokens, 0.0)
+            self.cond.notify_all()
+
+    def stats(self) -> Dict:
+        with self.cond:
+            now = time.monotonic()
+            tokens = {}
+            for name, buckets in self.buckets.items():
+                for bucket in buckets:
+                    bucket.refill(now)
+                tokens[name] = [round(b.tokens, 2) for b in buckets]
+            return {
+                "granted": dict(self.granted),
+                "mean_wait": {p: self.waited[p] / self.granted[p] if self.granted[p] else 0.0 for p in PRIORITIES},
+                "waiting": {p: len(q) for p, q in self.queues.items()},
+                "tokens": tokens,
+            }
+
+
+# ================= SERVICE =================
+class SchedulerService:
+    """PermitScheduler behind a local TCP socket; one thread per client connection."""
+
+    def __init__(self, port: int = SCHEDULER_PORT, scheduler: Optional[PermitScheduler] = None,
+                 host: str = SCHEDULER_HOST):
+        self.scheduler = scheduler or PermitScheduler()
+        self.host = host
+        self.port = port
+        self.server: Optional[socketserver.ThreadingTCPServer] = None
+
+    def handle(self, request: Dict) -> Dict:
+        op = request.get("op")
+        if op == "acquire":
+            waited = self.scheduler.acquire(request["endpoint"], request.get("priority", "live"),
+                                            request.get("n", 1), request.get("timeout", ACQUIRE_TIMEOUT))
+            return {"ok": waited is not None, "waited": waited}
+        if op == "throttled":
+            self.scheduler.throttled(request["endpoint"], float(request.get("retry_after", 1.0)))
+            return {"ok": True}
+        if op == "stats":
+            return {"ok": True, **self.scheduler.stats()}
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+    def start(self) -> "SchedulerService":
+        service = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        reply = service.handle(json.loads(line))
+                    except (ValueError, KeyError) as e:
+                        reply = {"ok": False, "error": str(e)}
+                    self.wfile.write((json.dumps(reply) + "\n").encode())
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+# ================= CLIENT =================
+class PermitClient:
+    """
+    One process's connection to the service. Without a running service
+    acquire() sleeps `fallback_delay`, the module's old fixed pacing, and
+    the connection is retried every RECONNECT_SECONDS.
+    """
+
+    def __init__(self, priority: str = "live", fallback_delay: float = 0.25,
+                 host: str = SCHEDULER_HOST, port: int = SCHEDULER_PORT):
+        self.priority = priority
+        self.fallback_delay = fallback_delay
+        self.address = (host, port)
+        self.sock: Optional[socket.socket] = None
+        self.reader = None
+        self.next_connect = 0.0
+
+    def _connect(self) -> bool:
+        if self.sock is not None:
+            return True
+        if time.monotonic() < self.next_connect:
+            return False
+        try:
+            self.sock = socket.create_connection(self.address, timeout=0.5)
+            self.sock.settimeout(ACQUIRE_TIMEOUT + 5)
+            self.reader = self.sock.makefile("rb")
+            return True
+        except OSError:
+            self.next_connect = time.monotonic() + RECONNECT_SECONDS
+            return False
+
+    def _close(self):
+        if self.sock is not None:
+            try:
+                self.reader.close()
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = self.reader = None
+        self.next_connect = time.monotonic() + RECONNECT_SECONDS
+
+    def _call(self, request: Dict) -> Optional[Dict]:
+        if not self._connect():
+            return None
+        try:
+            self.sock.sendall((json.dumps(request) + "\n").encode())
+            line = self.reader.readline()
+            if not line:
+                raise ConnectionError("scheduler closed the connection")
+            return json.loads(line)
+        except (OSError, ValueError):
+            self._close()
+            return None
+
+    def acquire(self, endpoint: str, n: float = 1) -> float:
+        """Block until a request to `endpoint` may be made; returns the seconds waited."""
+        reply = self._call({"op": "acquire", "endpoint": endpoint, "priority": self.priority, "n": n})
+        if reply is None or not reply.get("ok"):
+            time.sleep(self.fallback_delay)
+            return self.fallback_delay
+        return reply["waited"]
+
+    def throttled(self, endpoint: str, retry_after: float):
+        """Report a 429; without the service only this process backs off."""
+        if self._call({"op": "throttled", "endpoint": endpoint, "retry_after": retry_after}) is None:
+            time.sleep(retry_after)
+
+    def stats(self) -> Optional[Dict]:
+        return self._call({"op": "stats"})
+
+
+def retry_after(exc, default: float = 1.0) -> float:
+    """Retry-After of an ApiException / HTTP error, in seconds."""
+    headers = getattr(exc, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After", default))
+    except (TypeError, ValueError):
+        return default
+
+
+def is_throttled(exc) -> bool:
+    return getattr(exc, "status", None) == 429
+
+
+# ================= MAIN =================
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else SCHEDULER_PORT
+    service = SchedulerService(port).start()
+    serve_metrics(METRICS_PORT)
+    print(f"✅ Request scheduler on {SCHEDULER_HOST}:{service.port}")
+    for name, specs in LIMITS.items():
+        print(f"   {name:<12} {', '.join(map(repr, specs))}")
+    try:
+        while True:
+            time.sleep(60)
+            s = service.scheduler.stats()
+            print(f"[{time.strftime('%H:%M:%S')}] granted {s['granted']}, "
+                  f"mean wait {', '.join(f'{p} {w * 1000:.0f} ms' for p, w in s['mean_wait'].items())}")
+    except KeyboardInterrupt:
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
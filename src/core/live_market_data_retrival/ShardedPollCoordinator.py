@@ -0,0 +1,457 @@
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from multiprocessing import Process, Queue
+from queue import Empty
+from typing import Dict, List, Optional
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(SRC_DIR, "helpers", "tickers"))
+from InstrumentMaster import INDEX_FILE, load_master  # type: ignore
+from PriceBus import PriceBus, MINUTE_BUS  # type: ignore
+from IngestionMetrics import REGISTRY, serve_metrics  # type: ignore
+
+"""
+Minute LTP snapshots polled by several worker processes, one access token
+each, so throughput is no longer capped by a single token's rate limit.
+
+The instrument universe is cut into CHUNK_SIZE-key chunks, and the chunks
+into contiguous shards sized by each worker's rate budget. Every poll
+the coordinator sends each chunk to its shard's worker. Each worker calls
+the v2 LTP endpoint at no more than its own rate (a token bucket). Results
+are merged into one snapshot:
+- 429 from a worker: its chunk goes to another worker, the worker cools
+  down for Retry-After and its rate budget is cut by THROTTLE_BACKOFF,
+  then the shards are rebalanced; every poll without a 429 gives back
+  RATE_RECOVERY up to the configured rate
+- other errors and chunks unanswered after CHUNK_TIMEOUT: retried on the
+  least loaded worker, up to MAX_CHUNK_ATTEMPTS
+- a worker process that dies is restarted after RESTART_DELAY, and its
+  shard is spread over the others meanwhile; a rejected credential
+  (401 / 403) retires the worker for good
+
+The merged snapshot is written to PURE_DATA_DIR in the usual
+"NAME : price" format (missing prices as NA) and published on MINUTE_BUS,
+like LiveMarketMinuteDataRetrival.
+
+Usage:
+    UPSTOX_ACCESS_TOKENS=tok1,tok2,tok3 python ShardedPollCoordinator.py
+    python ShardedPollCoordinator.py stub [workers] [polls]     # local StubQuoteServer
+"""
+
+# ================= CONFIG =================
+API_BASE_URL = "https://api.upstox.com"
+LTP_PATH = "/v2/market-quote/ltp"
+ACCESS_TOKENS = [t for t in os.environ.get("UPSTOX_ACCESS_TOKENS", "").split(",") if t]
+
+INSTRUMENT_FILE = INDEX_FILE
+PURE_DATA_DIR = "Pure_Data"
+
+CHUNK_SIZE = 200
+RATE_PER_WORKER = 4.0               # requests / s per token (the single poller sleeps 0.25 s)
+MIN_RATE = 0.5
+THROTTLE_BACKOFF = 0.8              # rate multiplier after a 429
+RATE_RECOVERY = 0.25                # req / s given back after a poll without 429s
+REQUEST_TIMEOUT = 10
+CHUNK_TIMEOUT = 15                  # seconds before an unanswered chunk is sent elsewhere
+MAX_CHUNK_ATTEMPTS = 3              # 429s are not counted
+RESTART_DELAY = 5
+POLL_INTERVAL = 60
+POLL_DEADLINE = 50                  # a poll returns what it has after this long
+
+# ================= METRICS =================
+METRICS_PORT = 9104
+SHARD_CHUNKS = REGISTRY.counter("shard_chunks_total", "LTP chunks answered, per worker")
+SHARD_THROTTLED = REGISTRY.counter("shard_throttled_total", "429 responses, per worker")
+SHARD_FAILED = REGISTRY.counter("shard_failed_total", "Failed or timed out chunks, per worker")
+SHARD_REBALANCES = REGISTRY.counter("shard_rebalances_total", "Times the shards were recomputed")
+SHARD_WORKERS = REGISTRY.gauge("shard_workers_live", "Workers currently taking chunks")
+SHARD_POLL = REGISTRY.histogram("shard_poll_seconds", "Time to collect one merged snapshot")
+SHARD_INSTRUMENTS = REGISTRY.gauge("shard_instruments", "Instruments priced in the last snapshot")
+
+
+# ================= LTP API =================
+class QuoteError(Exception):
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def fatal(self) -> bool:
+        return self.status in (401, 403)
+
+
+def fetch_ltp(base_url: str, token: str, keys: List[str], timeout: float = REQUEST_TIMEOUT) -> Dict[str, float]:
+    """{instrument_key: last_price} for one chunk of keys."""
+    url = f"{base_url}{LTP_PATH}?instrument_key={quote(','.join(keys), safe=',')}"
+    request = Request(url, headers={"Authorization": f"Bearer {token}", "Accept": "application/json"})
+    try:
+        with urlopen(request, timeout=timeout) as resp:
+            doc = json.load(resp)
+    except HTTPError as e:
+        retry_after = e.headers.get("Retry-After") if e.headers else None
+        raise QuoteError(e.code, e.reason, float(retry_after) if retry_after else None) from None
+
+    prices = {}
+    for obj in (doc.get("data") or {}).values():
+        key = obj.get("instrument_token")
+        if key is not None:
+            prices[key] = obj.get("last_price")
+    return prices
+
+
+def chunked(items: List[str], n: int):
+    for i in range(0, len(items), n):
+        yield items[i:i + n]
+
+
+# ================= WORKER PROCESS =================
+class RateBudget:
+    """Token bucket: acquire() blocks until a request fits the rate."""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+        self.blocked_until = 0.0
+
+    def acquire(self):
+        now = time.monotonic()
+        if now < self.blocked_until:
+            time.sleep(self.blocked_until - now)
+            now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens < 1:
+            time.sleep((1 - self.tokens) / self.rate)
+            self.tokens = 1.0
+            self.last = time.monotonic()
+        self.tokens -= 1
+
+    def block(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+def poll_worker(worker_id: int, token: str, base_url: str, rate: float, tasks: Queue, results: Queue):
+    """
+    Worker loop. Tasks: ("ltp", poll_id, chunk_id, keys), ("rate", r) or
+    None to stop. Results: (kind, worker_id, poll_id, chunk_id, payload).
+    """
+    budget = RateBudget(rate)
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        if task[0] == "rate":
+            budget.rate = task[1]
+            continue
+
+        _, poll_id, chunk_id, keys = task
+        budget.acquire()
+        try:
+            prices = fetch_ltp(base_url, token, keys)
+        except QuoteError as e:
+            if e.status == 429:
+                wait = e.retry_after or 1.0
+                budget.block(wait)
+                results.put(("throttled", worker_id, poll_id, chunk_id, wait))
+            elif e.fatal:
+                results.put(("fatal", worker_id, poll_id, chunk_id, str(e)))
+                return
+            else:
+                results.put(("failed", worker_id, poll_id, chunk_id, str(e)))
+        except Exception as e:
+            results.put(("failed", worker_id, poll_id, chunk_id, repr(e)))
+        else:
+            results.put(("ok", worker_id, poll_id, chunk_id, prices))
+
+
+# ================= COORDINATOR =================
+class PollWorker:
+    """Coordinator-side state of one worker process."""
+
+    def __init__(self, worker_id: int, token: str, rate: float):
+        self.id = worker_id
+        self.token = token
+        self.rate = rate
+        self.max_rate = rate
+        self.throttled = False
+        self.process: Optional[Process] = None
+        self.tasks: Optional[Queue] = None
+        self.inflight: Dict[int, float] = {}        # chunk_id -> sent at
+        self.cooldown_until = 0.0
+        self.restart_at = 0.0
+        self.retired = False
+
+    def available(self, now: float) -> bool:
+        return (not self.retired and self.process is not None and self.process.is_alive()
+                and now >= self.cooldown_until)
+
+    def load(self) -> float:
+        return len(self.inflight) / self.rate
+
+
+class ShardedPollCoordinator:
+    def __init__(self, tokens: List[str], instrument_keys: List[str], base_url: str = API_BASE_URL,
+                 rate: float = RATE_PER_WORKER, chunk_size: int = CHUNK_SIZE):
+        if not tokens:
+            raise ValueError("No access tokens given")
+        self.base_url = base_url
+        self.chunks = list(chunked(instrument_keys, chunk_size))
+        self.workers = [PollWorker(i, token, rate) for i, token in enumerate(tokens)]
+        self.results: Queue = Queue()
+        self.owner: List[Optional[int]] = [None] * len(self.chunks)
+        self.live_ids: tuple = ()
+        self.poll_id = 0
+        self.last_poll: Dict = {}
+
+    # ----- lifecycle -----
+    def _spawn(self, w: PollWorker):
+        w.tasks = Queue()
+        w.inflight.clear()
+        w.process = Process(target=poll_worker, args=(w.id, w.token, self.base_url, w.rate, w.tasks, self.results),
+                            daemon=True)
+        w.process.start()
+
+    def start(self) -> "ShardedPollCoordinator":
+        for w in self.workers:
+            self._spawn(w)
+        self.rebalance(time.monotonic())
+        return self
+
+    def stop(self):
+        for w in self.workers:
+            if w.process is not None and w.process.is_alive():
+                w.tasks.put(None)
+        for w in self.workers:
+            if w.process is not None:
+                w.process.join(timeout=2)
+                if w.process.is_alive():
+                    w.process.terminate()
+
+    # ----- shards -----
+    def rebalance(self, now: float) -> None:
+        """Contiguous shards over the available workers, sized by rate budget."""
+        live = [w for w in self.workers if w.available(now)]
+        self.live_ids = tuple(w.id for w in live)
+        SHARD_WORKERS.set(len(live))
+        if not live:
+            return
+        total = sum(w.rate for w in live)
+        n, start, acc = len(self.chunks), 0, 0.0
+        for i, w in enumerate(live):
+            acc += w.rate
+            end = n if i == len(live) - 1 else round(n * acc / total)
+            for c in range(start, end):
+                self.owner[c] = w.id
+            start = end
+        SHARD_REBALANCES.inc()
+
+    def shard_sizes(self) -> Dict[int, int]:
+        sizes = {w.id: 0 for w in self.workers}
+        for owner in self.owner:
+            if owner is not None:
+                sizes[owner] += 1
+        return sizes
+
+    def _pick(self, chunk_id: int, now: float) -> Optional[PollWorker]:
+        owner = self.owner[chunk_id]
+        if owner is not None and self.workers[owner].available(now):
+            return self.workers[owner]
+        live = [w for w in self.workers if w.available(now)]
+        return min(live, key=PollWorker.load) if live else None
+
+    def _maintain(self, now: float, retry) -> None:
+        """Detect dead workers, restart them, and rebalance when the live set changes."""
+        for w in self.workers:
+            if w.retired:
+                continue
+            if w.process is not None and not w.process.is_alive():
+                print(f"❌ Poll worker {w.id} exited (code {w.process.exitcode}); restarting in {RESTART_DELAY}s")
+                for c in list(w.inflight):
+                    retry(c)
+                w.inflight.clear()
+                w.process = None
+                w.restart_at = now + RESTART_DELAY
+            elif w.process is None and now >= w.restart_at:
+                self._spawn(w)
+        live_ids = tuple(w.id for w in self.workers if w.available(now))
+        if live_ids != self.live_ids:
+            self.rebalance(now)
+
+    # ----- polling -----
+    def poll(self, deadline: float = POLL_DEADLINE) -> Dict[str, float]:
+        """One merged {instrument_key: price} snapshot of the whole universe."""
+        self.poll_id += 1
+        poll_id = self.poll_id
+        started = time.monotonic()
+        prices: Dict[str, float] = {}
+        pending = set(range(len(self.chunks)))
+        attempts = [0] * len(self.chunks)
+        to_send = list(reversed(range(len(self.chunks))))
+        stats = {"throttled": 0, "failed": 0, "retried": 0}
+        for w in self.workers:
+            w.inflight.clear()
+            w.throttled = False
+
+        def retry(c):
+            if c not in pending or c in to_send:
+                return
+            if attempts[c] < MAX_CHUNK_ATTEMPTS:
+                stats["retried"] += 1
+                to_send.append(c)
+            else:
+                pending.discard(c)          # give up: its keys stay NA this minute
+
+        while pending and time.monotonic() - started < deadline:
+            now = time.monotonic()
+            self._maintain(now, retry)
+
+            while to_send:
+                c = to_send[-1]
+                if c not in pending:
+                    to_send.pop()
+                    continue
+                w = self._pick(c, now)
+                if w is None:
+                    break
+                to_send.pop()
+                w.tasks.put(("ltp", poll_id, c, self.chunks[c]))
+                w.inflight[c] = now
+                attempts[c] += 1
+
+            for w in self.workers:
+                for c, sent in list(w.inflight.items()):
+                    if now - sent > CHUNK_TIMEOUT:
+                        del w.inflight[c]
+                        SHARD_FAILED.labels(worker=w.id).inc()
+                        retry(c)
+
+            try:
+                kind, worker_id, msg_poll, c, payload = self.results.get(timeout=0.05)
+            except Empty:
+                continue
+            w = self.workers[worker_id]
+            current = msg_poll == poll_id
+            if current:
+                w.inflight.pop(c, None)
+
+            if kind == "ok":
+                SHARD_CHUNKS.labels(worker=worker_id).inc()
+                if current and c in pending:
+                    prices.update(payload)
+                    pending.discard(c)
+            elif kind == "throttled":
+                SHARD_THROTTLED.labels(worker=worker_id).inc()
+                stats["throttled"] += 1
+                w.throttled = True
+                w.cooldown_until = time.monotonic() + payload
+                w.rate = max(MIN_RATE, w.rate * THROTTLE_BACKOFF)
+                w.tasks.put(("rate", w.rate))
+                if current:
+                    attempts[c] -= 1
+                    retry(c)
+            else:
+                SHARD_FAILED.labels(worker=worker_id).inc()
+                stats["failed"] += 1
+                if kind == "fatal":
+                    print(f"❌ Poll worker {worker_id} credential rejected, retiring it: {payload}")
+                    w.retired = True
+                    for other in list(w.inflight):
+                        retry(other)
+                    w.inflight.clear()
+                if current:
+                    retry(c)
+
+        recovered = False
+        for w in self.workers:
+            if not w.throttled and w.rate < w.max_rate and w.process is not None:
+                w.rate = min(w.max_rate, w.rate + RATE_RECOVERY)
+                w.tasks.put(("rate", w.rate))
+                recovered = True
+        if recovered:
+            self.rebalance(time.monotonic())
+
+        seconds = time.monotonic() - started
+        SHARD_POLL.observe(seconds)
+        SHARD_INSTRUMENTS.set(len(prices))
+        self.last_poll = {"seconds": seconds, "chunks": len(self.chunks), "missing_chunks": len(pending),
+                          "instruments": len(prices), "workers": len(self.live_ids), **stats}
+        return prices
+
+    def run(self, key_to_name: Dict[str, str], instrument_keys: List[str], out_dir: Optional[str] = PURE_DATA_DIR,
+            price_bus: Optional[PriceBus] = None, interval: float = POLL_INTERVAL, polls: Optional[int] = None):
+        done = 0
+        while polls is None or done < polls:
+            loop_start = time.time()
+            prices = self.poll()
+            p = self.last_poll
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Got LTP for {p['instruments']} instruments in "
+                  f"{p['seconds']:.2f}s from {p['workers']} workers ({p['throttled']} throttled, "
+                  f"{p['failed']} failed, {p['missing_chunks']} chunks missing)")
+            if price_bus is not None:
+                price_bus.publish_keys(prices)
+            if out_dir is not None:
+                write_snapshot(prices, key_to_name, instrument_keys, out_dir)
+            done += 1
+            if polls is None or done < polls:
+                time.sleep(max(0, interval - (time.time() - loop_start)))
+
+
+# ================= OUTPUT =================
+def write_snapshot(prices: Dict[str, float], key_to_name: Dict[str, str], instrument_keys: List[str],
+                   out_dir: str = PURE_DATA_DIR) -> str:
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{datetime.now().strftime('%H-%M-%S')}.txt")
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for key in instrument_keys:
+            price = prices.get(key)
+            f.write(f"{key_to_name.get(key, key)} : {'NA' if price is None else price}\n")
+    os.replace(tmp, path)
+    return path
+
+
+# ================= MAIN =================
+def main():
+    master = load_master(INSTRUMENT_FILE)
+    instrument_keys, key_to_name = master.active_keys(), master.key_to_name()
+    print(f"Loaded {len(instrument_keys)} instrument keys from {INSTRUMENT_FILE}")
+
+    if len(sys.argv) > 1 and sys.argv[1] == "stub":
+        from StubQuoteServer import StubQuoteServer  # type: ignore
+
+        workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+        polls = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+        server = StubQuoteServer(rate=RATE_PER_WORKER, reject_tokens=["stub-token-rejected"]).start()
+        tokens = [f"stub-token-{i}" for i in range(workers - 1)] + ["stub-token-rejected"]
+        coordinator = ShardedPollCoordinator(tokens, instrument_keys, server.base_url).start()
+        try:
+            coordinator.run(key_to_name, instrument_keys, out_dir=None, interval=1, polls=polls)
+            print(f"Shards (chunks per worker): {coordinator.shard_sizes()}")
+            print(f"Stub requests per token: {server.requests}, throttled: {server.throttled}")
+        finally:
+            coordinator.stop()
+            server.stop()
+        return
+
+    if not ACCESS_TOKENS:
+        raise RuntimeError("Set UPSTOX_ACCESS_TOKENS to a comma-separated list of access tokens")
+    serve_metrics(METRICS_PORT)
+    price_bus = PriceBus.create(MINUTE_BUS, master=master)
+    coordinator = ShardedPollCoordinator(ACCESS_TOKENS, instrument_keys).start()
+    try:
+        coordinator.run(key_to_name, instrument_keys, PURE_DATA_DIR, price_bus)
+    finally:
+        coordinator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import json
+import math
+import sys
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Dict, Iterable, Optional
+from urllib.parse import parse_qs, urlparse
+
+"""
+Local stand-in for the Upstox v2 LTP endpoint, for running the pollers
+without a live account.
+
+    GET /v2/market-quote/ltp?instrument_key=NSE_EQ|INE...,NSE_EQ|INE...
+    Authorization: Bearer <token>
+
+answers like the real API:
+    {"status": "success", "data": {"NSE_EQ:INE...": {"instrument_token": ...,
+                                                    "last_price": ...}}}
+
+Prices are a deterministic function of the key and the clock, so repeated
+polls move a little. Per-token behaviour can be scripted:
+- rate / burst: a token bucket per access token. Requests over budget get
+  429 with Retry-After, like the real rate limiter
+- reject_tokens: tokens answered with 401 (expired / revoked credential)
+- latency: seconds added to every request
+
+Usage:
+    server = StubQuoteServer(rate=5).start()          # server.base_url
+    ...
+    server.stop()
+
+    python StubQuoteServer.py [port] [rate]
+"""
+
+# ================= CONFIG =================
+STUB_HOST = "127.0.0.1"
+LTP_PATH = "/v2/market-quote/ltp"
+
+
+def stub_price(instrument_key: str, now: float) -> float:
+    h = zlib.crc32(instrument_key.encode())
+    base = 20 + h % 4000
+    return round(base * (1 + 0.002 * math.sin(now / 30 + h % 97)), 2)
+
+
+class StubQuoteServer:
+    def __init__(
+        self,
+        port: int = 0,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        latency: float = 0.0,
+        reject_tokens: Iterable[str] = (),
+    ):
+        self.port = port
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self.latency = latency
+        self.reject_tokens = set(reject_tokens)
+        self.lock = Lock()
+        self.buckets: Dict[str, list] = {}          # token -> [tokens left, last refill]
+        self.requests: Dict[str, int] = {}
+        self.throttled: Dict[str, int] = {}
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{STUB_HOST}:{self.server.server_address[1]}"
+
+    def allow(self, token: str) -> float:
+        """0 when the request may proceed, else seconds until it would."""
+        if self.rate is None:
+            return 0.0
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.setdefault(token, [self.burst, now])
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / self.rate
+
+    def handle_ltp(self, token: str, query: str):
+        with self.lock:
+            self.requests[token] = self.requests.get(token, 0) + 1
+        if not token or token in self.reject_tokens:
+            return 401, {}, {"status": "error", "errors": [{"errorCode": "UDAPI100050", "message": "Invalid token"}]}
+
+        wait = self.allow(token)
+        if wait:
+            with self.lock:
+                self.throttled[token] = self.throttled.get(token, 0) + 1
+            return 429, {"Retry-After": f"{wait:.3f}"}, \
+                {"status": "error", "errors": [{"errorCode": "UDAPI10005", "message": "Too Many Request Sent"}]}
+
+        if self.latency:
+            time.sleep(self.latency)
+        keys = [k for k in ",".join(parse_qs(query).get("instrument_key", [])).split(",") if k]
+        now = time.time()
+        data = {
+            key.replace("|", ":"): {"instrument_token": key, "last_price": stub_price(key, now)}
+            for key in keys
+        }
+        return 200, {}, {"status": "success", "data": data}
+
+    def start(self) -> "StubQuoteServer":
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != LTP_PATH:
+                    self.send_error(404)
+                    return
+                auth = self.headers.get("Authorization", "")
+                token = auth[len("Bearer "):] if auth.startswith("Bearer ") else ""
+                status, headers, doc = stub.handle_ltp(token, url.query)
+                body = json.dumps(doc).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((STUB_HOST, self.port), Handler)
+        self.server.daemon_threads = True
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+# ================= MAIN =================
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else None
+    server = StubQuoteServer(port, rate=rate).start()
+    print(f"✅ Stub quote server on {server.base_url}{LTP_PATH} (rate {rate or 'unlimited'} req/s per token)")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(SRC_DIR, "helpers", "tickers"))
+from InstrumentMaster import load_master  # type: ignore
+
+"""
+Resamples a day of irregular LTP snapshots (Pure_Data/HH-MM-SS.txt files with
+`NAME : price` lines) into aligned minute bars for the whole universe.
+
+- Snapshot files are parsed once into a (snapshots x instruments) price matrix,
+  columns ordered by instrument-master ID (NA / missing -> NaN)
+- One vectorised pass groups snapshots by minute and reduces every column to
+  open / high / low / close / sample count
+- Minutes without samples are forward-filled from the last close and flagged
+  as stale, together with their age in minutes
+- coverage_report() summarises per-instrument data quality
+
+Usage:
+    python SnapshotResampler.py Pure_Data [bars.npz]
+"""
+
+# ================= CONFIG =================
+DATA_DIR = "Pure_Data"
+SESSION_START = "09:15"
+SESSION_MINUTES = 375           # 09:15 -> 15:29 inclusive
+
+
+# ================= TIME HELPERS =================
+def time_key_to_seconds(time_key: str) -> int:
+    """'10-40-16' (or '10:40:16') -> seconds since midnight."""
+    h, m, *rest = map(int, time_key.replace(":", "-").split("-"))
+    return h * 3600 + m * 60 + (rest[0] if rest else 0)
+
+
+def minute_of_day(hhmm: str) -> int:
+    return time_key_to_seconds(hhmm) // 60
+
+
+def minute_label(minute: int) -> str:
+    """Minute of day -> the engine's 'HH-MM-00' time key."""
+    return f"{minute // 60:02d}-{minute % 60:02d}-00"
+
+
+# ================= SNAPSHOT LOADING =================
+class SnapshotDay:
+    """Raw snapshots of one day: times[i] seconds, prices[i, instrument_id]."""
+
+    def __init__(self, times: np.ndarray, prices: np.ndarray, names: List[str]):
+        self.times = times
+        self.prices = prices
+        self.names = names
+
+
+def parse_snapshot_file(path: str) -> Tuple[List[str], List[float]]:
+    names, prices = [], []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            s = line.rsplit(":", 1)
+            if len(s) != 2:
+                continue
+            value = s[1].strip()
+            try:
+                price = float(value) if value != "NA" else np.nan
+            except ValueError:
+                price = np.nan
+            names.append(s[0].strip())
+            prices.append(price)
+    return names, prices
+
+
+def load_snapshot_day(data_dir: str = DATA_DIR, master=None) -> SnapshotDay:
+    """
+    Names are mapped to instrument IDs through the master; a name listed
+    several times maps its n-th row to the n-th instrument with that name.
+    Names unknown to the master get extra columns after the master's IDs.
+    """
+    master = master or load_master()
+    names = list(master.names)
+    extra: Dict[str, List[int]] = {}
+
+    def columns_for(row_names: List[str]) -> np.ndarray:
+        seen: Dict[str, int] = {}
+        cols = np.empty(len(row_names), dtype=np.int64)
+        for j, name in enumerate(row_names):
+            occ = seen.get(name, 0)
+            seen[name] = occ + 1
+            col = master.by_name(name, occ)
+            if col is None:
+                ids = extra.setdefault(name, [])
+                if occ >= len(ids):
+                    ids.append(len(names))
+                    names.append(name)
+                col = ids[occ]
+            cols[j] = col
+        return cols
+
+    files = sorted(f for f in os.listdir(data_dir) if f.endswith(".txt"))
+    times = np.array([time_key_to_seconds(f[:-4]) for f in files], dtype=np.int64)
+
+    parsed = []
+    last_names, last_cols = None, None
+    for file in files:
+        row_names, row_prices = parse_snapshot_file(os.path.join(data_dir, file))
+        # Pollers write the same instrument order every minute
+        if row_names != last_names:
+            last_names, last_cols = row_names, columns_for(row_names)
+        parsed.append((last_cols, np.asarray(row_prices, dtype=np.float64)))
+
+    prices = np.full((len(files), len(names)), np.nan)
+    for i, (cols, vals) in enumerate(parsed):
+        prices[i, cols] = vals
+
+    order = np.argsort(times, kind="stable")
+    return SnapshotDay(times[order], prices[order], names)
+
+
+# ================= RESAMPLING =================
+class MinuteBars:
+    """
+    Aligned minute bars, every array shaped (minutes, instruments).
+    open/high/low/close are forward-filled; `samples` counts the snapshots
+    that fell into each minute, `stale` marks filled minutes and `age` is
+    the number of minutes since the last real sample (-1 before the first).
+    """
+
+    def __init__(self, minutes, names, open_, high, low, close, samples, stale, age):
+        self.minutes = minutes
+        self.names = names
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.samples = samples
+        self.stale = stale
+        self.age = age
+
+    @property
+    def time_keys(self) -> List[str]:
+        return [minute_label(int(m)) for m in self.minutes]
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(
+            path,
+            minutes=self.minutes, names=np.asarray(self.names, dtype=object),
+            open=self.open, high=self.high, low=self.low, close=self.close,
+            samples=self.samples, stale=self.stale, age=self.age,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "MinuteBars":
+        z = np.load(path, allow_pickle=True)
+        return cls(
+            z["minutes"], list(z["names"]), z["open"], z["high"], z["low"],
+            z["close"], z["samples"], z["stale"], z["age"],
+        )
+
+
+def resample_minutes(
+    times: np.ndarray,
+    prices: np.ndarray,
+    names: List[str],
+    session_start: str = SESSION_START,
+    session_minutes: int = SESSION_MINUTES,
+) -> MinuteBars:
+    """`times` (seconds, sorted) x `prices` (snapshots x instruments) -> MinuteBars."""
+    first_minute = minute_of_day(session_start)
+    n_inst = prices.shape[1]
+    minutes = np.arange(first_minute, first_minute + session_minutes)
+
+    slot = times // 60 - first_minute
+    keep = (slot >= 0) & (slot < session_minutes)
+    slot, prices = slot[keep], prices[keep]
+
+    o = np.full((session_minutes + 1, n_inst), np.nan)
+    h, l, c = o.copy(), o.copy(), o.copy()
+    samples = np.zeros((session_minutes, n_inst), dtype=np.int32)
+
+    if len(slot):
+        starts = np.flatnonzero(np.r_[True, slot[1:] != slot[:-1]])
+        rows = slot[starts]
+        valid = ~np.isnan(prices)
+        idx = np.arange(len(slot))[:, None]
+        padded = np.vstack([prices, np.full((1, n_inst), np.nan)])
+        cols = np.arange(n_inst)
+
+        # first / last valid snapshot row per (minute, instrument); misses hit the NaN pad row
+        first = np.minimum.reduceat(np.where(valid, idx, len(slot)), starts, axis=0)
+        last = np.maximum.reduceat(np.where(valid, idx, -1), starts, axis=0)
+
+        o[rows] = padded[first, cols]
+        c[rows] = padded[last, cols]
+        h[rows] = np.fmax.reduceat(prices, starts, axis=0)
+        l[rows] = np.fmin.reduceat(prices, starts, axis=0)
+        samples[rows] = np.add.reduceat(valid, starts, axis=0, dtype=np.int32)
+
+    # Forward fill from the last minute that had a sample
+    has = samples > 0
+    pos = np.arange(session_minutes)[:, None]
+    src = np.maximum.accumulate(np.where(has, pos, -1), axis=0)
+    stale = ~has & (src >= 0)
+    age = np.where(src >= 0, pos - src, -1).astype(np.int32)
+
+    filled_close = c[src, np.arange(n_inst)]
+    o = np.where(has, o[:-1], filled_close)
+    h = np.where(has, h[:-1], filled_close)
+    l = np.where(has, l[:-1], filled_close)
+
+    return MinuteBars(minutes, list(names), o, h, l, filled_close, samples, stale, age)
+
+
+def resample_day(data_dir: str = DATA_DIR, master=None, **kwargs) -> MinuteBars:
+    day = load_snapshot_day(data_dir, master)
+    return resample_minutes(day.times, day.prices, day.names, **kwargs)
+
+
+# ================= COVERAGE =================
+def coverage_report(bars: MinuteBars, instruments: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """Per-instrument data quality; `instruments` restricts the report to some IDs."""
+    cols = np.arange(len(bars.names)) if instruments is None else np.asarray(instruments)
+    samples = bars.samples[:, cols]
+    has = samples > 0
+    any_sample = has.any(axis=0)
+    n = len(bars.minutes)
+
+    first = np.where(any_sample, has.argmax(axis=0), -1)
+    last = np.where(any_sample, n - 1 - has[::-1].argmax(axis=0), -1)
+
+    report = pd.DataFrame({
+        "instrument": [bars.names[i] for i in cols],
+        "snapshots": samples.sum(axis=0),
+        "minutes_with_data": has.sum(axis=0),
+        "coverage_pct": has.mean(axis=0) * 100,
+        "stale_minutes": bars.stale[:, cols].sum(axis=0),
+        "max_gap_minutes": bars.age[:, cols].max(axis=0),
+        "first_minute": [minute_label(bars.minutes[i]) if i >= 0 else None for i in first],
+        "last_minute": [minute_label(bars.minutes[i]) if i >= 0 else None for i in last],
+    }, index=cols)
+    report.index.name = "instrument_id"
+    return report
+
+
+# ================= MAIN =================
+def main():
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else DATA_DIR
+    out_file = sys.argv[2] if len(sys.argv) > 2 else None
+
+    bars = resample_day(data_dir)
+    seen = np.flatnonzero(bars.samples.any(axis=0))
+    report = coverage_report(bars, seen)
+
+    print(f"Resampled {data_dir} into {len(bars.minutes)} minutes x {len(seen)} instruments")
+    print(f"Mean coverage       : {report['coverage_pct'].mean():.2f}%")
+    print(f"Full coverage       : {(report['coverage_pct'] == 100).sum()} instruments")
+    print(f"Stale minute-values : {int(report['stale_minutes'].sum())}")
+    print("\nWorst covered instruments:")
+    print(report.sort_values("coverage_pct").head(10).to_string())
+
+    if out_file:
+        bars.save(out_file)
+        print(f"\n✅ Saved minute bars to {out_file}")
+
+
+if __name__ == "__main__":
+    main()
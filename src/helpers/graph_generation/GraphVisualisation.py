@@ -1,21 +1,20 @@
 import matplotlib.pyplot as plt
 
+from SeriesPlotter import load_values, lttb, MARKER_LIMIT, MAX_POINTS
+
 """
 Reads numeric values from a Values.txt text file and plots them using Matplotlib.
 The file 'Values.txt' should contain one number per line.
-Each value is plotted in order as a line graph.
+Each value is plotted in order as a line graph; long series are downsampled
+(LTTB) to MAX_POINTS points so the shape is kept without drawing every value.
 """
 
-values = []
-with open("Values.txt", "r") as f:
-    for line in f:
-        line = line.strip()
-        if line:
-            values.append(float(line))
+values = load_values("Values.txt")
+shown = lttb(values, MAX_POINTS)
 
 # Plot the data
 plt.figure(figsize=(10,4))
-plt.plot(values, marker='o')
+plt.plot(shown, values[shown], marker='o' if len(shown) <= MARKER_LIMIT else None)
 plt.title("Values Visualization")
 plt.xlabel("Index")
 plt.ylabel("Value")
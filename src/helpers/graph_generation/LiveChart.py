@@ -0,0 +1,365 @@
+import csv
+import math
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(SRC_DIR, "helpers", "storage"))
+from MinuteStore import read_minute_prices  # type: ignore
+
+"""
+Live chart of a set of instruments that follows the minute data as it
+arrives.
+
+Sources:
+- DirectoryFeed: the minute files the live retrievers write (Pure_Data,
+  OHCLV_Data); only files not seen yet are read, and only the charted
+  instruments are parsed from them
+- StoreFeed: a stored day (minute dir or .cbm, via MarketDataQuery),
+  replayed a few minutes per update
+- TradeLogTail: a trade log CSV (TRADE_LOG_COLUMNS, as written by
+  trade_log.to_csv) read from the last offset; BUY and exit markers are
+  drawn on the instrument's chart
+
+Each instrument keeps preallocated buffers and a running sum, so an update
+appends the new points and the running average in O(1). Drawing is
+incremental: the canvas keeps what is already drawn and every update only
+draws the new line segments and markers (animated "tail" artists) and
+blits the axes that changed. The full artists hold all points and are
+only redrawn when the y range has to grow or the window is resized, which
+happens a handful of times a session. CPU per update therefore does not
+grow with the session length.
+
+Usage:
+    python LiveChart.py Pure_Data "INFOSYS LIMITED" "WIPRO LIMITED" ... [--trades trades.csv]
+    python LiveChart.py market_data_9-11 NAME ... --replay [minutes_per_update] [--save chart.png]
+"""
+
+# ================= CONFIG =================
+SESSION_START = 9 * 60          # x axis, minutes of day (fixed, so x never rescales)
+SESSION_END = 15 * 60 + 35
+POLL_SECONDS = 1.0              # DirectoryFeed: how often the directory is listed
+SETTLE_SECONDS = 2.0            # the newest file is read once it is this old (writers are not atomic)
+REPLAY_MINUTES = 5              # StoreFeed: minutes appended per update
+Y_MARGIN = 0.25                 # y range grows by this fraction when a price leaves it
+MIN_Y_PAD = 0.005               # ... and at least this fraction of the price
+EXIT_ACTIONS = ("SELL", "SL_HIT", "TARGET_HIT", "FORCED_SELL", "FINAL_SELL")
+
+
+def minute_of_day(key: str) -> int:
+    """'HH-MM-SS' (or a file name starting with it) -> minutes since midnight."""
+    return int(key[:2]) * 60 + int(key[3:5])
+
+
+# ================= FEEDS =================
+class DirectoryFeed:
+    """New minute files of a directory that is still being written."""
+
+    def __init__(self, data_dir: str, names: List[str], settle_seconds: float = SETTLE_SECONDS):
+        self.data_dir = data_dir
+        self.wanted = set(names)
+        self.settle_seconds = settle_seconds
+        self.last_file: Optional[str] = None
+
+    def poll(self) -> List[Tuple[str, Dict[str, float]]]:
+        files = sorted(f for f in os.listdir(self.data_dir) if f.endswith(".txt")
+                       and (self.last_file is None or f > self.last_file))
+        if files:
+            newest = os.path.join(self.data_dir, files[-1])
+            if time.time() - os.path.getmtime(newest) < self.settle_seconds:
+                files = files[:-1]
+        out = []
+        for file in files:
+            out.append((file, dict(read_minute_prices(os.path.join(self.data_dir, file), self.wanted))))
+            self.last_file = file
+        return out
+
+
+class StoreFeed:
+    """A stored day, handed out `step` minutes per poll."""
+
+    def __init__(self, source: str, names: List[str], step: int = REPLAY_MINUTES):
+        from MarketDataQuery import MarketDataQuery  # type: ignore
+
+        q = MarketDataQuery(source)
+        self.labels: Dict[str, str] = {}                # stored name -> name as charted
+        columns = []
+        for name in names:
+            try:
+                columns.append(q.column(name))
+                self.labels[q.names[columns[-1]]] = name
+            except KeyError:
+                print(f"❌ {name} not in {source}")
+        self.minutes = q.minutes(columns=np.sort(np.asarray(columns, dtype=np.int64)))
+        self.step = step
+        self.done = False
+
+    def poll(self) -> List[Tuple[str, Dict[str, float]]]:
+        out = []
+        for key, names, prices in self.minutes:
+            out.append((key, {self.labels[n]: p for n, p in zip(names.tolist(), prices.tolist())}))
+            if len(out) == self.step:
+                return out
+        self.done = True
+        return out
+
+
+class TradeLogTail:
+    """Rows appended to a trade log CSV since the last poll."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self.header: Optional[List[str]] = None
+
+    def poll(self) -> List[Dict[str, str]]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                f.seek(self.offset)
+                chunk = f.read()
+        except FileNotFoundError:
+            return []
+        complete = chunk[:chunk.rfind("\n") + 1]        # a half-written last line waits
+        self.offset += len(complete.encode("utf-8"))
+        rows = list(csv.reader(complete.splitlines()))
+        if self.header is None and rows:
+            self.header, rows = rows[0], rows[1:]
+        return [dict(zip(self.header, row)) for row in rows if row]
+
+
+# ================= SERIES =================
+class Series:
+    """Growable x / y buffers; `view()` returns the filled part without copying."""
+
+    def __init__(self, capacity: int = SESSION_END - SESSION_START + 1):
+        self.x = np.empty(capacity)
+        self.y = np.empty(capacity)
+        self.n = 0
+
+    def append(self, x: float, y: float):
+        if self.n == len(self.x):
+            self.x = np.concatenate([self.x, np.empty(len(self.x))])
+            self.y = np.concatenate([self.y, np.empty(len(self.y))])
+        self.x[self.n], self.y[self.n] = x, y
+        self.n += 1
+
+    def view(self):
+        return self.x[:self.n], self.y[:self.n]
+
+    def tail(self, since: int):
+        """Points from `since` on, with the point before so a line segment connects."""
+        lo = max(0, since - 1)
+        return self.x[lo:self.n], self.y[lo:self.n]
+
+
+class InstrumentPanel:
+    """One instrument's axes: price, running average and trade markers."""
+
+    def __init__(self, ax, name: str):
+        self.ax = ax
+        self.name = name
+        self.price, self.average = Series(), Series()
+        self.buys, self.exits = Series(16), Series(16)
+        self.total = 0.0
+        self.last_x: Optional[float] = None
+        self.drawn = {"price": 0, "average": 0, "buys": 0, "exits": 0}   # points already on the canvas
+
+        kw = {"linewidth": 1.0}
+        self.full = {
+            "price": ax.plot([], [], color="tab:blue", **kw)[0],
+            "average": ax.plot([], [], color="tab:orange", linestyle="--", **kw)[0],
+            "buys": ax.plot([], [], "^", color="tab:green", markersize=7)[0],
+            "exits": ax.plot([], [], "v", color="tab:red", markersize=7)[0],
+        }
+        self.tail = {key: ax.plot([], [], animated=True, color=line.get_color(), linestyle=line.get_linestyle(),
+                                  marker=line.get_marker(), markersize=line.get_markersize(),
+                                  linewidth=line.get_linewidth())[0]
+                     for key, line in self.full.items()}
+        ax.set_title(name, fontsize=9)
+        ax.set_xlim(SESSION_START, SESSION_END)
+        ax.set_xticks(range(SESSION_START, SESSION_END + 1, 60))
+        ax.set_xticklabels([f"{m // 60:02d}:00" for m in range(SESSION_START, SESSION_END + 1, 60)], fontsize=7)
+        ax.tick_params(axis="y", labelsize=7)
+        ax.grid(True, alpha=0.3)
+        self.ylim: Optional[Tuple[float, float]] = None
+
+    def series(self, key: str) -> Series:
+        return getattr(self, key)
+
+    def add_price(self, x: float, price: float) -> bool:
+        """Append a price (and the running average); True if the y range had to grow."""
+        self.price.append(x, price)
+        self.total += price
+        self.average.append(x, self.total / self.price.n)
+        self.last_x = x
+        return self.fit(price)
+
+    def add_marker(self, action: str, x: Optional[float], price: float) -> bool:
+        x = self.last_x if x is None else x             # END exits sit at the last minute
+        if x is None:
+            return False
+        (self.buys if action == "BUY" else self.exits).append(x, price)
+        return self.fit(price)
+
+    def fit(self, price: float) -> bool:
+        if self.ylim is not None and self.ylim[0] <= price <= self.ylim[1]:
+            return False
+        lo, hi = (price, price) if self.ylim is None else (min(self.ylim[0], price), max(self.ylim[1], price))
+        pad = max((hi - lo) * Y_MARGIN, abs(price) * MIN_Y_PAD)
+        self.ylim = (lo - pad, hi + pad)
+        self.ax.set_ylim(*self.ylim)
+        return True
+
+    def sync_full(self):
+        """Give the full artists all points, for the next full draw."""
+        for key, line in self.full.items():
+            line.set_data(*self.series(key).view())
+            self.drawn[key] = self.series(key).n
+
+    def draw_tail(self) -> bool:
+        """Draw only the points added since the last draw onto the canvas; True if anything was drawn."""
+        drew = False
+        for key, line in self.tail.items():
+            s = self.series(key)
+            if s.n == self.drawn[key]:
+                continue
+            since = self.drawn[key] if key in ("price", "average") else self.drawn[key] + 1
+            line.set_data(*s.tail(since))
+            self.ax.draw_artist(line)
+            self.full[key].set_data(*s.view())
+            self.drawn[key] = s.n
+            drew = True
+        return drew
+
+
+# ================= CHART =================
+class LiveChart:
+    def __init__(self, names: List[str], title: str = ""):
+        import matplotlib.pyplot as plt
+
+        self.names = list(names)
+        cols = math.ceil(math.sqrt(len(self.names)))
+        rows = math.ceil(len(self.names) / cols)
+        self.fig, axes = plt.subplots(rows, cols, figsize=(min(4 * cols, 20), min(2.6 * rows, 12)), squeeze=False)
+        for ax in axes.flat[len(self.names):]:
+            ax.set_visible(False)
+        self.panels = {name: InstrumentPanel(ax, name) for name, ax in zip(self.names, axes.flat)}
+        self.fig.suptitle(title)
+        self.fig.tight_layout()
+
+        self.canvas = self.fig.canvas
+        self.needs_full_draw = True
+        self.full_draws = 0
+        self.update_seconds: List[float] = []
+        self.canvas.mpl_connect("resize_event", lambda event: setattr(self, "needs_full_draw", True))
+
+    def add_minutes(self, minutes: List[Tuple[str, Dict[str, float]]]):
+        for key, prices in minutes:
+            x = minute_of_day(key)
+            for name, price in prices.items():
+                panel = self.panels.get(name)
+                if panel is not None and not math.isnan(price):
+                    self.needs_full_draw |= panel.add_price(x, price)
+
+    def add_trades(self, trades: List[Dict[str, str]]):
+        for trade in trades:
+            panel = self.panels.get(trade.get("Stock", "").strip())
+            if panel is None or trade.get("Action") not in ("BUY",) + EXIT_ACTIONS:
+                continue
+            when = trade.get("Time", "")
+            x = minute_of_day(when) if when[:2].isdigit() else None
+            self.needs_full_draw |= panel.add_marker(trade["Action"], x, float(trade["Price"]))
+
+    def full_draw(self):
+        for panel in self.panels.values():
+            panel.sync_full()
+        self.canvas.draw()
+        self.full_draws += 1
+        self.needs_full_draw = False
+
+    def refresh(self):
+        """Put the new points on screen: blit the changed axes, or redraw everything if the layout changed."""
+        started = time.perf_counter()
+        if self.needs_full_draw:
+            self.full_draw()
+        else:
+            for panel in self.panels.values():
+                if panel.draw_tail():
+                    self.canvas.blit(panel.ax.bbox)
+        self.canvas.flush_events()
+        self.update_seconds.append(time.perf_counter() - started)
+
+    def run(self, feed, trades: Optional[TradeLogTail] = None, interval: float = POLL_SECONDS):
+        """Poll the feed until it is done (StoreFeed) or the window is closed."""
+        import matplotlib.pyplot as plt
+
+        if plt.get_backend().lower() != "agg":
+            plt.show(block=False)
+        while plt.fignum_exists(self.fig.number):
+            self.add_minutes(feed.poll())
+            if trades is not None:
+                self.add_trades(trades.poll())
+            self.refresh()
+            if getattr(feed, "done", False):
+                break
+            if interval:
+                self.canvas.start_event_loop(interval)
+
+    def cost_summary(self) -> str:
+        ms = np.asarray(self.update_seconds) * 1000
+        if len(ms) < 4:
+            return f"{len(ms)} updates"
+        quarter = len(ms) // 4
+        return (f"{len(ms)} updates, {self.full_draws} full redraws; median update "
+                f"{np.median(ms[:quarter]):.2f} ms in the first quarter, {np.median(ms[-quarter:]):.2f} ms in the last")
+
+
+# ================= MAIN =================
+def main():
+    args = sys.argv[1:]
+    save = trades_path = None
+    if "--save" in args:
+        i = args.index("--save")
+        save = args[i + 1]
+        del args[i:i + 2]
+    if "--trades" in args:
+        i = args.index("--trades")
+        trades_path = args[i + 1]
+        del args[i:i + 2]
+    replay = "--replay" in args
+    step = REPLAY_MINUTES
+    if replay:
+        i = args.index("--replay")
+        if i + 1 < len(args) and args[i + 1].isdigit():
+            step = int(args.pop(i + 1))
+        args.pop(i)
+    if len(args) < 2:
+        raise SystemExit("usage: python LiveChart.py <data_dir | .cbm> NAME [NAME ...] "
+                         "[--replay [minutes]] [--trades trades.csv] [--save chart.png]")
+    source, names = args[0], args[1:]
+
+    if save:
+        import matplotlib
+        matplotlib.use("Agg")
+
+    feed = StoreFeed(source, names, step) if replay else DirectoryFeed(source, names)
+    chart = LiveChart(names, title=os.path.basename(os.path.normpath(source)))
+    trades = TradeLogTail(trades_path) if trades_path else None
+    try:
+        chart.run(feed, trades, interval=0 if save else POLL_SECONDS)
+    except KeyboardInterrupt:
+        pass
+
+    if save:
+        chart.full_draw()
+        chart.fig.savefig(save)
+        print(f"✅ Saved {save}")
+    print(f"Live chart: {chart.cost_summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(SRC_DIR, "helpers", "storage"))
+
+"""
+Plotting helpers for long price series.
+
+- lttb() downsamples a series to a fixed number of points with the
+  Largest-Triangle-Three-Buckets algorithm, which keeps peaks, troughs and
+  the overall shape of the line
+- plot_series() draws a (downsampled) series with its running average and
+  only as many value / % change labels as fit on the axis
+- render_batch() renders many series to PNG files headlessly (Agg backend)
+  in parallel worker processes
+
+Usage:
+    python SeriesPlotter.py bars.npz charts/     # every instrument of a resampled day
+    python SeriesPlotter.py Values.txt charts/   # a single one-value-per-line file
+    python SeriesPlotter.py Pure_Data charts/ "INFOSYS LIMITED" ...
+                                                 # instruments of a stored day (minute
+                                                 # dir or .cbm), via MarketDataQuery
+"""
+
+# ================= CONFIG =================
+MAX_POINTS = 1500               # points actually drawn per line
+LABELS_PER_INCH = 1.5           # readable annotation density
+MARKER_LIMIT = 200              # draw markers only for short series
+FIG_SIZE = (12, 5)
+DPI = 100
+
+
+# ================= DATA =================
+def load_values(path: str) -> np.ndarray:
+    """One number per line, as written for Values.txt."""
+    values = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                values.append(float(line))
+    return np.asarray(values, dtype=np.float64)
+
+
+def running_average(values: np.ndarray) -> np.ndarray:
+    """Mean of the finite values so far; NaN until the first finite one."""
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    counts = np.cumsum(finite)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg = np.cumsum(np.where(finite, values, 0.0)) / counts
+    avg[counts == 0] = np.nan
+    return avg
+
+
+def pct_change(values: np.ndarray) -> np.ndarray:
+    """% change from the previous value; 0 for the first one."""
+    out = np.zeros(len(values))
+    if len(values) > 1:
+        out[1:] = (values[1:] - values[:-1]) / values[:-1] * 100
+    return out
+
+
+# ================= DOWNSAMPLING =================
+def lttb(y: np.ndarray, n_out: int, x: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets. Returns the sorted indices of the
+    `n_out` points to draw; first and last points are always kept.
+    NaNs are dropped before bucketing.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    idx = np.flatnonzero(~np.isnan(y))
+    if len(idx) <= n_out or n_out < 3:
+        return idx
+    x = idx.astype(np.float64) if x is None else np.asarray(x, dtype=np.float64)[idx]
+    yv = y[idx]
+
+    n = len(idx)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket is the third triangle vertex
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nlo:nhi].mean(), yv[nlo:nhi].mean()
+
+        bx, by = x[lo:hi], yv[lo:hi]
+        area = np.abs((x[a] - cx) * (by - yv[a]) - (x[a] - bx) * (cy - yv[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+
+    return idx[out]
+
+
+def label_indices(shown: np.ndarray, values: np.ndarray, width_inches: float) -> np.ndarray:
+    """
+    Pick which of the drawn points get a text label: evenly spread at
+    LABELS_PER_INCH, plus the series' high and low.
+    """
+    max_labels = max(2, int(width_inches * LABELS_PER_INCH))
+    if len(shown) <= max_labels:
+        return shown
+    picks = shown[np.linspace(0, len(shown) - 1, max_labels - 2).astype(np.int64)]
+    if np.isnan(values).all():
+        return picks
+    extremes = [int(np.nanargmax(values)), int(np.nanargmin(values))]
+    return np.unique(np.r_[picks, extremes])
+
+
+# ================= PLOTTING =================
+def plot_series(ax, values, title="", show_average=True, annotate=True, max_points=MAX_POINTS):
+    values = np.asarray(values, dtype=np.float64)
+    shown = lttb(values, max_points)
+    marker = "o" if len(shown) <= MARKER_LIMIT else None
+
+    ax.plot(shown, values[shown], marker=marker, label="Actual Values")
+
+    if show_average and len(values):
+        avg = running_average(values)
+        avg_shown = lttb(avg, max_points)
+        ax.plot(avg_shown, avg[avg_shown], linestyle="--",
+                marker="x" if marker else None, label="Running Average")
+
+    if annotate and len(values):
+        pct = pct_change(values)
+        width = ax.figure.get_size_inches()[0]
+        for i in label_indices(shown, values, width):
+            ax.text(i, values[i], f"{values[i]:.2f} ({pct[i]:+.2f}%)", fontsize=8, ha="left", va="bottom")
+
+    ax.set_title(title)
+    ax.set_xlabel("Index")
+    ax.set_ylabel("Value")
+    ax.grid(True)
+    if show_average:
+        ax.legend()
+
+
+def render_png(job: Dict) -> str:
+    """Render one job {values, out_path, title?, annotate?} to a PNG file."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=FIG_SIZE)
+    plot_series(ax, job["values"], job.get("title", ""),
+                show_average=job.get("show_average", True),
+                annotate=job.get("annotate", True))
+    fig.tight_layout()
+    fig.savefig(job["out_path"], dpi=DPI)
+    plt.close(fig)
+    return job["out_path"]
+
+
+def render_batch(jobs: List[Dict], workers: Optional[int] = None) -> List[str]:
+    """Render many jobs in parallel; returns the written paths."""
+    if not jobs:
+        return []
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [render_png(job) for job in jobs]
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(render_png, jobs, chunksize=chunksize))
+
+
+def safe_filename(name: str) -> str:
+    return "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in name).strip("_")
+
+
+# ================= MAIN =================
+def main():
+    if len(sys.argv) < 3:
+        raise SystemExit("usage: python SeriesPlotter.py <bars.npz | values.txt | data_dir [instrument ...]> <out_dir>")
+    source, out_dir = sys.argv[1], sys.argv[2]
+    os.makedirs(out_dir, exist_ok=True)
+
+    if source.endswith(".npz"):
+        z = np.load(source, allow_pickle=True)
+        close, names = z["close"], list(z["names"])
+        jobs = [
+            {
+                "values": close[:, i],
+                "title": names[i],
+                "out_path": os.path.join(out_dir, f"{i:05d}_{safe_filename(names[i])}.png"),
+            }
+            for i in np.flatnonzero(~np.isnan(close).all(axis=0))
+        ]
+    elif os.path.isdir(source) or source.endswith(".cbm"):
+        from MarketDataQuery import MarketDataQuery  # type: ignore
+
+        q = MarketDataQuery(source)
+        jobs = []
+        for name in sys.argv[3:]:
+            _, values = q.series_array(name)
+            jobs.append({"values": values, "title": name,
+                         "out_path": os.path.join(out_dir, f"{safe_filename(name)}.png")})
+    else:
+        stem = os.path.splitext(os.path.basename(source))[0]
+        jobs = [{"values": load_values(source), "title": stem,
+                 "out_path": os.path.join(out_dir, f"{safe_filename(stem)}.png")}]
+
+    paths = render_batch(jobs)
+    print(f"✅ Rendered {len(paths)} charts to {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,17 @@
 import os
-import time
+import sys
 import upstox_client
 from upstox_client.rest import ApiException
 
 """
 Fetches daily OHLCV (Open, High, Low, Close, Volume) data for multiple stocks
 from the Upstox API and saves it to a text file.
-- Reads stock names and instrument keys from Resources/Stocks.txt
+- Reads stock names and instrument keys from the instrument master index
 - Fetches historical daily candle data for a given date
 - Stores results in Resources/ohlcv_<date>.txt
-- Uses a fixed delay between requests to avoid API rate limits
+- Takes a "backfill" permit from the RequestScheduler before each request,
+  so it uses spare API headroom without delaying the live pollers (a fixed
+  delay when the service is not running)
 - Handles missing data or API errors safely
 Usage:
     fetch_all_ohlcv("YYYY-MM-DD")
@@ -18,27 +20,28 @@ Usage:
 ACCESS_TOKEN = "YOUR_ACCESS_TOKEN"
 API_VERSION = "2.0"
 
-REQUEST_DELAY = 0.35   # ~3 requests/sec (SAFE)
+REQUEST_DELAY = 0.35   # ~3 requests/sec (SAFE) when the RequestScheduler is not running
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 RESOURCES_DIR = os.path.join(BASE_DIR, "historical_data", "Resources")
 
-STOCK_FILE = os.path.join(RESOURCES_DIR, "StockNamesWithSymbols.txt")
+sys.path.append(os.path.join(BASE_DIR, "tickers"))
+sys.path.append(os.path.join(os.path.dirname(BASE_DIR), "core", "live_market_data_retrival"))
+from InstrumentMaster import INDEX_FILE, load_master  # type: ignore
+from RequestScheduler import PermitClient, is_throttled, retry_after  # type: ignore
+
+STOCK_FILE = INDEX_FILE
+PERMITS = PermitClient("backfill", fallback_delay=REQUEST_DELAY)
 
 
 
 def load_instrument_keys(path):
-    instruments = {}
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            if ":" not in line:
-                continue
-            k, v = line.strip().split(":", 1)
-            instruments[k.strip().strip('"')] = v.strip().strip('"')
-    return instruments
+    master = load_master(path)
+    return {k: master.names[i] for i, k in enumerate(master.keys) if master.active[i]}
 
 
 def fetch_ohlcv(instrument_key, date, history_api):
+    PERMITS.acquire("historical")
     try:
         resp = history_api.get_historical_candle_data(
             instrument_key,
@@ -54,7 +57,9 @@ def fetch_ohlcv(instrument_key, date, history_api):
         c = candles[0]
         return c[1], c[2], c[3], c[4], c[5]
 
-    except ApiException:
+    except ApiException as e:
+        if is_throttled(e):
+            PERMITS.throttled("historical", retry_after(e))
         return None
 
 
@@ -81,9 +86,6 @@ def fetch_all_ohlcv(date):
                 o, h, l, c, v = data
                 out.write(f"{name} | {o} | {h} | {l} | {c} | {v}\n")
 
-            # 🔒 RATE LIMIT CONTROL
-            time.sleep(REQUEST_DELAY)
-
             if i % 50 == 0:
                 print(f"Fetched {i}/{len(instruments)} stocks")
 
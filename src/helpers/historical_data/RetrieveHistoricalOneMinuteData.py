@@ -1,13 +1,20 @@
 import os
+import sys
 import upstox_client
 from upstox_client.rest import ApiException
 
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(SRC_DIR, "core", "live_market_data_retrival"))
+from RequestScheduler import PermitClient  # type: ignore
+
 ACCESS_TOKEN = "YOUR_ACCESS_TOKEN"
 API_VERSION = "2.0"
 
 INSTRUMENT_KEY = "NSE_EQ|INE849A01020"   # RELIANCE INDUSTRIES
 TARGET_DATE = "2025-12-23"              # yyyy-mm-dd ONLY
 
+PERMITS = PermitClient("backfill", fallback_delay=0)
+
 
 def save_1min_candles_to_file():
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -21,6 +28,7 @@ def save_1min_candles_to_file():
     client = upstox_client.ApiClient(config)
     history_api = upstox_client.HistoryApi(client)
 
+    PERMITS.acquire("historical")
     try:
         # ⚠️ SDK supports ONLY to_date
         resp = history_api.get_historical_candle_data(
@@ -0,0 +1,209 @@
+import hashlib
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from MinuteStore import MinuteStore, import_text_dir  # type: ignore
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(SRC_DIR, "helpers", "tickers"))
+from InstrumentMaster import normalise_name  # type: ignore
+
+"""
+Indexed queries over one day of stored market data.
+
+    q = MarketDataQuery("Pure_Data")                 # text dir, or a .cbm file
+    q.series("INFOSYS LIMITED", "09:15", "11:00")    # pd.Series by minute key
+    q.cross_section("10:20")                         # pd.Series by instrument name
+    for time_key, names, prices in q.minutes(): ...  # minute by minute, file order
+
+- time index: minute keys sorted, as seconds of day; start / end / minute
+  are resolved with a binary search and accept "10:20", "10-20",
+  "10:20:00" or "10-20-29"; a minute is matched to the first snapshot
+  taken in it
+- instrument index: exact name -> columns, then the normalised name
+  (LIMITED / LTD suffixes dropped) as a fallback
+- data is decoded tile by tile from MinuteStore, so a query touches only
+  the tiles that overlap its rows and columns
+
+Text directories (Pure_Data, OHLCV_Data, sample_data/...) are imported
+into a .cbm file under CACHE_DIR (at the repository root) the first time
+they are opened; the cache file name is derived from the directory's path,
+file count and newest mtime, so new or rewritten minute files trigger a
+re-import. Imports of an older signature of the same directory are
+deleted once they are STALE_SECONDS old, so a directory that grows during
+the session keeps only its recent imports. Concurrent imports of one
+directory each write their own tmp file; whichever renames last wins.
+
+Usage:
+    python MarketDataQuery.py <source> series <instrument> [start] [end]
+    python MarketDataQuery.py <source> cross <minute>
+"""
+
+# ================= CONFIG =================
+REPO_DIR = os.path.dirname(SRC_DIR)
+CACHE_DIR = os.path.join(REPO_DIR, ".minute_store_cache")
+STALE_SECONDS = 300                 # older imports of the same directory are kept this long (open readers)
+
+
+# ================= TIME KEYS =================
+def seconds_of_day(key: str) -> int:
+    """'10:20', '10-20-29', '10:20:00' -> seconds since midnight."""
+    parts = [int(p) for p in key.replace(":", "-").split("-")]
+    h, m, s = (parts + [0, 0])[:3]
+    return h * 3600 + m * 60 + s
+
+
+# ================= SOURCES =================
+def text_dir_signature(text_dir: str) -> str:
+    files = [f for f in os.listdir(text_dir) if f.endswith(".txt")]
+    newest = max((os.stat(os.path.join(text_dir, f)).st_mtime_ns for f in files), default=0)
+    token = f"{os.path.abspath(text_dir)}|{len(files)}|{newest}"
+    return hashlib.sha1(token.encode()).hexdigest()[:16]
+
+
+def cache_prefix(text_dir: str) -> str:
+    """File name prefix shared by every import of one directory."""
+    name = os.path.basename(os.path.normpath(text_dir))
+    return f"{name}-{hashlib.sha1(os.path.abspath(text_dir).encode()).hexdigest()[:8]}-"
+
+
+def evict_stale(cache_dir: str, prefix: str, keep: str) -> int:
+    """Delete older imports (and leftover tmp files) of one directory; returns the count."""
+    removed, now = 0, time.time()
+    for file in os.listdir(cache_dir):
+        if not file.startswith(prefix) or file == keep or not file.endswith((".cbm", ".tmp")):
+            continue
+        try:
+            if now - os.path.getmtime(os.path.join(cache_dir, file)) > STALE_SECONDS:
+                os.remove(os.path.join(cache_dir, file))
+                removed += 1
+        except FileNotFoundError:
+            pass                            # another process evicted it first
+    return removed
+
+
+def resolve_store(source: str, cache_dir: str = CACHE_DIR) -> str:
+    """Path of the .cbm file behind a source, importing text dirs when needed."""
+    if not os.path.isdir(source):
+        return source
+    os.makedirs(cache_dir, exist_ok=True)
+    prefix = cache_prefix(source)
+    path = os.path.join(cache_dir, f"{prefix}{text_dir_signature(source)}.cbm")
+    if not os.path.exists(path):
+        try:
+            import_text_dir(source, path)
+        except FileNotFoundError:
+            # Another process finished the same import first
+            if not os.path.exists(path):
+                raise
+        evict_stale(cache_dir, prefix, os.path.basename(path))
+    return path
+
+
+# ================= QUERIES =================
+class MarketDataQuery:
+    def __init__(self, source: str, cache_dir: str = CACHE_DIR):
+        self.source = source
+        self.store = MinuteStore(resolve_store(source, cache_dir))
+        self.time_keys: List[str] = self.store.minutes
+        self.names: List[str] = self.store.names
+
+        # time index
+        self.seconds = np.array([seconds_of_day(k) for k in self.time_keys], dtype=np.int64)
+        self._order_ok = bool(np.all(np.diff(self.seconds) >= 0))
+
+        # instrument index
+        self.columns: Dict[str, List[int]] = {}
+        self.columns_by_norm: Dict[str, List[int]] = {}
+        for col, name in enumerate(self.names):
+            self.columns.setdefault(name, []).append(col)
+            self.columns_by_norm.setdefault(normalise_name(name), []).append(col)
+
+    # ----- indexes -----
+    def column(self, instrument: str, occurrence: int = 0) -> int:
+        cols = self.columns.get(instrument.strip()) or self.columns_by_norm.get(normalise_name(instrument))
+        if not cols or occurrence >= len(cols):
+            raise KeyError(f"Unknown instrument {instrument!r}")
+        return cols[occurrence]
+
+    def row_range(self, start: Optional[str] = None, end: Optional[str] = None) -> Tuple[int, int]:
+        """Rows whose minute lies in [start, end] (whole minutes, inclusive)."""
+        if not self._order_ok:
+            raise ValueError("Minute keys are not in time order")
+        lo = 0 if start is None else int(np.searchsorted(self.seconds, seconds_of_day(start) // 60 * 60, "left"))
+        hi = len(self.seconds) if end is None else int(np.searchsorted(self.seconds, seconds_of_day(end) // 60 * 60 + 60, "left"))
+        return lo, max(lo, hi)
+
+    def row(self, minute: str) -> int:
+        lo, hi = self.row_range(minute, minute)
+        if lo == hi:
+            raise KeyError(f"No data for minute {minute!r}")
+        return lo
+
+    # ----- arrays -----
+    def series_array(self, instrument: str, start=None, end=None, field: Optional[str] = None, occurrence: int = 0):
+        col = self.column(instrument, occurrence)
+        lo, hi = self.row_range(start, end)
+        return self.time_keys[lo:hi], self.store.read(field, slice(lo, hi), slice(col, col + 1))[:, 0]
+
+    def cross_section_array(self, minute: str, field: Optional[str] = None) -> np.ndarray:
+        r = self.row(minute)
+        return self.store.read(field, slice(r, r + 1))[0]
+
+    # ----- frames -----
+    def series(self, instrument: str, start=None, end=None, field: Optional[str] = None, occurrence: int = 0) -> pd.Series:
+        keys, values = self.series_array(instrument, start, end, field, occurrence)
+        return pd.Series(values, index=pd.Index(keys, name="time"), name=instrument)
+
+    def cross_section(self, minute: str, field: Optional[str] = None, dropna: bool = True) -> pd.Series:
+        s = pd.Series(self.cross_section_array(minute, field), index=pd.Index(self.names, name="instrument"),
+                      name=self.time_keys[self.row(minute)])
+        return s.dropna() if dropna else s
+
+    def frame(self, start=None, end=None, field: Optional[str] = None) -> pd.DataFrame:
+        lo, hi = self.row_range(start, end)
+        return pd.DataFrame(self.store.read(field, slice(lo, hi)), index=self.time_keys[lo:hi], columns=self.names)
+
+    def minutes(self, field: Optional[str] = None, columns=None, start: int = 0,
+                stop: Optional[int] = None) -> Iterator[Tuple[str, np.ndarray, np.ndarray]]:
+        """
+        (time_key, names, prices) per stored minute, in time order, with missing
+        prices dropped; names keep the source's column (file) order.
+        `columns` (indices, ascending) restricts the instruments returned,
+        `start` / `stop` the rows (minute positions, stop exclusive).
+        """
+        names = np.asarray(self.names, dtype=object)
+        if columns is not None:
+            names = names[columns]
+        stop = len(self.time_keys) if stop is None else min(stop, len(self.time_keys))
+        step = self.store.tile_minutes
+        for lo in range(start, stop, step):
+            block = self.store.read(field, slice(lo, min(lo + step, stop)))
+            if columns is not None:
+                block = block[:, columns]
+            for i, values in enumerate(block):
+                present = ~np.isnan(values)
+                yield self.time_keys[lo + i], names[present], values[present]
+
+
+# ================= MAIN =================
+def main():
+    if len(sys.argv) < 4:
+        raise SystemExit("usage: python MarketDataQuery.py <source> series <instrument> [start] [end] | cross <minute>")
+    q = MarketDataQuery(sys.argv[1])
+    pd.set_option("display.max_rows", 60)
+    if sys.argv[2] == "series":
+        start = sys.argv[4] if len(sys.argv) > 4 else None
+        end = sys.argv[5] if len(sys.argv) > 5 else None
+        print(q.series(sys.argv[3], start, end).to_string())
+    else:
+        print(q.cross_section(sys.argv[3]).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+import json
+import os
+import struct
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+"""
+Compact binary store (.cbm) for a day of minute prices or OHLCV bars.
+
+Layout of a .cbm file:
+    b"CBM1" | u32 header length | header JSON | tile blobs
+
+The header holds the minute keys (file stems such as "09-15-29"), the
+instrument names in column order, the fields ("price" or
+open/high/low/close/volume), each field's decimal scale and the tile index.
+
+Each field is a (minutes x instruments) matrix cut into tiles of
+TILE_MINUTES x TILE_INSTRUMENTS. A tile blob is:
+    presence bitmap (np.packbits, column-major) | varint stream
+The varint stream holds the present values of the tile, column-major (one
+instrument after the other), as tick-scaled integers: the first value is
+absolute, every other one a zigzag-encoded delta to the previous value, so
+a minute-to-minute price move of a few ticks costs one byte. Every tile
+starts from an absolute value, so any tile decodes on its own.
+
+Fields whose values need more than MAX_DECIMALS decimals fall back to the
+raw float64 bits (lossless, just less compact).
+
+Decoding is vectorised: varint boundaries from the continuation bits,
+np.add.reduceat to assemble the integers, a zigzag flip and one cumsum per
+tile. Scaled integers divided by 10**decimals give back exactly the floats
+the text parser produces.
+
+Text formats handled by import / export:
+    snapshot  "NAME : price"  or  "NAME : NA"
+    OHLCV     "NAME : open,high,low,close,volume"
+Export writes every instrument of the day in column order, with NA for
+missing snapshot prices (missing OHLCV rows are left out).
+
+Usage:
+    python MinuteStore.py import <text_dir> <day.cbm>
+    python MinuteStore.py export <day.cbm> <text_dir>
+    python MinuteStore.py info <day.cbm>
+"""
+
+# ================= CONFIG =================
+MAGIC = b"CBM1"
+TILE_MINUTES = 64
+TILE_INSTRUMENTS = 512
+MAX_DECIMALS = 6
+RAW_FLOAT = -1                      # decimals value: float64 bits stored as integers
+SNAPSHOT_FIELDS = ("price",)
+OHLCV_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+# ================= VARINTS =================
+def zigzag_encode(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.int64)
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+
+def zigzag_decode(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.uint64)
+    return (values >> np.uint64(1)).astype(np.int64) ^ -(values & np.uint64(1)).astype(np.int64)
+
+
+def varint_encode(values: np.ndarray) -> bytes:
+    """Unsigned LEB128 of a uint64 array, vectorised over byte positions."""
+    values = np.asarray(values, dtype=np.uint64)
+    if len(values) == 0:
+        return b""
+    lengths = np.ones(len(values), dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        lengths += rest > 0
+        rest >>= np.uint64(7)
+
+    out = np.empty(int(lengths.sum()), dtype=np.uint8)
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    for k in range(int(lengths.max())):
+        has = lengths > k
+        byte = (values[has] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (lengths[has] > k + 1).astype(np.uint8) << 7
+        out[starts[has] + k] = byte.astype(np.uint8) | more
+    return out.tobytes()
+
+
+def varint_decode(data: np.ndarray) -> np.ndarray:
+    """Inverse of varint_encode for a uint8 array."""
+    if len(data) == 0:
+        return np.empty(0, dtype=np.uint64)
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    position = np.arange(len(data)) - np.repeat(starts, ends - starts + 1)
+    parts = (data & 0x7F).astype(np.uint64) << (np.uint64(7) * position.astype(np.uint64))
+    return np.add.reduceat(parts, starts)
+
+
+# ================= TILES =================
+def encode_tile(scaled: np.ndarray, present: np.ndarray) -> Tuple[bytes, int]:
+    """(blob, bitmap bytes) for one tile of scaled integers."""
+    bitmap = np.packbits(present.T.ravel()).tobytes()
+    values = scaled.T[present.T]
+    if len(values):
+        deltas = np.empty(len(values), dtype=np.int64)
+        deltas[0] = values[0]
+        deltas[1:] = values[1:] - values[:-1]
+        stream = varint_encode(zigzag_encode(deltas))
+    else:
+        stream = b""
+    return bitmap + stream, len(bitmap)
+
+
+def decode_tile(blob: memoryview, bitmap_bytes: int, rows: int, cols: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(scaled int64 [rows, cols], present bool [rows, cols]) of one tile."""
+    raw = np.frombuffer(blob, dtype=np.uint8)
+    present_t = np.unpackbits(raw[:bitmap_bytes], count=rows * cols).astype(bool).reshape(cols, rows)
+    values = np.cumsum(zigzag_decode(varint_decode(raw[bitmap_bytes:])))
+    scaled_t = np.zeros((cols, rows), dtype=np.int64)
+    scaled_t[present_t] = values
+    return scaled_t.T, present_t.T
+
+
+def choose_decimals(values: np.ndarray) -> int:
+    """
+    Smallest number of decimals that represents every finite value exactly,
+    or RAW_FLOAT when none up to MAX_DECIMALS does.
+    """
+    finite = values[~np.isnan(values)]
+    for decimals in range(MAX_DECIMALS + 1):
+        scale = 10 ** decimals
+        if np.array_equal(np.round(finite * scale) / scale, finite):
+            return decimals
+    return RAW_FLOAT
+
+
+def to_scaled(values: np.ndarray, decimals: int) -> np.ndarray:
+    filled = np.nan_to_num(values)
+    if decimals == RAW_FLOAT:
+        return filled.view(np.int64)
+    return np.round(filled * 10 ** decimals).astype(np.int64)
+
+
+def from_scaled(scaled: np.ndarray, decimals: int) -> np.ndarray:
+    if decimals == RAW_FLOAT:
+        return scaled.view(np.float64).copy()
+    return scaled / 10 ** decimals
+
+
+# ================= TEXT FORMATS =================
+def _parse_value(raw: str, width: int):
+    parts = raw.split(",")
+    if len(parts) != width:
+        return None
+    try:
+        return [float(p) for p in parts]
+    except ValueError:
+        return None
+
+
+def read_minute_file(path: str) -> Tuple[List[str], List[str]]:
+    """Names and raw value strings ("NA", "price" or "o,h,l,c,v") of one minute file, in file order."""
+    names, raws = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            s = line.rsplit(":", 1)
+            if len(s) == 2:
+                name = s[0].strip()
+                if name:
+                    names.append(name)
+                    raws.append(s[1].strip())
+    return names, raws
+
+
+def price_value(raw: str) -> Optional[float]:
+    """Snapshot price or OHLCV close of a raw value; None for NA or malformed values."""
+    parts = raw.split(",")
+    if len(parts) not in (len(SNAPSHOT_FIELDS), len(OHLCV_FIELDS)):
+        return None
+    try:
+        return float(parts[OHLCV_FIELDS.index("close")] if len(parts) == len(OHLCV_FIELDS) else parts[0])
+    except ValueError:
+        return None
+
+
+def read_minute_prices(path: str, wanted=None) -> List[Tuple[str, float]]:
+    """(name, price) rows of one minute file in file order (close for OHLCV), NA skipped; only `wanted` names if given."""
+    rows = []
+    for name, raw in zip(*read_minute_file(path)):
+        if wanted is not None and name not in wanted:
+            continue
+        price = price_value(raw)
+        if price is not None:
+            rows.append((name, price))
+    return rows
+
+
+def parse_text_dir(text_dir: str):
+    """
+    Minute text files -> (minute keys, names, fields, values[field, minute, instrument]).
+    A name repeated within a file gets its own column per occurrence.
+    """
+    files = sorted(f for f in os.listdir(text_dir) if f.endswith(".txt"))
+    columns: Dict[Tuple[str, int], int] = {}
+    names: List[str] = []
+    parsed = []
+    fields = None
+    prev_names, prev_cols = None, None
+
+    for file in files:
+        file_names, raws = read_minute_file(os.path.join(text_dir, file))
+
+        # Minute files of a day normally list the same names in the same order
+        if file_names == prev_names:
+            cols = prev_cols
+        else:
+            seen: Dict[str, int] = {}
+            cols = []
+            for name in file_names:
+                occurrence = seen.get(name, 0)
+                seen[name] = occurrence + 1
+                col = columns.get((name, occurrence))
+                if col is None:
+                    col = columns[(name, occurrence)] = len(names)
+                    names.append(name)
+                cols.append(col)
+            prev_names, prev_cols = file_names, cols
+
+        if fields is None:
+            sample = next((r for r in raws if r != "NA"), None)
+            if sample is not None:
+                fields = OHLCV_FIELDS if len(sample.split(",")) == 5 else SNAPSHOT_FIELDS
+        parsed.append((cols, raws))
+
+    fields = fields or SNAPSHOT_FIELDS
+    width = len(fields)
+    values = np.full((width, len(files), len(names)), np.nan)
+    for t, (cols, raws) in enumerate(parsed):
+        if width == 1:
+            row = np.full(len(names), np.nan)
+            for col, raw in zip(cols, raws):
+                if raw != "NA":
+                    try:
+                        row[col] = float(raw)
+                    except ValueError:
+                        pass
+            values[0, t] = row
+            continue
+        keep_cols, rows = [], []
+        for col, raw in zip(cols, raws):
+            v = _parse_value(raw, width)
+            if v is not None:
+                keep_cols.append(col)
+                rows.append(v)
+        if keep_cols:
+            values[:, t, keep_cols] = np.asarray(rows).T
+    return [os.path.splitext(f)[0] for f in files], names, fields, values
+
+
+def write_text_dir(out_dir: str, minutes: List[str], names: List[str], fields: Sequence[str], values: np.ndarray):
+    os.makedirs(out_dir, exist_ok=True)
+    ohlcv = tuple(fields) == OHLCV_FIELDS
+    for t, minute in enumerate(minutes):
+        lines = []
+        for col, name in enumerate(names):
+            row = values[:, t, col]
+            if np.isnan(row).any():
+                if not ohlcv:
+                    lines.append(f"{name} : NA\n")
+                continue
+            if ohlcv:
+                o, h, l, c, v = row.tolist()
+                lines.append(f"{name} : {o},{h},{l},{c},{int(v)}\n")
+            else:
+                lines.append(f"{name} : {row[0].tolist()}\n")
+        with open(os.path.join(out_dir, f"{minute}.txt"), "w", encoding="utf-8") as f:
+            f.writelines(lines)
+
+
+# ================= FILE =================
+def write_cbm(path: str, minutes: List[str], names: List[str], fields: Sequence[str], values: np.ndarray) -> None:
+    """values is (fields, minutes, instruments) float64 with NaN for missing."""
+    n_min, n_inst = values.shape[1], values.shape[2]
+    header = {
+        "version": 1, "minutes": list(minutes), "names": list(names), "fields": list(fields),
+        "tile_minutes": TILE_MINUTES, "tile_instruments": TILE_INSTRUMENTS,
+        "decimals": [], "tiles": [],
+    }
+    blobs, offset = [], 0
+    for fi in range(len(fields)):
+        field_values = values[fi]
+        decimals = choose_decimals(field_values)
+        header["decimals"].append(decimals)
+        present = ~np.isnan(field_values)
+        scaled = np.where(present, to_scaled(field_values, decimals), 0)
+        for t0 in range(0, n_min, TILE_MINUTES):
+            for c0 in range(0, n_inst, TILE_INSTRUMENTS):
+                t1, c1 = min(t0 + TILE_MINUTES, n_min), min(c0 + TILE_INSTRUMENTS, n_inst)
+                blob, bitmap_bytes = encode_tile(scaled[t0:t1, c0:c1], present[t0:t1, c0:c1])
+                header["tiles"].append([fi, t0, c0, offset, len(blob), bitmap_bytes])
+                blobs.append(blob)
+                offset += len(blob)
+
+    head = json.dumps(header, separators=(",", ":")).encode()
+    # One tmp file per writer: processes importing the same directory at once
+    # each rename a complete file into place
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(head)) + head)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class MinuteStore:
+    """Read side of a .cbm file; tiles are decoded on demand."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:4] != MAGIC:
+            raise ValueError(f"{path} is not a .cbm file")
+        (head_len,) = struct.unpack("<I", data[4:8])
+        header = json.loads(data[8:8 + head_len])
+        self.body = memoryview(data)[8 + head_len:]
+
+        self.minutes: List[str] = header["minutes"]
+        self.names: List[str] = header["names"]
+        self.fields: List[str] = header["fields"]
+        self.decimals: List[int] = header["decimals"]
+        self.tile_minutes = header["tile_minutes"]
+        self.tile_instruments = header["tile_instruments"]
+        self.tiles = {(fi, t0, c0): (off, size, bm) for fi, t0, c0, off, size, bm in header["tiles"]}
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.minutes), len(self.names)
+
+    def field_index(self, field: str) -> int:
+        if field == "close" and field not in self.fields and "price" in self.fields:
+            field = "price"
+        if field == "price" and field not in self.fields and "close" in self.fields:
+            field = "close"
+        return self.fields.index(field)
+
+    def read(self, field: Optional[str] = None, rows: slice = slice(None), cols: slice = slice(None)) -> np.ndarray:
+        """float64 [minutes, instruments] of one field (NaN = missing), optionally a sub-block."""
+        fi = self.field_index(field or self.fields[0 if len(self.fields) == 1 else 3])
+        n_min, n_inst = self.shape
+        r0, r1, _ = rows.indices(n_min)
+        c0, c1, _ = cols.indices(n_inst)
+        out = np.full((max(0, r1 - r0), max(0, c1 - c0)), np.nan)
+        decimals = self.decimals[fi]
+
+        tm, ti = self.tile_minutes, self.tile_instruments
+        for t0 in range((r0 // tm) * tm, r1, tm):
+            for k0 in range((c0 // ti) * ti, c1, ti):
+                off, size, bm = self.tiles[(fi, t0, k0)]
+                th, tw = min(tm, n_min - t0), min(ti, n_inst - k0)
+                scaled, present = decode_tile(self.body[off:off + size], bm, th, tw)
+                a0, a1 = max(r0, t0), min(r1, t0 + th)
+                b0, b1 = max(c0, k0), min(c1, k0 + tw)
+                block = from_scaled(scaled[a0 - t0:a1 - t0, b0 - k0:b1 - k0], decimals)
+                block[~present[a0 - t0:a1 - t0, b0 - k0:b1 - k0]] = np.nan
+                out[a0 - r0:a1 - r0, b0 - c0:b1 - c0] = block
+        return out
+
+    def read_all(self) -> np.ndarray:
+        return np.stack([self.read(f) for f in self.fields])
+
+
+# ================= IMPORT / EXPORT =================
+def import_text_dir(text_dir: str, path: str) -> None:
+    minutes, names, fields, values = parse_text_dir(text_dir)
+    write_cbm(path, minutes, names, fields, values)
+
+
+def export_text_dir(path: str, out_dir: str) -> None:
+    store = MinuteStore(path)
+    write_text_dir(out_dir, store.minutes, store.names, store.fields, store.read_all())
+
+
+def dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+# ================= MAIN =================
+def main():
+    if len(sys.argv) < 3:
+        raise SystemExit("usage: python MinuteStore.py import <text_dir> <day.cbm> | export <day.cbm> <text_dir> | info <day.cbm>")
+    command = sys.argv[1]
+    if command == "import":
+        import_text_dir(sys.argv[2], sys.argv[3])
+        text, packed = dir_size(sys.argv[2]), os.path.getsize(sys.argv[3])
+        print(f"✅ {sys.argv[3]}: {packed / 1e6:.2f} MB ({text / packed:.1f}x smaller than {text / 1e6:.1f} MB of text)")
+    elif command == "export":
+        export_text_dir(sys.argv[2], sys.argv[3])
+        print(f"✅ Exported {sys.argv[2]} to {sys.argv[3]}")
+    else:
+        store = MinuteStore(sys.argv[2])
+        n_min, n_inst = store.shape
+        print(f"{sys.argv[2]}: {n_min} minutes x {n_inst} instruments, fields {store.fields}, "
+              f"decimals {store.decimals}, {len(store.tiles)} tiles")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import json
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+"""
+Instrument master shared by the live pollers, the historical fetchers and the
+backtester.
+
+Builds one table of instruments from StockNamesWithSymbols.txt (instrument key
++ company name) and the NSE symbol list (NseTickers.txt, linked to instrument
+keys through the ISIN file written by RetrieveNseTicker.py), assigns every
+instrument a stable integer ID and saves it as a prebuilt JSON index.
+
+The index is stored column-wise with the derived columns (ISIN, normalised
+name) precomputed; loading only rebuilds a handful of dicts, so every module gets
+O(1) lookups by instrument key, ISIN, NSE symbol and normalised company name
+without re-parsing the text sources.
+
+Usage:
+    python InstrumentMaster.py          # rebuild resources/InstrumentMaster.json
+    master = load_master()
+    master.by_key("NSE_EQ|INE002A01018")
+"""
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RESOURCES_DIR = os.path.join(BASE_DIR, "resources")
+
+STOCK_FILE = os.path.join(RESOURCES_DIR, "StockNamesWithSymbols.txt")
+TICKER_FILE = os.path.join(RESOURCES_DIR, "NseTickers.txt")
+ISIN_FILE = os.path.join(RESOURCES_DIR, "NseSymbolsWithIsin.txt")
+INDEX_FILE = os.path.join(RESOURCES_DIR, "InstrumentMaster.json")
+
+INDEX_VERSION = 1
+NAME_SUFFIXES = ("LIMITED", "LTD", "LT", "L")
+
+_loaded: Dict[str, "InstrumentMaster"] = {}
+
+
+# ================= NORMALISATION =================
+def normalise_name(name: str) -> str:
+    """Upper-case, drop punctuation and a trailing LIMITED/LTD/L suffix."""
+    s = re.sub(r"[^A-Z0-9& ]+", " ", name.upper())
+    words = s.split()
+    if len(words) > 1 and words[-1] in NAME_SUFFIXES:
+        words = words[:-1]
+    return " ".join(words)
+
+
+def normalise_symbol(symbol: str) -> str:
+    s = symbol.strip().upper()
+    if s.endswith(".NS"):
+        s = s[:-3]
+    return s
+
+
+def isin_of(instrument_key: str) -> str:
+    return instrument_key.split("|", 1)[-1]
+
+
+# ================= SOURCE PARSERS =================
+def parse_stock_file(path: str) -> List[tuple]:
+    """Parse the `"instrument_key": "company name"` listing."""
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip().rstrip(",")
+            if ":" not in line:
+                continue
+            k, v = line.split(":", 1)
+            inst = k.strip().strip('"')
+            name = v.strip().strip('"')
+            if inst:
+                rows.append((inst, name))
+    return rows
+
+
+def parse_ticker_file(path: str) -> List[str]:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [normalise_symbol(line) for line in f if line.strip()]
+
+
+def parse_isin_file(path: str) -> Dict[str, str]:
+    """ISIN -> NSE symbol, from the `SYMBOL,ISIN` file of RetrieveNseTicker.py."""
+    isin_to_symbol = {}
+    if not os.path.exists(path):
+        return isin_to_symbol
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = [p.strip() for p in line.split(",")]
+            if len(parts) < 2 or not parts[1] or parts[0] == "SYMBOL":
+                continue
+            isin_to_symbol[parts[1].upper()] = normalise_symbol(parts[0])
+    return isin_to_symbol
+
+
+# ================= MASTER =================
+class InstrumentMaster:
+    """Column lists indexed by instrument ID plus hash indexes over them."""
+
+    def __init__(
+        self,
+        keys: List[str],
+        names: List[str],
+        symbols: List[Optional[str]],
+        active: List[int],
+        isins: Optional[List[str]] = None,
+        norm_names: Optional[List[str]] = None,
+    ):
+        self.keys = keys
+        self.names = names
+        self.symbols = symbols
+        self.active = active
+        self.isins = isins if isins is not None else [isin_of(k) for k in keys]
+        self.norm_names = norm_names if norm_names is not None else [normalise_name(n) for n in names]
+
+        self.id_by_key = {k: i for i, k in enumerate(keys)}
+        self.id_by_isin = {s: i for i, s in enumerate(self.isins)}
+        self.id_by_symbol = {s: i for i, s in enumerate(symbols) if s}
+        self.ids_by_name: Dict[str, List[int]] = {}
+        for i, n in enumerate(self.norm_names):
+            self.ids_by_name.setdefault(n, []).append(i)
+
+    def __len__(self):
+        return len(self.keys)
+
+    # ----- lookups -----
+    def by_key(self, instrument_key: str) -> Optional[int]:
+        return self.id_by_key.get(instrument_key)
+
+    def by_isin(self, isin: str) -> Optional[int]:
+        return self.id_by_isin.get(isin.upper())
+
+    def by_symbol(self, symbol: str) -> Optional[int]:
+        return self.id_by_symbol.get(normalise_symbol(symbol))
+
+    def by_name(self, name: str, occurrence: int = 0) -> Optional[int]:
+        """Company names are not unique; `occurrence` picks the n-th listing."""
+        ids = self.ids_by_name.get(normalise_name(name))
+        if not ids or occurrence >= len(ids):
+            return None
+        return ids[occurrence]
+
+    # ----- views used by the existing scripts -----
+    def active_keys(self) -> List[str]:
+        return [k for k, a in zip(self.keys, self.active) if a]
+
+    def key_to_name(self) -> Dict[str, str]:
+        return dict(zip(self.keys, self.names))
+
+    def to_json(self) -> dict:
+        return {
+            "version": INDEX_VERSION,
+            "built": datetime.now().isoformat(timespec="seconds"),
+            "columns": {
+                "key": self.keys,
+                "isin": self.isins,
+                "name": self.names,
+                "norm_name": self.norm_names,
+                "symbol": self.symbols,
+                "active": self.active,
+            },
+        }
+
+    @classmethod
+    def from_json(cls, doc: dict) -> "InstrumentMaster":
+        if doc.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported instrument index version: {doc.get('version')}")
+        c = doc["columns"]
+        return cls(c["key"], c["name"], c["symbol"], c["active"], c["isin"], c["norm_name"])
+
+
+# ================= BUILD / LOAD =================
+def build_master(
+    stock_file: str = STOCK_FILE,
+    ticker_file: str = TICKER_FILE,
+    isin_file: str = ISIN_FILE,
+    previous: Optional[InstrumentMaster] = None,
+) -> InstrumentMaster:
+    """
+    IDs of instruments already present in `previous` are kept; new instrument
+    keys are appended and keys that disappeared are kept but marked inactive,
+    so an ID never changes meaning.
+    """
+    listing = parse_stock_file(stock_file)
+    isin_to_symbol = parse_isin_file(isin_file)
+    tickers = set(parse_ticker_file(ticker_file))
+
+    keys = list(previous.keys) if previous else []
+    names = list(previous.names) if previous else []
+    symbols = list(previous.symbols) if previous else []
+    active = [0] * len(keys)
+    id_by_key = {k: i for i, k in enumerate(keys)}
+
+    for inst, name in listing:
+        symbol = isin_to_symbol.get(isin_of(inst).upper())
+        i = id_by_key.get(inst)
+        if i is None:
+            i = len(keys)
+            id_by_key[inst] = i
+            keys.append(inst)
+            names.append(name)
+            symbols.append(symbol)
+            active.append(1)
+            continue
+        names[i] = name
+        symbols[i] = symbol or symbols[i]
+        active[i] = 1
+
+    master = InstrumentMaster(keys, names, symbols, active)
+    unlinked = sorted(t for t in tickers if t not in master.id_by_symbol)
+    if unlinked:
+        print(f"[WARN] {len(unlinked)} NSE tickers not linked to an instrument key (missing {os.path.basename(isin_file)}?)")
+    return master
+
+
+def save_master(master: InstrumentMaster, path: str = INDEX_FILE) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(master.to_json(), f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    _loaded.pop(path, None)
+
+
+def load_master(path: str = INDEX_FILE) -> InstrumentMaster:
+    """Load (once per process) the prebuilt index."""
+    master = _loaded.get(path)
+    if master is None:
+        with open(path, "r", encoding="utf-8") as f:
+            master = InstrumentMaster.from_json(json.load(f))
+        _loaded[path] = master
+    return master
+
+
+def main():
+    previous = load_master(INDEX_FILE) if os.path.exists(INDEX_FILE) else None
+    master = build_master(previous=previous)
+    save_master(master, INDEX_FILE)
+    linked = len(master.id_by_symbol)
+    print(f"✅ Saved {len(master)} instruments ({linked} with NSE symbols) to {INDEX_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
+import os
+
 import pandas as pd
 
+from InstrumentMaster import ISIN_FILE, INDEX_FILE, build_master, load_master, save_master  # type: ignore
+
 """
 Downloads the NSE equity list and saves all stock tickers to a text file.
 The script reads the official NSE equity CSV, appends '.NS' to each symbol,
 and writes them line-by-line into 'nse_tickers.txt'.
+It also writes 'SYMBOL,ISIN' pairs into resources/NseSymbolsWithIsin.txt
+(InstrumentMaster.ISIN_FILE) and rebuilds resources/InstrumentMaster.json,
+so NSE symbols are linked to Upstox instrument keys.
 """
 
 
@@ -12,6 +19,7 @@ url = "https://archives.nseindia.com/content/equities/EQUITY_L.csv"
 
 # Read CSV
 df = pd.read_csv(url)
+df.columns = df.columns.str.strip()
 
 # Extract symbols + add .NS
 tickers = df["SYMBOL"].astype(str).str.upper() + ".NS"
@@ -24,3 +32,19 @@ with open(output_file, "w") as f:
         f.write(t + "\n")
 
 print(f"Saved {len(tickers)} tickers to {output_file}")
+
+# Save symbol -> ISIN pairs for the instrument master
+isin_file = ISIN_FILE
+
+with open(isin_file, "w") as f:
+    f.write("SYMBOL,ISIN\n")
+    for symbol, isin in zip(df["SYMBOL"].astype(str).str.upper(), df["ISIN NUMBER"].astype(str).str.strip()):
+        f.write(f"{symbol},{isin}\n")
+
+print(f"Saved {len(df)} symbol/ISIN pairs to {isin_file}")
+
+# Rebuild the instrument master with the symbol links
+previous = load_master(INDEX_FILE) if os.path.exists(INDEX_FILE) else None
+master = build_master(previous=previous)
+save_master(master, INDEX_FILE)
+print(f"Saved {len(master)} instruments ({len(master.id_by_symbol)} with NSE symbols) to {INDEX_FILE}")
@@ -0,0 +1,143 @@
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+"""
+Array-backed bookkeeping for the backtest engine.
+
+- TradeBuffer: trade records in a typed NumPy structured array (grown by
+  doubling) instead of a list of lists; to_frame() gives the same trade log
+  DataFrame the engine always returned
+- EquityCurve: one preallocated slot per minute file holding cash + open
+  positions marked to the last seen price, the value held in positions and
+  the notional traded in that minute
+- risk_metrics(): Sharpe, Sortino, max drawdown, exposure and turnover from
+  those arrays in a handful of vectorised operations
+
+Because every minute is marked to market, drawdown includes losses on open
+positions, not just realised capital after each sell.
+"""
+
+# ================= CONFIG =================
+TRADE_LOG_COLUMNS = ["Time", "Stock", "Action", "Price", "Qty", "PnL", "Capital", "Used_Buckets"]
+ACTIONS = ("BUY", "SELL", "SL_HIT", "TARGET_HIT", "FORCED_SELL", "FINAL_SELL")
+PERIODS_PER_YEAR = 252 * 375        # trading minutes in a year
+
+TRADE_DTYPE = np.dtype([
+    ("time", "U8"),
+    ("stock", np.int32),            # index into TradeBuffer.stocks
+    ("action", np.int8),            # index into ACTIONS
+    ("price", np.float64),
+    ("qty", np.int64),
+    ("pnl", np.float64),
+    ("capital", np.float64),
+    ("used_buckets", np.int16),
+])
+
+
+# ================= TRADES =================
+class TradeBuffer:
+    def __init__(self, capacity: int = 64):
+        self.records = np.empty(capacity, dtype=TRADE_DTYPE)
+        self.size = 0
+        self.stocks: List[str] = []
+        self._stock_ids: Dict[str, int] = {}
+        self._action_ids = {a: i for i, a in enumerate(ACTIONS)}
+
+    def __len__(self):
+        return self.size
+
+    def append(self, time, stock, action, price, qty, pnl, capital, used_buckets):
+        if self.size == len(self.records):
+            grown = np.empty(2 * len(self.records), dtype=TRADE_DTYPE)
+            grown[:self.size] = self.records
+            self.records = grown
+        sid = self._stock_ids.get(stock)
+        if sid is None:
+            sid = self._stock_ids[stock] = len(self.stocks)
+            self.stocks.append(stock)
+        self.records[self.size] = (time, sid, self._action_ids[action], price, qty, pnl, capital, used_buckets)
+        self.size += 1
+
+    def to_frame(self) -> pd.DataFrame:
+        r = self.records[:self.size]
+        return pd.DataFrame({
+            "Time": r["time"].astype(object),
+            "Stock": np.asarray(self.stocks, dtype=object)[r["stock"]] if self.size else np.empty(0, dtype=object),
+            "Action": np.asarray(ACTIONS, dtype=object)[r["action"]],
+            "Price": r["price"],
+            "Qty": r["qty"].astype(np.int64),
+            "PnL": r["pnl"],
+            "Capital": r["capital"],
+            "Used_Buckets": r["used_buckets"].astype(np.int64),
+        }, columns=TRADE_LOG_COLUMNS)
+
+
+# ================= EQUITY =================
+class EquityCurve:
+    def __init__(self, minutes: int, start_capital: float):
+        self.start_capital = start_capital
+        self.equity = np.full(minutes, np.nan)
+        self.invested = np.zeros(minutes)
+        self.traded = np.zeros(minutes)
+        self._pending_notional = 0.0
+
+    def add_trade(self, notional: float):
+        """Notional of an execution, booked to the next marked minute."""
+        self._pending_notional += notional
+
+    def _grow(self, minutes: int):
+        extra = minutes - len(self.equity)
+        self.equity = np.concatenate([self.equity, np.full(extra, np.nan)])
+        self.invested = np.concatenate([self.invested, np.zeros(extra)])
+        self.traded = np.concatenate([self.traded, np.zeros(extra)])
+
+    def mark(self, i: int, cash: float, positions: Dict, last_price: Dict):
+        if i >= len(self.equity):
+            # Live sessions do not know their length up front
+            self._grow(max(2 * len(self.equity), i + 1))
+        invested = 0.0
+        for stock, pos in positions.items():
+            invested += pos["qty"] * last_price.get(stock, pos["entry"])
+        self.equity[i] = cash + invested
+        self.invested[i] = invested
+        self.traded[i] = self._pending_notional
+        self._pending_notional = 0.0
+
+
+# ================= METRICS =================
+def max_drawdown_pct(equity: np.ndarray, start_capital: float) -> float:
+    equity = equity[~np.isnan(equity)]
+    if len(equity) == 0:
+        return 0.0
+    peak = np.maximum(np.maximum.accumulate(equity), start_capital)
+    return float(((peak - equity) / peak).max() * 100)
+
+
+def risk_metrics(curve: EquityCurve, periods_per_year: int = PERIODS_PER_YEAR) -> Dict[str, float]:
+    """
+    Annualised Sharpe / Sortino of per-minute MTM returns (risk-free 0),
+    max drawdown %, exposure (mean % of equity held in positions, and % of
+    minutes with any position) and turnover (traded notional / start capital).
+    """
+    valid = ~np.isnan(curve.equity)
+    equity, invested = curve.equity[valid], curve.invested[valid]
+    start = curve.start_capital
+
+    returns = np.diff(np.concatenate([[start], equity])) / np.concatenate([[start], equity[:-1]])
+    scale = np.sqrt(periods_per_year)
+    std = returns.std() if len(returns) > 1 else 0.0
+    downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2)) if len(returns) else 0.0
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        held = np.where(equity > 0, invested / equity, 0.0)
+
+    return {
+        "sharpe": float(returns.mean() / std * scale) if std > 0 else 0.0,
+        "sortino": float(returns.mean() / downside * scale) if downside > 0 else 0.0,
+        "max_drawdown": max_drawdown_pct(equity, start),
+        "exposure": float(held.mean() * 100) if len(held) else 0.0,
+        "time_in_market": float((invested > 0).mean() * 100) if len(invested) else 0.0,
+        "turnover": float(curve.traded.sum() / start),
+    }
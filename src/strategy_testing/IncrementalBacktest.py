@@ -0,0 +1,194 @@
+import copy
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+from typing import Dict, List, Optional
+
+import StrategyFramework as engine_module  # type: ignore
+from StrategyFramework import IntradayEngine, DATA_DIR, PREV_DAY_FILE, minute_time_key  # type: ignore
+from ResultCache import (  # type: ignore
+    CACHE_VERSION, ENGINE_CONFIG, engine_fingerprint, file_digest, strategy_fingerprint, strategy_tag,
+)
+from MinuteStore import read_minute_prices  # type: ignore
+
+"""
+Intraday re-evaluation that only processes the minute files added since the
+last run.
+
+After each run the IntradayEngine is pickled to CHECKPOINT_DIR with every
+piece of session state: capital, open_positions, market_state, last_price,
+buckets, the trade log, the equity curve and the counters. The next run
+loads it and feeds only the files whose names sort after the last
+processed one; the newest file is held back until it is SETTLE_SECONDS
+old, as the live writers do not write atomically. The reported result is
+from a copy of the engine with the open positions closed at their last
+prices (what run_strategy would report if the day ended now). The
+checkpoint and the engine itself stay open.
+
+A checkpoint belongs to one (data_dir, prev-day file contents, strategy
+source / rule, params, engine source and config, as for ResultCache). It
+is discarded, and the day replayed from 09:15, when any of these change or
+when the processed files no longer look the same (count or last file's
+size / mtime), e.g. an earlier minute was rewritten.
+
+Usage:
+    from IncrementalBacktest import run_incremental
+    result = run_incremental(9, "Pure_Data", prev_day_file)
+
+    python IncrementalBacktest.py [data_dir] [prev_day_file] [--reset]
+    python StrategyFramework.py --incremental
+"""
+
+# ================= CONFIG =================
+CHECKPOINT_DIR = ".engine_checkpoints"
+SETTLE_SECONDS = 2.0            # the newest file is processed once it is this old (writers are not atomic)
+
+
+# ================= MINUTE FILES =================
+def minute_files(data_dir: str, settle_seconds: float = 0.0) -> List[str]:
+    """Minute files in time order; the newest is left out while younger than settle_seconds."""
+    files = sorted(f for f in os.listdir(data_dir) if f.endswith(".txt"))
+    if files and settle_seconds > 0:
+        if time.time() - os.path.getmtime(os.path.join(data_dir, files[-1])) < settle_seconds:
+            files = files[:-1]
+    return files
+
+
+def file_stamp(path: str) -> tuple:
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+# ================= CHECKPOINTS =================
+def checkpoint_key(strategy_id, data_dir: str, prev_day_file: str, params=None) -> str:
+    config = {name: getattr(engine_module, name) for name in ENGINE_CONFIG}
+    h = hashlib.sha1()
+    for part in (
+        str(CACHE_VERSION),
+        engine_fingerprint(),
+        os.path.abspath(data_dir),
+        file_digest(prev_day_file),
+        strategy_fingerprint(strategy_id),
+        json.dumps(params or {}, sort_keys=True),
+        json.dumps(config, sort_keys=True),
+    ):
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def checkpoint_path(strategy_id, key: str, checkpoint_dir: str = CHECKPOINT_DIR) -> str:
+    return os.path.join(checkpoint_dir, f"{strategy_tag(strategy_id)}-{key}.pkl")
+
+
+def load_checkpoint(path: str) -> Optional[Dict]:
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def save_checkpoint(path: str, checkpoint: Dict) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def still_valid(checkpoint: Dict, data_dir: str, files: List[str]) -> bool:
+    done = checkpoint["files_done"]
+    if done == 0:
+        return True
+    if len(files) < done or files[done - 1] != checkpoint["last_file"]:
+        return False
+    return file_stamp(os.path.join(data_dir, checkpoint["last_file"])) == checkpoint["last_stamp"]
+
+
+# ================= RUN =================
+def run_incremental(
+    strategy_id,
+    data_dir: str = DATA_DIR,
+    prev_day_file: str = PREV_DAY_FILE,
+    params=None,
+    checkpoint_dir: str = CHECKPOINT_DIR,
+    settle_seconds: float = SETTLE_SECONDS,
+) -> Dict:
+    """
+    Results so far today, processing only minute files newer than the
+    checkpoint. The newest file waits until it is settle_seconds old: the
+    live writers write in place, and a half-written minute would be
+    processed once and stay wrong in the checkpoint.
+    """
+    started = time.perf_counter()
+    path = checkpoint_path(strategy_id, checkpoint_key(strategy_id, data_dir, prev_day_file, params), checkpoint_dir)
+    files = minute_files(data_dir, settle_seconds)
+
+    checkpoint = load_checkpoint(path)
+    resumed = checkpoint is not None and still_valid(checkpoint, data_dir, files)
+    if not resumed:
+        checkpoint = {"engine": IntradayEngine(strategy_id, prev_day_file, params),
+                      "files_done": 0, "last_file": None, "last_stamp": None}
+
+    engine: IntradayEngine = checkpoint["engine"]
+    new_files = files[checkpoint["files_done"]:]
+    for file in new_files:
+        h, m, time_key = minute_time_key(file)
+        engine.on_minute(time_key, read_minute_prices(os.path.join(data_dir, file)), h, m)
+
+    if new_files or not resumed:
+        last = files[-1] if files else None
+        checkpoint.update(files_done=len(files), last_file=last,
+                          last_stamp=file_stamp(os.path.join(data_dir, last)) if last else None)
+        save_checkpoint(path, checkpoint)
+
+    # Report as if the session ended now; the checkpoint keeps positions open
+    open_positions = {stock: dict(pos) for stock, pos in engine.open_positions.items()}
+    closed = copy.deepcopy(engine)
+    closed.finish()
+    result = closed.results()
+    result.update(
+        resumed=resumed,
+        minutes_processed=len(new_files),
+        minutes_total=len(files),
+        open_positions=open_positions,
+        seconds=time.perf_counter() - started,
+    )
+    return result
+
+
+def reset(strategy_id, data_dir: str = DATA_DIR, prev_day_file: str = PREV_DAY_FILE, params=None,
+          checkpoint_dir: str = CHECKPOINT_DIR) -> bool:
+    path = checkpoint_path(strategy_id, checkpoint_key(strategy_id, data_dir, prev_day_file, params), checkpoint_dir)
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+# ================= MAIN =================
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    data_dir = args[0] if args else DATA_DIR
+    prev_day_file = args[1] if len(args) > 1 else PREV_DAY_FILE
+    if "--reset" in sys.argv:
+        print(f"✅ Checkpoint removed" if reset(9, data_dir, prev_day_file) else "No checkpoint to remove")
+        return
+
+    r = run_incremental(9, data_dir, prev_day_file)
+    how = "resumed" if r["resumed"] else "from 09:15"
+    print(f"✅ Processed {r['minutes_processed']} new minutes ({how}), {r['minutes_total']} so far, "
+          f"in {r['seconds'] * 1000:.0f} ms")
+    print(f"ROI so far (after tax) : {r['roi_after']:.2f}%  ({r['orders']} orders if closed now)")
+    print(f"Max Drawdown           : {r['max_drawdown']:.2f}%")
+    for stock, pos in r["open_positions"].items():
+        print(f"   open {stock} x{pos['qty']} @ {pos['entry']:.2f}  SL {pos['sl']:.2f}  target {pos['target']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+from collections import deque
+from math import sqrt
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+"""
+Streaming indicators for strategies (one instance per instrument, O(1) per tick)
+and batch counterparts over NumPy arrays (time on axis 0, instruments on
+axis 1 for 2-D input).
+
+Both sides are computed with the same floating-point operations in the same
+order, so a streaming indicator fed value by value returns exactly the batch
+result at every step:
+- windowed sums use cumulative sums re-anchored every `period` values
+  (block-local running sums): a window is the tail of the previous block
+  plus the head of the current one, so the totals never grow with the
+  length of the stream and nothing cancels catastrophically
+- the z-score variance is a rolling Welford update (add the new value,
+  remove the evicted one), recomputed from the window every `period` values
+- EMA is the same recursion
+Streaming indicators return None until their window is full; batch
+functions return NaN there. Inputs must be finite.
+
+Indicators:
+- SMA / sma             simple moving average over `period` values
+- EMA / ema             exponential moving average, seeded with the first value
+- ATR / atr             mean absolute close-to-close move over `period` steps
+                        (the definition used by strategy_testing_63/testing.py)
+- VWAP / vwap           cumulative volume-weighted average price
+- RollingHigh / rolling_high, RollingLow / rolling_low
+                        window extrema via monotonic deques
+- ZScore / zscore       (value - window mean) / window std (population)
+
+Usage inside a strategy (state is the per-stock dict from market_state):
+    atr = state_indicator(state, "atr", lambda: ATR(14)).update(price)
+"""
+
+
+# ================= STREAMING =================
+class _WindowSum:
+    """
+    Windowed sum from running sums restarted every `period` values: the
+    window ending at value i is (previous block total - running sum just
+    before the window) + current running sum.
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.count = 0
+        self.running = 0.0
+        self.block_total = 0.0
+        self.history = deque(maxlen=period + 1)
+
+    def push(self, x: float) -> Optional[float]:
+        i = self.count
+        if i % self.period == 0:
+            self.block_total = self.running
+            self.running = x
+        else:
+            self.running += x
+        self.history.append(self.running)
+        self.count += 1
+        if self.count < self.period:
+            return None
+        if self.count % self.period == 0:
+            return self.running
+        return (self.block_total - self.history[0]) + self.running
+
+
+class SMA:
+    def __init__(self, period: int):
+        self.window = _WindowSum(period)
+        self.period = period
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> Optional[float]:
+        s = self.window.push(x)
+        self.value = None if s is None else s / self.period
+        return self.value
+
+
+class EMA:
+    def __init__(self, period: int):
+        self.alpha = 2.0 / (period + 1)
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> float:
+        if self.value is None:
+            self.value = x
+        else:
+            self.value = self.value + self.alpha * (x - self.value)
+        return self.value
+
+
+class ATR:
+    def __init__(self, period: int = 14):
+        self.window = _WindowSum(period)
+        self.period = period
+        self.prev: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        if self.prev is not None:
+            s = self.window.push(abs(price - self.prev))
+            self.value = None if s is None else s / self.period
+        self.prev = price
+        return self.value
+
+
+class VWAP:
+    def __init__(self):
+        self.pv = 0.0
+        self.volume = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, price: float, volume: float) -> Optional[float]:
+        self.pv += price * volume
+        self.volume += volume
+        self.value = self.pv / self.volume if self.volume > 0 else None
+        return self.value
+
+
+class _RollingExtreme:
+    """Monotonic deque of (index, value); the front is the window extreme."""
+
+    def __init__(self, period: int, better: Callable[[float, float], bool]):
+        self.period = period
+        self.better = better
+        self.items = deque()
+        self.count = 0
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> Optional[float]:
+        items = self.items
+        while items and not self.better(items[-1][1], x):
+            items.pop()
+        items.append((self.count, x))
+        if items[0][0] <= self.count - self.period:
+            items.popleft()
+        self.count += 1
+        self.value = items[0][1] if self.count >= self.period else None
+        return self.value
+
+
+class RollingHigh(_RollingExtreme):
+    def __init__(self, period: int):
+        super().__init__(period, lambda kept, new: kept > new)
+
+
+class RollingLow(_RollingExtreme):
+    def __init__(self, period: int):
+        super().__init__(period, lambda kept, new: kept < new)
+
+
+class ZScore:
+    """Rolling Welford mean / M2, recomputed from the window every `period` values."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> Optional[float]:
+        i = self.count
+        if i < self.period:
+            d = x - self.mean
+            self.mean += d / (i + 1)
+            self.m2 += d * (x - self.mean)
+            self.window.append(x)
+        elif i % self.period == 0:
+            self.window.append(x)
+            self.mean, self.m2 = 0.0, 0.0
+            for k, v in enumerate(self.window):
+                d = v - self.mean
+                self.mean += d / (k + 1)
+                self.m2 += d * (v - self.mean)
+        else:
+            old = self.window[0]
+            self.window.append(x)
+            d = x - old
+            old_mean = self.mean
+            self.mean += d / self.period
+            self.m2 += d * (x - self.mean + old - old_mean)
+        self.count += 1
+        if self.count < self.period:
+            self.value = None
+            return None
+        var = max(self.m2 / self.period, 0.0)
+        self.value = (x - self.mean) / sqrt(var) if var > 0 else None
+        return self.value
+
+
+def state_indicator(state: Dict, key: str, factory: Callable[[], object]):
+    """Fetch (or create) an indicator kept in a strategy's per-stock state."""
+    ind = state.get(key)
+    if ind is None:
+        ind = state[key] = factory()
+    return ind
+
+
+class IndicatorBank:
+    """One streaming indicator per instrument, created on first update."""
+
+    def __init__(self, factory: Callable[[], object]):
+        self.factory = factory
+        self.indicators: Dict[str, object] = {}
+
+    def update(self, instrument: str, *args):
+        ind = self.indicators.get(instrument)
+        if ind is None:
+            ind = self.indicators[instrument] = self.factory()
+        return ind.update(*args)
+
+    def value(self, instrument: str):
+        ind = self.indicators.get(instrument)
+        return None if ind is None else ind.value
+
+
+# ================= BATCH =================
+def _as_float(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+def _window_sum(values: np.ndarray, period: int) -> np.ndarray:
+    """Same block-anchored running sums as _WindowSum, NaN until full."""
+    n = len(values)
+    out = np.full(values.shape, np.nan)
+    if n < period:
+        return out
+    blocks = -(-n // period)
+    padded = np.zeros((blocks * period,) + values.shape[1:])
+    padded[:n] = values
+    running = np.cumsum(padded.reshape((blocks, period) + values.shape[1:]), axis=1)
+    block_total = running[:, -1]
+    running = running.reshape(padded.shape)
+
+    idx = np.arange(period - 1, n)
+    ends = idx[(idx + 1) % period == 0]
+    mids = idx[(idx + 1) % period != 0]
+    out[ends] = running[ends]
+    out[mids] = (block_total[mids // period - 1] - running[mids - period]) + running[mids]
+    return out
+
+
+def sma(values, period: int) -> np.ndarray:
+    return _window_sum(_as_float(values), period) / period
+
+
+def ema(values, period: int) -> np.ndarray:
+    values = _as_float(values)
+    alpha = 2.0 / (period + 1)
+    out = np.empty(values.shape)
+    if len(values) == 0:
+        return out
+    out[0] = values[0]
+    for i in range(1, len(values)):
+        out[i] = out[i - 1] + alpha * (values[i] - out[i - 1])
+    return out
+
+
+def atr(prices, period: int = 14) -> np.ndarray:
+    prices = _as_float(prices)
+    out = np.full(prices.shape, np.nan)
+    if len(prices) > period:
+        out[1:] = _window_sum(np.abs(prices[1:] - prices[:-1]), period) / period
+    return out
+
+
+def vwap(prices, volumes) -> np.ndarray:
+    prices, volumes = _as_float(prices), _as_float(volumes)
+    cum_pv = np.cumsum(prices * volumes, axis=0)
+    cum_v = np.cumsum(volumes, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(cum_v > 0, cum_pv / cum_v, np.nan)
+
+
+def _rolling(values: np.ndarray, period: int, reduce) -> np.ndarray:
+    out = np.full(values.shape, np.nan)
+    if len(values) >= period:
+        windows = np.lib.stride_tricks.sliding_window_view(values, period, axis=0)
+        out[period - 1:] = reduce(windows, axis=-1)
+    return out
+
+
+def rolling_high(values, period: int) -> np.ndarray:
+    return _rolling(_as_float(values), period, np.max)
+
+
+def rolling_low(values, period: int) -> np.ndarray:
+    return _rolling(_as_float(values), period, np.min)
+
+
+def zscore(values, period: int) -> np.ndarray:
+    """ZScore's Welford recursion over time, vectorised across columns."""
+    values = _as_float(values)
+    out = np.full(values.shape, np.nan)
+    mean = np.zeros(values.shape[1:])
+    m2 = np.zeros(values.shape[1:])
+    for i in range(len(values)):
+        x = values[i]
+        if i < period:
+            d = x - mean
+            mean = mean + d / (i + 1)
+            m2 = m2 + d * (x - mean)
+        elif i % period == 0:
+            mean, m2 = np.zeros(values.shape[1:]), np.zeros(values.shape[1:])
+            for k, v in enumerate(values[i - period + 1:i + 1]):
+                d = v - mean
+                mean = mean + d / (k + 1)
+                m2 = m2 + d * (v - mean)
+        else:
+            old = values[i - period]
+            d = x - old
+            old_mean = mean
+            mean = mean + d / period
+            m2 = m2 + d * (x - mean + old - old_mean)
+        if i >= period - 1:
+            var = np.maximum(m2 / period, 0.0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out[i] = np.where(var > 0, (x - mean) / np.sqrt(var), np.nan)
+    return out
@@ -0,0 +1,133 @@
+import sys
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+import Kernels  # type: ignore
+from Kernels import BACKENDS, HAVE_NUMBA  # type: ignore
+
+"""
+Equivalence checks and timings for the Kernels backends on a synthetic
+universe (geometric random walks, minutes x instruments).
+
+Every kernel is run on every available backend. The results must be
+bit-identical to the "numpy" backend, otherwise the script exits
+non-zero. The interpreted "python" backend runs on the first
+PYTHON_COLUMNS instruments only, so it stays quick and is still checked
+where numba is missing. The timing table gives each backend's speedup
+over NumPy.
+
+Usage:
+    python KernelBenchmark.py [instruments] [minutes]
+"""
+
+# ================= CONFIG =================
+INSTRUMENTS = 5000
+MINUTES = 375
+PYTHON_COLUMNS = 50
+ATR_PERIOD = 14
+ROLLING_PERIOD = 30
+SEED = 7
+
+
+# ================= DATA =================
+def synthetic_universe(instruments: int, minutes: int, seed: int = SEED) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 0.002, size=(minutes, instruments))
+    return np.round(100 * np.exp(np.cumsum(steps, axis=0)), 2)
+
+
+def orb_inputs(close: np.ndarray):
+    """Session-major inputs for orb_sessions with a simple breakout rule."""
+    atr = Kernels.atr(close, ATR_PERIOD, backend="numpy")
+    opening_high = close[:15].max(axis=0)
+    tradable = ~np.isnan(atr)
+    tradable[:16] = False
+    candidates = tradable & (close > opening_high) & (atr > 0)
+    P, A = np.ascontiguousarray(close.T), np.ascontiguousarray(atr.T)
+    T, C = np.ascontiguousarray(tradable.T), np.ascontiguousarray(candidates.T)
+    return P, A, T, C, np.flatnonzero(C.any(axis=1))
+
+
+# ================= CHECKS =================
+def same(a, b) -> bool:
+    if isinstance(a, tuple):
+        return all(same(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(same(a[k], b[k]) for k in a)
+    a, b = np.asarray(a), np.asarray(b)
+    return a.shape == b.shape and np.array_equal(a, b, equal_nan=a.dtype.kind == "f")
+
+
+def timed(fn: Callable, repeat: int = 3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def bench(close: np.ndarray) -> List[Dict]:
+    small = np.ascontiguousarray(close[:, :PYTHON_COLUMNS])
+    P, A, T, C, cols = orb_inputs(close)
+    Ps, As, Ts, Cs, cols_small = orb_inputs(small)
+    exit_args = (close[:, 0].copy(), np.ones(len(close), dtype=bool), 1, close[0, 0] * 0.5, close[0, 0] * 10)
+
+    def cases(data_close, p, a, t, c, sessions):
+        return {
+            "atr": lambda b: Kernels.atr(data_close, ATR_PERIOD, backend=b),
+            "rolling_high": lambda b: Kernels.rolling_high(data_close, ROLLING_PERIOD, backend=b),
+            "rolling_low": lambda b: Kernels.rolling_low(data_close, ROLLING_PERIOD, backend=b),
+            "first_exit": lambda b: Kernels.first_exit(*exit_args, backend=b),
+            "orb_sessions": lambda b: Kernels.orb_sessions(p, a, t, c, sessions, 100000, 0.003, 40, 2000, 1.5,
+                                                           backend=b),
+        }
+
+    full = cases(close, P, A, T, C, cols)
+    reduced = cases(small, Ps, As, Ts, Cs, cols_small)
+    backends = [b for b in BACKENDS if b != "numba" or HAVE_NUMBA]
+
+    rows = []
+    for name in full:
+        row = {"kernel": name}
+        for backend in backends:
+            suite = reduced if backend == "python" else full
+            if backend == "numba":
+                suite[name](backend)                    # compile outside the timing
+            seconds, result = timed(lambda: suite[name](backend), repeat=1 if backend == "python" else 3)
+            _, expected = timed(lambda: suite[name]("numpy"), repeat=1)
+            row[backend] = seconds
+            row[f"{backend}_ok"] = same(result, expected)
+        rows.append(row)
+    return rows
+
+
+# ================= MAIN =================
+def main():
+    instruments = int(sys.argv[1]) if len(sys.argv) > 1 else INSTRUMENTS
+    minutes = int(sys.argv[2]) if len(sys.argv) > 2 else MINUTES
+    close = synthetic_universe(instruments, minutes)
+    print(f"Synthetic universe: {minutes} minutes x {instruments} instruments "
+          f"(python backend on {min(PYTHON_COLUMNS, instruments)}), numba {'installed' if HAVE_NUMBA else 'not installed'}")
+
+    rows = bench(close)
+    backends = [b for b in BACKENDS if b in rows[0]]
+    print(f"\n{'Kernel':<14}" + "".join(f"{b:>22}" for b in backends))
+    ok = True
+    for row in rows:
+        cells = []
+        for b in backends:
+            speedup = f" ({row['numpy'] / row[b]:.1f}x)" if b == "numba" and row[b] > 0 else ""
+            cells.append(f"{row[b] * 1000:>9.2f} ms{speedup} {'✅' if row[f'{b}_ok'] else '❌'}")
+            ok &= row[f"{b}_ok"]
+        print(f"{row['kernel']:<14}" + "".join(f"{c:>22}" for c in cells))
+
+    if not ok:
+        raise SystemExit("❌ Backends disagree")
+    print("\n✅ All backends bit-identical")
+
+
+if __name__ == "__main__":
+    main()
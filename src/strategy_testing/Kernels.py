@@ -0,0 +1,291 @@
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from Indicators import atr as np_atr, rolling_high as np_rolling_high, rolling_low as np_rolling_low  # type: ignore
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit: the loop kernels stay plain Python functions."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+
+"""
+Backtest kernels with interchangeable backends.
+
+- "numba":  the loop kernels below, compiled with numba.njit (used by
+            default when numba is installed)
+- "numpy":  vectorised NumPy (Indicators' batch functions and per-position
+            tail scans); the default without numba
+- "python": the same loop kernels, interpreted; slow, only for checking
+            the kernels where numba is not installed
+
+Every backend returns bit-identical results: the loops repeat the NumPy
+operations in the same order (windowed sums use Indicators' block-anchored
+running sums, window extrema are exact element picks, trade arithmetic
+follows testing.py).
+
+Kernels:
+- atr(prices, period)                 Indicators.atr, 1-D or (minutes x columns)
+- rolling_high / rolling_low          window extrema, O(n) monotonic deque
+- first_exit(prices, tradable, start, sl, target)
+                                      first row >= start that hits SL / target
+- orb_sessions(P, A, T, C, cols, ...) OrbUniverseBacktest's position loop
+                                      for many sessions in one call
+
+Select with backend= per call, KERNEL_BACKEND below, or the
+CODEBILLION_KERNELS environment variable. tests/test_kernels.py checks
+every backend against "numpy" (numba cases skip without numba);
+KernelBenchmark.py times them.
+"""
+
+# ================= CONFIG =================
+BACKENDS = ("numba", "numpy", "python")
+KERNEL_BACKEND = os.environ.get("CODEBILLION_KERNELS") or ("numba" if HAVE_NUMBA else "numpy")
+
+ORB_FIELDS = ("col", "entry_row", "exit_row", "qty", "entry_price", "exit_price", "pnl",
+              "capital_before", "capital_after")
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    backend = backend or KERNEL_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown kernel backend {backend!r}")
+    if backend == "numba" and not HAVE_NUMBA:
+        raise RuntimeError("numba is not installed; use backend='numpy'")
+    return backend
+
+
+def _loop(kernel, backend: str):
+    """Compiled kernel for "numba", its Python function for "python"."""
+    return kernel if backend == "numba" else getattr(kernel, "py_func", kernel)
+
+
+def _as_2d(values) -> Tuple[np.ndarray, bool]:
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    return (values[:, None], True) if values.ndim == 1 else (values, False)
+
+
+# ================= LOOP KERNELS =================
+@njit(cache=True)
+def _atr_loop(prices, period):
+    n, m = prices.shape
+    out = np.full((n, m), np.nan)
+    if n <= period:
+        return out
+    run = np.zeros(n - 1)
+    for j in range(m):
+        # run[k] = running sum of the absolute moves since the start of k's
+        # block of `period` moves, as Indicators._window_sum
+        for k in range(n - 1):
+            move = abs(prices[k + 1, j] - prices[k, j])
+            run[k] = move if k % period == 0 else run[k - 1] + move
+        for k in range(period - 1, n - 1):
+            if (k + 1) % period == 0:
+                out[k + 1, j] = run[k] / period
+            else:
+                block_total = run[(k // period) * period - 1]
+                out[k + 1, j] = ((block_total - run[k - period]) + run[k]) / period
+    return out
+
+
+@njit(cache=True)
+def _rolling_extreme_loop(values, period, want_max):
+    n, m = values.shape
+    out = np.full((n, m), np.nan)
+    if n < period:
+        return out
+    window = np.empty(n, dtype=np.int64)
+    for j in range(m):
+        head, tail = 0, 0
+        for i in range(n):
+            x = values[i, j]
+            while tail > head and ((values[window[tail - 1], j] <= x) if want_max else (values[window[tail - 1], j] >= x)):
+                tail -= 1
+            window[tail] = i
+            tail += 1
+            if window[head] <= i - period:
+                head += 1
+            if i >= period - 1:
+                out[i, j] = values[window[head], j]
+    return out
+
+
+@njit(cache=True)
+def _first_exit_loop(prices, tradable, start, sl, target):
+    for i in range(start, len(prices)):
+        if tradable[i] and (prices[i] <= sl or prices[i] >= target):
+            return i
+    return -1
+
+
+@njit(cache=True)
+def _orb_loop(P, A, T, C, cols, start_capital, risk_per_trade, brokerage, daily_loss_limit, target_mult,
+              out_int, out_float, final_capital):
+    n_trades = 0
+    n_min = P.shape[1]
+    for ci in range(len(cols)):
+        col = cols[ci]
+        capital = start_capital
+        t = -1
+        for row in range(n_min):
+            if not C[col, row] or row <= t:
+                continue
+            price = P[col, row]
+            row_atr = A[col, row]
+            sl = price - row_atr
+            risk_per_unit = price - sl
+            if risk_per_unit <= 0:
+                continue
+            qty = int(capital * risk_per_trade / risk_per_unit)
+            if qty <= 0:
+                continue
+            target = price + target_mult * row_atr
+
+            exit_row = -1
+            for k in range(row + 1, n_min):
+                if T[col, k] and (P[col, k] <= sl or P[col, k] >= target):
+                    exit_row = k
+                    break
+            exit_price = P[col, exit_row] if exit_row >= 0 else P[col, n_min - 1]
+            pnl = (exit_price - price) * qty
+            capital_before = capital
+            capital += pnl - brokerage
+
+            out_int[n_trades, 0] = col
+            out_int[n_trades, 1] = row
+            out_int[n_trades, 2] = exit_row
+            out_int[n_trades, 3] = qty
+            out_float[n_trades, 0] = price
+            out_float[n_trades, 1] = exit_price
+            out_float[n_trades, 2] = pnl
+            out_float[n_trades, 3] = capital_before
+            out_float[n_trades, 4] = capital
+            n_trades += 1
+
+            if exit_row < 0:
+                break
+            t = exit_row
+            if start_capital - capital >= daily_loss_limit:
+                break
+        final_capital[ci] = capital
+    return n_trades
+
+
+# ================= NUMPY BACKEND =================
+def _np_first_exit(prices, tradable, start, sl, target) -> int:
+    tail = prices[start:]
+    hit = tradable[start:] & ((tail <= sl) | (tail >= target))
+    first = int(hit.argmax()) if len(hit) else 0
+    return start + first if len(hit) and hit[first] else -1
+
+
+def _np_orb(P, A, T, C, cols, start_capital, risk_per_trade, brokerage, daily_loss_limit, target_mult,
+            out_int, out_float, final_capital):
+    n_trades = 0
+    for ci, col in enumerate(cols):
+        prices, atr, tradable = P[col], A[col], T[col]
+        capital = start_capital
+        t = -1
+        for row in np.flatnonzero(C[col]):
+            if row <= t:
+                continue
+            price, row_atr = float(prices[row]), float(atr[row])
+            sl = price - row_atr
+            risk_per_unit = price - sl
+            if risk_per_unit <= 0:
+                continue
+            qty = int(capital * risk_per_trade / risk_per_unit)
+            if qty <= 0:
+                continue
+            target = price + target_mult * row_atr
+
+            exit_row = _np_first_exit(prices, tradable, row + 1, sl, target)
+            exit_price = float(prices[exit_row])           # -1: the last price (EOD)
+            pnl = (exit_price - price) * qty
+            capital_before = capital
+            capital += pnl - brokerage
+
+            out_int[n_trades] = (col, row, exit_row, qty)
+            out_float[n_trades] = (price, exit_price, pnl, capital_before, capital)
+            n_trades += 1
+
+            if exit_row < 0:
+                break
+            t = exit_row
+            if start_capital - capital >= daily_loss_limit:
+                break
+        final_capital[ci] = capital
+    return n_trades
+
+
+# ================= PUBLIC KERNELS =================
+def atr(prices, period: int = 14, backend: Optional[str] = None) -> np.ndarray:
+    backend = resolve_backend(backend)
+    if backend == "numpy":
+        return np_atr(prices, period)
+    values, flat = _as_2d(prices)
+    out = _loop(_atr_loop, backend)(values, period)
+    return out[:, 0] if flat else out
+
+
+def _rolling_extreme(values, period: int, want_max: bool, backend: Optional[str]) -> np.ndarray:
+    backend = resolve_backend(backend)
+    if backend == "numpy":
+        return (np_rolling_high if want_max else np_rolling_low)(values, period)
+    values, flat = _as_2d(values)
+    out = _loop(_rolling_extreme_loop, backend)(values, period, want_max)
+    return out[:, 0] if flat else out
+
+
+def rolling_high(values, period: int, backend: Optional[str] = None) -> np.ndarray:
+    return _rolling_extreme(values, period, True, backend)
+
+
+def rolling_low(values, period: int, backend: Optional[str] = None) -> np.ndarray:
+    return _rolling_extreme(values, period, False, backend)
+
+
+def first_exit(prices, tradable, start: int, sl: float, target: float, backend: Optional[str] = None) -> int:
+    """First row >= start where tradable and price <= sl or >= target; -1 if none."""
+    backend = resolve_backend(backend)
+    if backend == "numpy":
+        return _np_first_exit(prices, tradable, start, sl, target)
+    return int(_loop(_first_exit_loop, backend)(prices, tradable, start, sl, target))
+
+
+def orb_sessions(P, A, T, C, cols, start_capital: float, risk_per_trade: float, brokerage: float,
+                 daily_loss_limit: float, target_mult: float, backend: Optional[str] = None):
+    """
+    ORB position loop over sessions `cols` of row-major (session x minute)
+    prices P, ATR A, tradable mask T and candidate mask C. Returns
+    ({field: array} of trades in session order, final capital per session).
+    exit_row is -1 for an end-of-day exit at the last price.
+    """
+    backend = resolve_backend(backend)
+    cols = np.asarray(cols, dtype=np.int64)
+    max_trades = int(C[cols].sum()) if len(cols) else 0
+    out_int = np.empty((max_trades, 4), dtype=np.int64)
+    out_float = np.empty((max_trades, 5), dtype=np.float64)
+    final_capital = np.empty(len(cols), dtype=np.float64)
+
+    args = (P, A, T, C, cols, float(start_capital), float(risk_per_trade), float(brokerage),
+            float(daily_loss_limit), float(target_mult), out_int, out_float, final_capital)
+    if backend == "numpy":
+        n = _np_orb(*args)
+    else:
+        n = _loop(_orb_loop, backend)(*args)
+
+    trades: Dict[str, np.ndarray] = {}
+    for i, field in enumerate(ORB_FIELDS[:4]):
+        trades[field] = out_int[:n, i]
+    for i, field in enumerate(ORB_FIELDS[4:]):
+        trades[field] = out_float[:n, i]
+    return trades, final_capital
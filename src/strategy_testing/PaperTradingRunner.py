@@ -0,0 +1,174 @@
+import os
+import sys
+import time
+from queue import Queue
+from threading import Thread
+from typing import Dict, List
+
+import numpy as np
+
+from StrategyFramework import IntradayEngine, PREV_DAY_FILE, minute_time_key  # type: ignore
+from EquityCurve import ACTIONS  # type: ignore
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIVE_DIR = os.path.join(SRC_DIR, "core", "live_market_data_retrival")
+sys.path.append(os.path.join(SRC_DIR, "helpers", "storage"))
+from MarketDataQuery import MarketDataQuery  # type: ignore
+
+"""
+Paper trading on sealed minutes, in process.
+
+The runner takes minute events from a queue,
+    {"minute": "HH-MM-00", "candles": {name: {"close": ...}}, "sealed_at": t}
+(or "rows": [(name, price)] instead of candles), turns each into the engine's (stock, price) cross-section and hands it to an
+IntradayEngine, so capital, buckets, slippage, SL / target and the forced
+exit follow exactly the backtest rules. The engine screens the strategy's
+universe before the session (STRATEGY_SCREENS), and stocks outside it are
+dropped from every minute. A None event ends the session.
+
+Sources:
+- live:   LiveOHCLVData.subscribe() - minutes are published as the
+          aggregator seals them, before they are written to disk
+- replay: ReplayFeed plays a day of stored minutes (a directory of
+          snapshot "NAME : price" or OHLCV "NAME : o,h,l,c,v" files, or a
+          .cbm store, read through MarketDataQuery) at any speed; a replay
+          of a backtest day trades exactly like run_strategy on it
+
+For every minute the runner logs the decision latency (seal -> strategy
+done) and, for live minutes, the time since the minute actually closed.
+
+Usage:
+    python PaperTradingRunner.py replay <data_dir> [prev_day_file] [speed]
+    python PaperTradingRunner.py live [prev_day_file]
+"""
+
+# ================= CONFIG =================
+STRATEGY_ID = 9
+REPLAY_SPEED = 0                    # 0 = as fast as possible, 1 = real time, 60 = a minute per second
+LOG_EVERY_MINUTE = False            # otherwise only minutes with trades are logged
+
+
+# ================= FEEDS =================
+class ReplayFeed:
+    """Publishes a day of stored minutes to a queue, like the live aggregator."""
+
+    def __init__(self, data_dir: str, speed: float = REPLAY_SPEED):
+        self.data_dir = data_dir
+        self.speed = speed
+        self.queue: Queue = Queue()
+
+    def run(self):
+        previous = None
+        for key, names, prices in MarketDataQuery(self.data_dir).minutes():
+            h, m, time_key = minute_time_key(key)
+            if self.speed and previous is not None:
+                time.sleep(max(0.0, (h * 60 + m - previous) * 60 / self.speed))
+            previous = h * 60 + m
+
+            rows = list(zip(names.tolist(), prices.tolist()))
+            self.queue.put({"minute": time_key, "rows": rows, "sealed_at": time.time()})
+        self.queue.put(None)
+
+    def start(self) -> Queue:
+        Thread(target=self.run, daemon=True).start()
+        return self.queue
+
+
+def live_feed() -> Queue:
+    sys.path.append(LIVE_DIR)
+    import LiveOHCLVData  # type: ignore
+
+    q = LiveOHCLVData.subscribe()
+    LiveOHCLVData.start()
+    return q
+
+
+# ================= RUNNER =================
+def event_rows(event: Dict) -> List:
+    """(stock, price) cross-section of a minute event, in feed order."""
+    if "rows" in event:
+        return event["rows"]
+    rows = []
+    for name, c in event["candles"].items():
+        price = c["close"] if isinstance(c, dict) else c
+        if price is not None:
+            rows.append((name.strip(), float(price)))
+    return rows
+
+
+class PaperTradingRunner:
+    def __init__(self, strategy_id=STRATEGY_ID, prev_day_file: str = PREV_DAY_FILE, params=None,
+                 log_every_minute: bool = LOG_EVERY_MINUTE):
+        self.engine = IntradayEngine(strategy_id, prev_day_file, params)
+        self.log_every_minute = log_every_minute
+        self.latencies: List[float] = []
+        self.close_latencies: List[float] = []
+
+    def on_event(self, event: Dict):
+        engine = self.engine
+        trades_before = len(engine.trade_log)
+
+        rows = event_rows(event)
+        engine.on_minute(event["minute"], rows)
+
+        decided_at = time.time()
+        latency = decided_at - event["sealed_at"]
+        self.latencies.append(latency)
+        since_close = ""
+        if "minute_close" in event:
+            self.close_latencies.append(decided_at - event["minute_close"])
+            since_close = f", {self.close_latencies[-1] * 1000:.0f} ms after close"
+
+        new_trades = len(engine.trade_log) - trades_before
+        if new_trades or self.log_every_minute:
+            print(f"[{event['minute']}] {len(rows)} stocks, decision in "
+                  f"{latency * 1000:.2f} ms{since_close}")
+            log = engine.trade_log
+            for r in log.records[trades_before:len(log)]:
+                print(f"   {ACTIONS[r['action']]:<12} {log.stocks[r['stock']]} x{r['qty']} @ {r['price']:.2f}"
+                      f"  pnl {r['pnl']:.2f}  capital {r['capital']:.2f}")
+
+    def run(self, feed: Queue) -> Dict:
+        while True:
+            event = feed.get()
+            if event is None:
+                break
+            self.on_event(event)
+        self.engine.finish()
+        return self.engine.results()
+
+    def latency_summary(self) -> str:
+        if not self.latencies:
+            return "no minutes processed"
+        ms = np.asarray(self.latencies) * 1000
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        return f"decision latency p50 {p50:.2f} ms, p95 {p95:.2f} ms, p99 {p99:.2f} ms, max {ms.max():.2f} ms"
+
+
+# ================= MAIN =================
+def main():
+    mode = sys.argv[1] if len(sys.argv) > 1 else "replay"
+    if mode == "live":
+        prev_day_file = sys.argv[2] if len(sys.argv) > 2 else PREV_DAY_FILE
+        feed = live_feed()
+    else:
+        data_dir = sys.argv[2] if len(sys.argv) > 2 else "Pure_Data"
+        prev_day_file = sys.argv[3] if len(sys.argv) > 3 else PREV_DAY_FILE
+        speed = float(sys.argv[4]) if len(sys.argv) > 4 else REPLAY_SPEED
+        feed = ReplayFeed(data_dir, speed).start()
+
+    runner = PaperTradingRunner(STRATEGY_ID, prev_day_file)
+    result = runner.run(feed)
+
+    print("\n" + "=" * 80)
+    print(f"PAPER TRADING - STRATEGY {result['strategy_id']}".center(80))
+    print("=" * 80)
+    print(f"ROI (after tax) : {result['roi_after']:.2f}%")
+    print(f"Final Capital   : {result['final_capital']:.2f}")
+    print(f"Orders          : {result['orders']}")
+    print(f"Max Drawdown    : {result['max_drawdown']:.2f}%")
+    print(f"Latency         : {runner.latency_summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from StrategyFramework import (  # type: ignore
+    IntradayEngine, DATA_DIR, PREV_DAY_FILE, minute_time_key, get_prev_day_data, run_strategy,
+)
+from StrategyTestBed import strategy_logic, STRATEGY_SCHEDULES  # type: ignore
+from SignalExpressions import SignalRule  # type: ignore
+from MarketDataQuery import MarketDataQuery, resolve_store  # type: ignore
+
+"""
+Two-phase backtest: parallel signal generation, sequential allocation.
+
+Phase 1 splits the (screened) instruments into shards and runs one per
+worker process. Every shard replays the whole day through the strategy
+with no position and can_trade=True. It records each candidate entry as
+(minute, column, sl, target).
+
+Phase 2 is one IntradayEngine pass in time order. Each minute it is fed
+only the rows of that minute's candidates and of the stocks it holds.
+Candidates replace the strategy call, so capital, buckets, slippage,
+SL / target and the forced exit run through exactly the same code as
+run_strategy, in the same file order. The trade log is identical.
+
+This is valid when a strategy's entries do not depend on its holdings or
+capital: SignalRules, and Python strategies whose Schedule opts in with
+independent_entries=True (see StrategySchedule for the contract) and
+does not ask for on_position calls. Other strategies fall back to
+run_strategy.
+Columns that share a name stay in one shard, because the strategy state
+is kept per name.
+
+Phase 1 is the part that scales with cores. Phase 2 only touches a few
+rows a minute.
+
+Usage:
+    from ParallelEngine import run_parallel
+    result = run_parallel(9, data_dir, prev_day_file, workers=8)
+
+    python ParallelEngine.py [data_dir] [prev_day_file] [workers]
+"""
+
+# ================= CONFIG =================
+WORKERS = os.cpu_count()
+
+
+def supports(strategy_id) -> bool:
+    """Two-phase runs need entries that do not depend on holdings or capital."""
+    if isinstance(strategy_id, SignalRule):
+        return True
+    schedule = STRATEGY_SCHEDULES.get(strategy_id)
+    return schedule is not None and schedule.independent_entries and not schedule.on_position
+
+
+# ================= PHASE 1: SIGNALS =================
+def shard_columns(names: List[str], columns, n_shards: int) -> List[np.ndarray]:
+    """Contiguous shards of `columns`; columns sharing a name go to one shard."""
+    columns = list(columns)
+    first: Dict[str, int] = {}
+    shards = [[] for _ in range(max(1, n_shards))]
+    for pos, col in enumerate(columns):
+        shard = first.setdefault(names[col], pos * len(shards) // max(1, len(columns)))
+        shards[shard].append(col)
+    return [np.array(sorted(s), dtype=np.int64) for s in shards if s]
+
+
+def shadow_active(shadow: IntradayEngine, time_key: str) -> bool:
+    """Whether the strategy reads this minute at all (captures, entries or scheduled calls)."""
+    if shadow.rule is not None:
+        return time_key in shadow.capture_times or time_key in shadow.rule.entry_times
+    return shadow.schedule.active_at(time_key)
+
+
+def shadow_signals(shadow: IntradayEngine, h: int, m: int, time_key: str, rows) -> List[tuple]:
+    """(row index, sl, target) of every entry the strategy signals this minute."""
+    if shadow.rule is not None:
+        rule = shadow.rule
+        for var in shadow.capture_times.get(time_key, ()):
+            for stock, price in rows:
+                shadow.market_state[stock][var] = price
+        if time_key not in rule.entry_times:
+            return []
+        mask, sl, target = rule.evaluate(shadow.rule_env(rows), shadow.rule_params)
+        return [(j, sl[j] if sl is not None else None, target[j] if target is not None else None)
+                for j in np.flatnonzero(mask)]
+
+    shadow.possible_calls += len(rows)
+    if not shadow.schedule.active_at(time_key):
+        return []
+    out = []
+    for j, (stock, price) in enumerate(rows):
+        shadow.strategy_calls += 1
+        signal, sl, target = strategy_logic(
+            time_key=time_key,
+            hour=h,
+            minute=m,
+            second=0,
+            stock=stock,
+            price=price,
+            position=None,
+            market_state=shadow.market_state,
+            can_trade=True,
+            prev_day=get_prev_day_data(stock, shadow.prev_day_file),
+            strategy_id=shadow.strategy_id,
+            params=shadow.params,
+        )
+        if signal == "BUY":
+            out.append((j, sl, target))
+    return out
+
+
+def generate_signals(job):
+    """Phase 1 for one shard -> ([(minute, column, sl, target)], strategy calls, possible calls)."""
+    strategy_id, store_path, prev_day_file, params, columns = job
+    query = MarketDataQuery(store_path)
+    shadow = IntradayEngine(strategy_id, prev_day_file, params, minutes=1)
+
+    c0, c1 = int(columns[0]), int(columns[-1]) + 1
+    local = columns - c0
+    names = np.asarray(query.names, dtype=object)[columns]
+    step = query.store.tile_minutes
+    signals = []
+    for lo in range(0, len(query.time_keys), step):
+        block = query.store.read(None, slice(lo, lo + step), slice(c0, c1))[:, local]
+        for k, values in enumerate(block):
+            i = lo + k
+            h, m, time_key = minute_time_key(query.time_keys[i])
+            present = np.flatnonzero(~np.isnan(values))
+            if not shadow_active(shadow, time_key):
+                shadow.possible_calls += len(present)
+                continue
+            rows = list(zip(names[present].tolist(), values[present].tolist()))
+            for j, sl, target in shadow_signals(shadow, h, m, time_key, rows):
+                signals.append((i, int(columns[present[j]]), sl, target))
+    return signals, shadow.strategy_calls, shadow.possible_calls
+
+
+# ================= PHASE 2: ALLOCATION =================
+class CandidateEngine(IntradayEngine):
+    """IntradayEngine whose entries come from phase-1 candidates instead of strategy calls."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.row_signals: List[Optional[tuple]] = []
+
+    def run_candidates(self, time_key, rows):
+        open_positions = self.open_positions
+        for (stock, price), signal in zip(rows, self.row_signals):
+            if stock in open_positions and self.check_exit(time_key, stock, price):
+                continue
+            if signal is not None and self.can_open_new_trade() and stock not in open_positions:
+                self.execute_buy(time_key, stock, price, signal[0], signal[1])
+
+    def run_strategy_minute(self, h, m, time_key, rows):
+        self.run_candidates(time_key, rows)
+
+    def run_rule_minute(self, time_key, rows):
+        self.run_candidates(time_key, rows)
+
+
+# ================= RUN =================
+def run_parallel(strategy_id, data_dir: str = DATA_DIR, prev_day_file: str = PREV_DAY_FILE, params=None,
+                 screen=None, workers: Optional[int] = WORKERS):
+    """run_strategy in two phases; same result, phase 1 spread over `workers` processes."""
+    if not supports(strategy_id):
+        return run_strategy(strategy_id, data_dir, prev_day_file, params, screen)
+
+    started = time.perf_counter()
+    store_path = resolve_store(data_dir)
+    query = MarketDataQuery(store_path)
+    engine = CandidateEngine(strategy_id, prev_day_file, params, minutes=len(query.time_keys) + 1, screen=screen)
+    names = query.names
+    columns = [c for c, name in enumerate(names) if engine.in_universe(name)]
+
+    # ===== PHASE 1 =====
+    workers = max(1, workers or 1)
+    shards = shard_columns(names, columns, workers)
+    jobs = [(strategy_id, store_path, prev_day_file, params, shard) for shard in shards]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            parts = list(pool.map(generate_signals, jobs))
+    else:
+        parts = [generate_signals(job) for job in jobs]
+
+    by_minute: Dict[int, Dict[int, tuple]] = {}
+    for signals, calls, possible in parts:
+        engine.strategy_calls += calls
+        engine.possible_calls += possible
+        for i, col, sl, target in signals:
+            by_minute.setdefault(i, {})[col] = (sl, target)
+    signal_seconds = time.perf_counter() - started
+
+    # ===== PHASE 2 =====
+    name_columns: Dict[str, List[int]] = {}
+    for c in columns:
+        name_columns.setdefault(names[c], []).append(c)
+
+    step = query.store.tile_minutes
+    for lo in range(0, len(query.time_keys), step):
+        block = query.store.read(None, slice(lo, lo + step))
+        for k, values in enumerate(block):
+            i = lo + k
+            h, m, time_key = minute_time_key(query.time_keys[i])
+            candidates = by_minute.get(i, {})
+            if candidates or engine.open_positions:
+                cols = set(candidates)
+                for stock in engine.open_positions:
+                    cols.update(name_columns[stock])
+                cols = [c for c in sorted(cols) if not np.isnan(values[c])]
+                rows = [(names[c], float(values[c])) for c in cols]
+                engine.row_signals = [candidates.get(c) for c in cols]
+            else:
+                rows = []
+                engine.row_signals = []
+            engine.on_minute(time_key, rows, h, m, screened=True)
+
+    engine.finish()
+    result = engine.results()
+    result["phase_seconds"] = {"signals": signal_seconds,
+                               "allocation": time.perf_counter() - started - signal_seconds}
+    return result
+
+
+# ================= MAIN =================
+def main():
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else DATA_DIR
+    prev_day_file = sys.argv[2] if len(sys.argv) > 2 else PREV_DAY_FILE
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else WORKERS
+
+    started = time.perf_counter()
+    sequential = run_strategy(9, data_dir, prev_day_file)
+    sequential_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    parallel = run_parallel(9, data_dir, prev_day_file, workers=workers)
+    parallel_seconds = time.perf_counter() - started
+
+    same = sequential["trade_log"].equals(parallel["trade_log"])
+    phases = parallel["phase_seconds"]
+    print(f"Sequential : {sequential_seconds:.2f}s, {sequential['orders']} orders")
+    print(f"Parallel   : {parallel_seconds:.2f}s with {workers} workers "
+          f"(signals {phases['signals']:.2f}s, allocation {phases['allocation']:.2f}s), {parallel['orders']} orders")
+    print(f"{'✅' if same else '❌'} Trade logs {'identical' if same else 'differ'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+from typing import Dict, Optional
+
+import EquityCurve  # type: ignore
+import SignalExpressions  # type: ignore
+import StrategyFramework as engine  # type: ignore
+import StrategyTestBed  # type: ignore
+import UniverseScreen  # type: ignore
+from SignalExpressions import SignalRule  # type: ignore
+
+# helpers/storage is on sys.path once StrategyFramework is imported
+import MarketDataQuery  # type: ignore
+import MinuteStore  # type: ignore
+
+"""
+Content-addressed cache of run_strategy results.
+
+The key is a SHA-1 over everything that determines a backtest:
+- the contents of every minute file in data_dir (or of the .cbm store) and
+  of the prev-day file
+  (file digests are memoised per (path, size, mtime), so a warm key costs
+  a few stat calls)
+- the strategy: source of strategy_logic and _strategy_<id> plus its
+  schedule, or a SignalRule's expressions and default params, and its
+  universe screen
+- the params overrides and the screen override
+- the engine: source of IntradayEngine, run_strategy / replay and the
+  prev-day loading and name matching in StrategyFramework, of the
+  EquityCurve, SignalExpressions and UniverseScreen modules and of the
+  MinuteStore / MarketDataQuery readers, the engine config (START_CAPITAL,
+  BUCKETS, SLIPPAGE_PCT, BROKERAGE_PER_ORDER, FORCE_EXIT_TIME) and
+  CACHE_VERSION (still bumped for changes outside that source)
+
+Entries are pickled result dicts (trade log and equity curve included) in
+CACHE_DIR/<strategy>-<key>.pkl, CACHE_DIR being at the repository root
+whatever the working directory. A hit refreshes the file's mtime, and when
+the directory grows past MAX_BYTES the least recently used entries are
+deleted. invalidate() drops one key, every entry of a strategy, or all.
+
+Usage:
+    from ResultCache import cached_run_strategy
+    result = cached_run_strategy(9, data_dir, prev_day_file, params)
+
+    python ResultCache.py info | clear [strategy]
+"""
+
+# ================= CONFIG =================
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CACHE_DIR = os.path.join(REPO_DIR, ".result_cache")
+MAX_BYTES = 512 * 1024 * 1024
+CACHE_VERSION = 2                   # bump when semantics change outside the fingerprinted source
+ENGINE_CONFIG = ("START_CAPITAL", "BUCKETS", "SLIPPAGE_PCT", "BROKERAGE_PER_ORDER", "FORCE_EXIT_TIME")
+
+# StrategyFramework code a backtest runs through (main() and the CLI are left out)
+ENGINE_FUNCTIONS = (
+    "clean_name", "is_header_or_separator", "validate_ohlcv", "load_prev_day_ohlc", "build_stock_mapping",
+    "load_prev_day", "prev_day_key", "get_prev_day_data", "prev_day_arrays", "screen_universe",
+    "minute_time_key", "IntradayEngine", "run_strategy", "replay",
+)
+ENGINE_MODULES = (EquityCurve, SignalExpressions, UniverseScreen, MinuteStore, MarketDataQuery)
+
+_file_digests: Dict[tuple, str] = {}
+_engine_source: Optional[str] = None
+
+
+# ================= KEYS =================
+def file_digest(path: str) -> str:
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    digest = _file_digests.get(memo_key)
+    if digest is None:
+        with open(path, "rb") as f:
+            digest = _file_digests[memo_key] = hashlib.sha1(f.read()).hexdigest()
+    return digest
+
+
+def data_digest(data_dir: str, prev_day_file: str) -> str:
+    """data_dir is a directory of minute files or a single .cbm store."""
+    h = hashlib.sha1()
+    if os.path.isfile(data_dir):
+        h.update(file_digest(data_dir).encode())
+    else:
+        for name in sorted(os.listdir(data_dir)):
+            h.update(name.encode())
+            h.update(file_digest(os.path.join(data_dir, name)).encode())
+    h.update(file_digest(prev_day_file).encode())
+    return h.hexdigest()
+
+
+def strategy_fingerprint(strategy_id) -> str:
+    if isinstance(strategy_id, SignalRule):
+        rule = strategy_id
+        parts = [
+            rule.name, rule.entry.source,
+            rule.sl.source if rule.sl else "", rule.target.source if rule.target else "",
+            json.dumps(rule.capture, sort_keys=True), json.dumps(sorted(rule.entry_times)),
+            json.dumps(rule.params, sort_keys=True),
+            repr(StrategyTestBed.STRATEGY_SCREENS.get(rule.name)),
+        ]
+        return "\n".join(parts)
+
+    parts = [inspect.getsource(StrategyTestBed.strategy_logic)]
+    fn = getattr(StrategyTestBed, f"_strategy_{strategy_id}", None)
+    if fn is not None:
+        parts.append(inspect.getsource(fn))
+    parts.append(json.dumps(StrategyTestBed.STRATEGY_PARAMS.get(strategy_id), sort_keys=True))
+    parts.append(repr(StrategyTestBed.STRATEGY_SCHEDULES.get(strategy_id)))
+    parts.append(repr(StrategyTestBed.STRATEGY_SCREENS.get(strategy_id)))
+    return "\n".join(parts)
+
+
+def engine_fingerprint() -> str:
+    """Source of the engine, its data readers and metrics code (read once per process)."""
+    global _engine_source
+    if _engine_source is None:
+        _engine_source = "\n".join(
+            [inspect.getsource(getattr(engine, name)) for name in ENGINE_FUNCTIONS]
+            + [inspect.getsource(module) for module in ENGINE_MODULES]
+        )
+    return _engine_source
+
+
+def strategy_tag(strategy_id) -> str:
+    name = strategy_id.name if isinstance(strategy_id, SignalRule) else str(strategy_id)
+    return "".join(ch if ch.isalnum() else "_" for ch in name)
+
+
+def cache_key(strategy_id, data_dir: str, prev_day_file: str, params=None, screen=None) -> str:
+    config = {name: getattr(engine, name) for name in ENGINE_CONFIG}
+    h = hashlib.sha1()
+    for part in (
+        str(CACHE_VERSION),
+        engine_fingerprint(),
+        data_digest(data_dir, prev_day_file),
+        strategy_fingerprint(strategy_id),
+        json.dumps(params or {}, sort_keys=True),
+        repr(screen),
+        json.dumps(config, sort_keys=True),
+    ):
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+# ================= STORE =================
+class ResultCache:
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, tag: str, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{tag}-{key}.pkl")
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, path))
+        return entries
+
+    def get(self, tag: str, key: str) -> Optional[Dict]:
+        path = self._path(tag, key)
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+        os.utime(path)                      # mark as recently used
+        self.hits += 1
+        return result
+
+    def put(self, tag: str, key: str, result: Dict) -> None:
+        path = self._path(tag, key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache fits MAX_BYTES."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def invalidate(self, key: Optional[str] = None, strategy_id=None) -> int:
+        """Drop one key, every entry of a strategy, or (no arguments) everything."""
+        tag = strategy_tag(strategy_id) if strategy_id is not None else None
+        removed = 0
+        for _, _, path in self._entries():
+            name = os.path.basename(path)[:-len(".pkl")]
+            entry_tag, _, entry_key = name.rpartition("-")
+            if (key is None or entry_key == key) and (tag is None or entry_tag == tag):
+                try:
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def info(self) -> Dict:
+        entries = self._entries()
+        return {"entries": len(entries), "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses}
+
+
+_default_cache: Optional[ResultCache] = None
+
+
+def default_cache() -> ResultCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
+
+
+def cached_run_strategy(
+    strategy_id,
+    data_dir: str = engine.DATA_DIR,
+    prev_day_file: str = engine.PREV_DAY_FILE,
+    params=None,
+    cache: Optional[ResultCache] = None,
+    screen=None,
+) -> Dict:
+    """run_strategy, answered from the cache when the same inputs ran before."""
+    cache = cache or default_cache()
+    tag, key = strategy_tag(strategy_id), cache_key(strategy_id, data_dir, prev_day_file, params, screen)
+    result = cache.get(tag, key)
+    if result is None:
+        result = engine.run_strategy(strategy_id, data_dir, prev_day_file, params=params, screen=screen)
+        cache.put(tag, key, result)
+    return result
+
+
+# ================= MAIN =================
+def main():
+    cache = default_cache()
+    command = sys.argv[1] if len(sys.argv) > 1 else "info"
+    if command == "clear":
+        strategy = sys.argv[2] if len(sys.argv) > 2 else None
+        print(f"✅ Removed {cache.invalidate(strategy_id=strategy)} cached results")
+    else:
+        info = cache.info()
+        print(f"{info['entries']} cached results, {info['bytes'] / 1e6:.1f} MB of {info['max_bytes'] / 1e6:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from StrategyFramework import START_CAPITAL, BROKERAGE_PER_ORDER  # type: ignore
+
+"""
+Monte Carlo robustness of a backtest's trade log.
+
+run_strategy gives one ROI and one drawdown, i.e. one path. This module
+resamples the closed trades of that path many times to show how much of the
+result is luck of ordering / selection:
+
+- "bootstrap": draw N trades with replacement (N = trades in the log)
+- "shuffle":   same trades in a random order (final ROI is unchanged, the
+               drawdown and ruin numbers are what move)
+
+Every resample is a row of a (samples x trades) matrix; equity, drawdown and
+ruin are computed for a whole chunk of rows with NumPy, and chunks are spread
+over worker processes with independent seeds, so tens of thousands of paths
+take well under a second for a day's log.
+
+Input is the trade log of run_strategy (`Time, Stock, Action, Price, Qty,
+PnL, Capital`); each non-BUY row is one closed trade, charged brokerage for
+both of its orders.
+
+Usage:
+    python RobustnessAnalysis.py trades.csv [bootstrap|shuffle]
+"""
+
+# ================= CONFIG =================
+N_SAMPLES = 20000
+METHOD = "bootstrap"                # "bootstrap" or "shuffle"
+CONFIDENCE = 0.90                   # two-sided interval
+RUIN_PCT = 0.05                     # ruin = equity ever falls 5% below start
+CHUNK_CELLS = 2_000_000             # samples x trades per vectorised batch
+WORKERS = os.cpu_count()
+SEED = 42
+
+
+# ================= TRADES =================
+def trade_pnls(trade_log, brokerage_per_order: float = BROKERAGE_PER_ORDER) -> np.ndarray:
+    """Net PnL of every closed trade, in log order."""
+    df = trade_log if isinstance(trade_log, pd.DataFrame) else pd.DataFrame(trade_log)
+    closed = df[df["Action"] != "BUY"]
+    return closed["PnL"].to_numpy(dtype=np.float64) - 2 * brokerage_per_order
+
+
+# ================= PATH METRICS =================
+def path_metrics(pnl: np.ndarray, start_capital: float, ruin_level: float):
+    """
+    pnl is (samples, trades). Returns final ROI %, max drawdown % and a ruin
+    flag per sample, all on the closed-trade equity curve.
+    """
+    equity = start_capital + np.cumsum(pnl, axis=1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), start_capital)
+    drawdown = ((peak - equity) / peak).max(axis=1) * 100
+    roi = (equity[:, -1] - start_capital) / start_capital * 100
+    ruined = equity.min(axis=1) <= ruin_level
+    return roi, drawdown, ruined
+
+
+def _resample_chunk(job):
+    pnls, method, n, seed, start_capital, ruin_level = job
+    rng = np.random.default_rng(seed)
+    if method == "shuffle":
+        samples = rng.permuted(np.broadcast_to(pnls, (n, len(pnls))), axis=1)
+    else:
+        samples = pnls[rng.integers(0, len(pnls), size=(n, len(pnls)))]
+    return path_metrics(samples, start_capital, ruin_level)
+
+
+# ================= ANALYSIS =================
+def resample(
+    pnls: np.ndarray,
+    method: str = METHOD,
+    n_samples: int = N_SAMPLES,
+    start_capital: float = START_CAPITAL,
+    ruin_pct: float = RUIN_PCT,
+    seed: int = SEED,
+    workers: Optional[int] = WORKERS,
+):
+    """(roi, drawdown, ruined) arrays of length n_samples."""
+    if method not in ("bootstrap", "shuffle"):
+        raise ValueError(f"Unknown method {method!r}")
+    pnls = np.asarray(pnls, dtype=np.float64)
+    ruin_level = start_capital * (1 - ruin_pct)
+
+    per_chunk = max(1, CHUNK_CELLS // max(1, len(pnls)))
+    sizes = [min(per_chunk, n_samples - i) for i in range(0, n_samples, per_chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(pnls, method, n, s, start_capital, ruin_level) for n, s in zip(sizes, seeds)]
+
+    if workers and workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            parts = list(pool.map(_resample_chunk, jobs))
+    else:
+        parts = [_resample_chunk(job) for job in jobs]
+    return tuple(np.concatenate(col) for col in zip(*parts))
+
+
+def analyse(
+    trade_log,
+    method: str = METHOD,
+    n_samples: int = N_SAMPLES,
+    confidence: float = CONFIDENCE,
+    start_capital: float = START_CAPITAL,
+    ruin_pct: float = RUIN_PCT,
+    seed: int = SEED,
+    workers: Optional[int] = WORKERS,
+) -> Dict:
+    """
+    Confidence intervals for ROI (after brokerage) and max drawdown, plus
+    probability of loss and risk of ruin, from a run_strategy trade log.
+    """
+    pnls = trade_pnls(trade_log)
+    result = {"method": method, "samples": n_samples, "trades": len(pnls)}
+    if len(pnls) == 0:
+        return {**result, "roi_mean": 0.0, "roi_ci": (0.0, 0.0), "drawdown_median": 0.0,
+                "drawdown_ci": (0.0, 0.0), "prob_loss": 0.0, "risk_of_ruin": 0.0}
+
+    roi, drawdown, ruined = resample(pnls, method, n_samples, start_capital, ruin_pct, seed, workers)
+    tail = (1 - confidence) / 2 * 100
+    lo_roi, hi_roi = np.percentile(roi, [tail, 100 - tail])
+    lo_dd, hi_dd = np.percentile(drawdown, [tail, 100 - tail])
+    return {
+        **result,
+        "roi_mean": float(roi.mean()),
+        "roi_ci": (float(lo_roi), float(hi_roi)),
+        "drawdown_median": float(np.median(drawdown)),
+        "drawdown_ci": (float(lo_dd), float(hi_dd)),
+        "prob_loss": float((roi < 0).mean()),
+        "risk_of_ruin": float(ruined.mean()),
+    }
+
+
+def format_summary(summary: Dict, confidence: float = CONFIDENCE) -> str:
+    pct = int(round(confidence * 100))
+    return (
+        f"{summary['method']} x{summary['samples']} over {summary['trades']} trades | "
+        f"ROI {pct}% CI [{summary['roi_ci'][0]:.2f}%, {summary['roi_ci'][1]:.2f}%] | "
+        f"DD {pct}% CI [{summary['drawdown_ci'][0]:.2f}%, {summary['drawdown_ci'][1]:.2f}%] | "
+        f"P(loss) {summary['prob_loss'] * 100:.1f}% | ruin {summary['risk_of_ruin'] * 100:.1f}%"
+    )
+
+
+# ================= MAIN =================
+def main():
+    if len(sys.argv) < 2:
+        raise SystemExit("usage: python RobustnessAnalysis.py trades.csv [bootstrap|shuffle]")
+    method = sys.argv[2] if len(sys.argv) > 2 else METHOD
+    summary = analyse(pd.read_csv(sys.argv[1]), method=method)
+    print(format_summary(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import ast
+import re
+from typing import Dict, Iterable, Optional, Union
+
+import numpy as np
+
+"""
+Declarative entry rules compiled to vectorised masks.
+
+A SignalRule describes a long entry with plain expressions instead of a
+Python strategy function:
+
+    SignalRule(
+        name="gap_momentum",
+        capture={"open": "09-15-00"},
+        at="09-20-00",
+        entry="price > prev_close * gap_mult AND price > open * momentum_mult",
+        sl="price * sl_mult",
+        target="price * 1.015",
+        params={"gap_mult": 1.003, "momentum_mult": 1.0015, "sl_mult": 0.9965},
+    )
+
+- `capture` stores the price seen at a time key under a name that later
+  expressions can use (kept per stock in the engine's market_state)
+- `at` lists the time keys where `entry` is evaluated
+- `params` names tunable constants with their defaults; run_strategy(rule,
+  params=...) overrides them, and overriding a name the rule does not
+  declare raises SignalExpressionError
+- expressions may use price, prev_open, prev_high, prev_low, prev_close,
+  captured names, param names, numbers, + - * /, comparisons, and / or /
+  not (AND / OR / NOT also accepted) and parentheses
+
+Expressions are checked against that whitelist and compiled once; evaluating
+one over a cross-section of NumPy arrays gives the mask for every stock in a
+single call. Arithmetic keeps the order written, so a rule computes exactly
+the same floats as the equivalent Python strategy.
+"""
+
+PREV_DAY_FIELDS = ("open", "high", "low", "close")
+BASE_NAMES = {"price"} | {f"prev_{f}" for f in PREV_DAY_FIELDS}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.BinOp, ast.UnaryOp, ast.Compare,
+    ast.Name, ast.Load, ast.Constant,
+    ast.And, ast.Or, ast.Not, ast.USub, ast.UAdd,
+    ast.Add, ast.Sub, ast.Mult, ast.Div,
+    ast.Gt, ast.GtE, ast.Lt, ast.LtE, ast.Eq, ast.NotEq,
+)
+
+
+class SignalExpressionError(ValueError):
+    pass
+
+
+# ================= COMPILER =================
+class _Vectorise(ast.NodeTransformer):
+    """and / or / not and chained comparisons -> numpy logical functions."""
+
+    @staticmethod
+    def _call(fn: str, args):
+        return ast.Call(
+            func=ast.Attribute(value=ast.Name(id="np", ctx=ast.Load()), attr=fn, ctx=ast.Load()),
+            args=args, keywords=[],
+        )
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        fn = "logical_and" if isinstance(node.op, ast.And) else "logical_or"
+        out = node.values[0]
+        for value in node.values[1:]:
+            out = self._call(fn, [out, value])
+        return out
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return self._call("logical_not", [node.operand])
+        return node
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        parts, left = [], node.left
+        for op, right in zip(node.ops, node.comparators):
+            parts.append(ast.Compare(left=left, ops=[op], comparators=[right]))
+            left = right
+        out = parts[0]
+        for part in parts[1:]:
+            out = self._call("logical_and", [out, part])
+        return out
+
+
+class CompiledExpression:
+    def __init__(self, source: str, allowed_names: Iterable[str]):
+        self.source = source
+        text = re.sub(r"\b(AND|OR|NOT)\b", lambda m: m.group(1).lower(), source)
+        try:
+            tree = ast.parse(text, mode="eval")
+        except SyntaxError as e:
+            raise SignalExpressionError(f"Invalid expression {source!r}: {e.msg}") from None
+
+        allowed = set(allowed_names)
+        self.allowed = frozenset(allowed)
+        self.names = set()
+        for node in ast.walk(tree):
+            if not isinstance(node, _ALLOWED_NODES):
+                raise SignalExpressionError(f"Unsupported syntax in {source!r}: {type(node).__name__}")
+            if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+                raise SignalExpressionError(f"Only numeric constants are allowed in {source!r}")
+            if isinstance(node, ast.Name):
+                if node.id not in allowed:
+                    raise SignalExpressionError(f"Unknown name {node.id!r} in {source!r}")
+                self.names.add(node.id)
+
+        tree = ast.fix_missing_locations(_Vectorise().visit(tree))
+        self.code = compile(tree, f"<signal {source}>", "eval")
+
+    def __reduce__(self):
+        # Code objects do not pickle; recompile from source in the receiving process
+        return CompiledExpression, (self.source, self.allowed)
+
+    def __call__(self, env: Dict[str, Union[float, np.ndarray]]):
+        return eval(self.code, {"__builtins__": {}, "np": np}, env)
+
+
+# ================= RULES =================
+class SignalRule:
+    def __init__(
+        self,
+        name: str,
+        entry: str,
+        at: Union[str, Iterable[str]],
+        sl: Optional[str] = None,
+        target: Optional[str] = None,
+        capture: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, float]] = None,
+    ):
+        self.name = name
+        self.capture = dict(capture or {})
+        self.params = dict(params or {})
+        self.entry_times = {at} if isinstance(at, str) else set(at)
+
+        clash = BASE_NAMES & set(self.capture)
+        if clash:
+            raise SignalExpressionError(f"Captured names shadow built-ins: {sorted(clash)}")
+        clash = (BASE_NAMES | set(self.capture)) & set(self.params)
+        if clash:
+            raise SignalExpressionError(f"Param names shadow built-ins or captured names: {sorted(clash)}")
+
+        names = BASE_NAMES | set(self.capture) | set(self.params)
+        self.entry = CompiledExpression(entry, names)
+        self.sl = CompiledExpression(sl, names) if sl else None
+        self.target = CompiledExpression(target, names) if target else None
+
+    def __repr__(self):
+        return f"SignalRule({self.name!r})"
+
+    @property
+    def capture_times(self) -> Dict[str, list]:
+        """time key -> captured names stored at that time."""
+        by_time: Dict[str, list] = {}
+        for var, time_key in self.capture.items():
+            by_time.setdefault(time_key, []).append(var)
+        return by_time
+
+    @property
+    def state_names(self):
+        return (self.entry.names | (self.sl.names if self.sl else set())
+                | (self.target.names if self.target else set())) & set(self.capture)
+
+    def resolve_params(self, overrides: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """The rule's params with `overrides` applied; unknown names are an error."""
+        unknown = set(overrides or {}) - set(self.params)
+        if unknown:
+            declared = f"declares {sorted(self.params)}" if self.params else "declares no params"
+            raise SignalExpressionError(f"Rule {self.name!r} {declared}; cannot apply {sorted(unknown)}")
+        return {**self.params, **(overrides or {})}
+
+    def evaluate(self, env: Dict[str, np.ndarray], params: Optional[Dict[str, float]] = None):
+        """
+        env holds one array per name (NaN where unknown); params override the
+        rule's defaults. Returns the entry mask and SL / target arrays (None
+        when the rule has none).
+        """
+        env = {**self.resolve_params(params), **env}
+        with np.errstate(invalid="ignore"):
+            mask = np.asarray(self.entry(env), dtype=bool)
+            sl = self.sl(env) if self.sl else None
+            target = self.target(env) if self.target else None
+        return mask, sl, target
@@ -1,11 +1,18 @@
 import csv
 import os
+import sys
 from typing import TypedDict, Optional, Dict
 from collections import defaultdict
 
-import pandas as pd
+import numpy as np
 
-from StrategyTestBed import strategy_logic  # type: ignore
+from StrategyTestBed import strategy_logic, STRATEGY_PARAMS, STRATEGY_SCHEDULES, STRATEGY_SCREENS  # type: ignore
+from SignalExpressions import SignalRule, PREV_DAY_FIELDS  # type: ignore
+from EquityCurve import TradeBuffer, EquityCurve, risk_metrics  # type: ignore
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(SRC_DIR, "helpers", "storage"))
+from MarketDataQuery import MarketDataQuery  # type: ignore
 
 
 """
@@ -20,7 +27,15 @@ Features:
 - SL / Target handling
 - Forced exit
 - ROI before & after tax
-- Max drawdown tracking
+- Per-minute mark-to-market equity: max drawdown, Sharpe, Sortino,
+  exposure and turnover
+- Trade log returned for Monte Carlo robustness (RobustnessAnalysis)
+- Python strategies (StrategyTestBed) or declarative SignalRules
+- Strategy schedules: strategies are only called in minutes they declare
+- Pre-market universe screens (UniverseScreen): only stocks that pass the
+  strategy's prev-day screen are processed minute by minute
+- IntradayEngine: the session logic, fed minute by minute from stored data
+  (run_strategy, via MarketDataQuery) or a live feed (PaperTradingRunner)
 """
 
 # ================= DATA STRUCTURES =================
@@ -29,6 +44,7 @@ class OHLCVRecord(TypedDict):
     high: float
     low: float
     close: float
+    volume: float
 
 
 # ================= CONFIG =================
@@ -72,17 +88,18 @@ def load_prev_day_ohlc(filepath: str) -> Dict[str, OHLCVRecord]:
             try:
                 stock = clean_name(name)
                 o, h, l, c = map(float, row[1:5])
+                try:
+                    v = float(row[5]) if len(row) > 5 else float("nan")
+                except ValueError:
+                    v = float("nan")
                 if validate_ohlcv(o, h, l, c):
-                    prev[stock] = {"open": o, "high": h, "low": l, "close": c}
+                    prev[stock] = {"open": o, "high": h, "low": l, "close": c, "volume": v}
             except:
                 continue
     print(f"[INFO] Loaded prev-day OHLC for {len(prev)} stocks")
     return prev
 
 
-prev_day_data = load_prev_day_ohlc(PREV_DAY_FILE)
-
-
 # ================= STOCK NAME MAPPING =================
 def build_stock_mapping(prev_dict):
     mapping = {}
@@ -98,224 +115,463 @@ def build_stock_mapping(prev_dict):
     return mapping
 
 
-stock_mapping = build_stock_mapping(prev_day_data)
+_prev_day_cache = {}
+
+
+def load_prev_day(filepath: str = PREV_DAY_FILE):
+    """Prev-day OHLC and its name mapping, loaded once per file."""
+    if filepath not in _prev_day_cache:
+        prev = load_prev_day_ohlc(filepath)
+        _prev_day_cache[filepath] = (prev, build_stock_mapping(prev))
+    return _prev_day_cache[filepath]
 
 
-def get_prev_day_data(stock: str) -> Optional[OHLCVRecord]:
+def prev_day_key(stock: str, prev_day_file: str = PREV_DAY_FILE) -> Optional[str]:
+    """Name of a feed stock in the prev-day table, or None."""
+    prev_day_data, stock_mapping = load_prev_day(prev_day_file)
     s = stock.upper().strip()
     if s in prev_day_data:
-        return prev_day_data[s]
-    if s in stock_mapping:
-        return prev_day_data.get(stock_mapping[s])
-    return None
+        return s
+    s = stock_mapping.get(s)
+    return s if s in prev_day_data else None
+
+
+def get_prev_day_data(stock: str, prev_day_file: str = PREV_DAY_FILE) -> Optional[OHLCVRecord]:
+    key = prev_day_key(stock, prev_day_file)
+    return load_prev_day(prev_day_file)[0][key] if key is not None else None
+
+
+# ================= UNIVERSE SCREEN =================
+_prev_day_arrays = {}
+
+
+def prev_day_arrays(filepath: str = PREV_DAY_FILE):
+    """Prev-day names and {field: ndarray} columns, built once per file."""
+    if filepath not in _prev_day_arrays:
+        prev, _ = load_prev_day(filepath)
+        names = list(prev)
+        columns = {
+            field: np.array([prev[n][field] for n in names], dtype=np.float64)
+            for field in ("open", "high", "low", "close", "volume")
+        }
+        _prev_day_arrays[filepath] = (names, columns)
+    return _prev_day_arrays[filepath]
+
+
+def screen_universe(screen, prev_day_file: str = PREV_DAY_FILE, params=None) -> frozenset:
+    """Prev-day names that pass `screen` (a UniverseScreen) with `params`."""
+    names, columns = prev_day_arrays(prev_day_file)
+    return screen.select(names, columns, params, CAPITAL_PER_BUCKET, SLIPPAGE_PCT)
+
+
+# ================= MINUTE FILES =================
+def minute_time_key(file_name: str):
+    """'09-15-23.txt' -> (9, 15, '09-15-00')"""
+    h, m, *_ = map(int, file_name.replace(".txt", "").split("-"))
+    return h, m, f"{h:02d}-{m:02d}-00"
 
 
 # ================= TRADE ENGINE =================
-def run_strategy(strategy_id: int):
-    capital = START_CAPITAL
-    open_positions = {}
-    trade_log = []
-    market_state = defaultdict(dict)
-    last_price = {}
-
-    used_buckets = 0
-    stop_trading = False
-    force_exit_done = False
-
-    peak_capital = START_CAPITAL
-    max_drawdown = 0
-
-    def update_drawdown():
-        nonlocal peak_capital, max_drawdown, capital
-        peak_capital = max(peak_capital, capital)
-        dd = (peak_capital - capital) / peak_capital * 100
-        max_drawdown = max(max_drawdown, dd)
-
-    def can_open_new_trade():
-        return used_buckets < BUCKETS and not stop_trading
-
-    def position_size(price):
+class IntradayEngine:
+    """
+    One trading session fed minute by minute. Capital, buckets, slippage,
+    SL / target, forced exit and the strategy calls live here, so the same
+    rules drive file backtests (run_strategy) and live paper trading
+    (PaperTradingRunner).
+
+        engine = IntradayEngine(9, prev_day_file)
+        engine.on_minute("09-15-00", [(stock, price), ...])
+        ...
+        engine.finish()
+        result = engine.results()
+    """
+
+    def __init__(self, strategy_id, prev_day_file: str = PREV_DAY_FILE, params=None, minutes: int = 376,
+                 screen=None):
+        self.rule = strategy_id if isinstance(strategy_id, SignalRule) else None
+        self.strategy_id = self.rule.name if self.rule is not None else strategy_id
+        self.prev_day_file = prev_day_file
+        self.params = params
+        self.rule_params = self.rule.resolve_params(params) if self.rule is not None else None
+
+        self.capital = START_CAPITAL
+        self.open_positions = {}
+        self.trade_log = TradeBuffer()
+        self.market_state = defaultdict(dict)
+        self.last_price = {}
+        self.equity_curve = EquityCurve(minutes, START_CAPITAL)
+        self.minutes_seen = 0
+
+        self.schedule = STRATEGY_SCHEDULES.get(self.strategy_id) if self.rule is None else None
+        self.capture_times = self.rule.capture_times if self.rule is not None else {}
+        self.strategy_calls = 0
+        self.possible_calls = 0
+
+        # Pre-market screen: None = every stock in the feed is processed
+        self.screen = screen if screen is not None else STRATEGY_SCREENS.get(self.strategy_id)
+        self.universe = None
+        if self.screen is not None:
+            if self.rule is not None:
+                strategy_params = self.rule_params
+            else:
+                strategy_params = {**STRATEGY_PARAMS.get(self.strategy_id, {}), **(params or {})}
+            self.universe = screen_universe(self.screen, prev_day_file, strategy_params)
+        self._in_universe = {}
+
+        self.used_buckets = 0
+        self.stop_trading = False
+        self.force_exit_done = False
+        self.finished = False
+
+        self._prev_cache = {}
+
+    # ================= UNIVERSE =================
+    def in_universe(self, stock) -> bool:
+        if self.universe is None:
+            return True
+        ok = self._in_universe.get(stock)
+        if ok is None:
+            ok = self._in_universe[stock] = prev_day_key(stock, self.prev_day_file) in self.universe
+        return ok
+
+    def screen_rows(self, rows):
+        if self.universe is None:
+            return rows
+        in_universe = self._in_universe
+        try:
+            return [r for r in rows if in_universe[r[0]]]
+        except KeyError:
+            # First sight of some feed names: resolve them once
+            for stock, _ in rows:
+                self.in_universe(stock)
+            return [r for r in rows if in_universe[r[0]]]
+
+    # ================= ORDERS =================
+    def can_open_new_trade(self):
+        return self.used_buckets < BUCKETS and not self.stop_trading
+
+    def position_size(self, price):
         return int(CAPITAL_PER_BUCKET / price)
 
-    def execute_buy(time, stock, price, sl, target):
-        nonlocal capital, used_buckets
+    def execute_buy(self, time, stock, price, sl, target):
         exec_price = price * (1 + SLIPPAGE_PCT)
-        qty = position_size(exec_price)
+        qty = self.position_size(exec_price)
         cost = exec_price * qty
-        if qty <= 0 or capital < cost:
+        if qty <= 0 or self.capital < cost:
             return
 
-        capital -= cost
-        open_positions[stock] = {
+        self.capital -= cost
+        self.open_positions[stock] = {
             "entry": exec_price,
             "qty": qty,
             "sl": sl,
             "target": target,
         }
-        used_buckets += 1
-        trade_log.append([time, stock, "BUY", exec_price, qty, 0.0, capital, used_buckets])
+        self.used_buckets += 1
+        self.trade_log.append(time, stock, "BUY", exec_price, qty, 0.0, self.capital, self.used_buckets)
+        self.equity_curve.add_trade(cost)
 
-    def execute_sell(time, stock, price, action="SELL"):
-        nonlocal capital, used_buckets
-        pos = open_positions[stock]
+    def execute_sell(self, time, stock, price, action="SELL"):
+        pos = self.open_positions[stock]
         exec_price = price * (1 - SLIPPAGE_PCT)
         proceeds = exec_price * pos["qty"]
         pnl = proceeds - (pos["entry"] * pos["qty"])
 
-        capital += proceeds
-        trade_log.append(
-            [time, stock, action, exec_price, pos["qty"], pnl, capital, used_buckets - 1]
-        )
-        del open_positions[stock]
-        used_buckets -= 1
-        update_drawdown()
-
-    # ================= MAIN LOOP =================
-    for file in sorted(os.listdir(DATA_DIR)):
-        time_key = file.replace(".txt", "")
-        h, m, *_ = map(int, time_key.split("-"))
-        normalized_time = f"{h:02d}-{m:02d}-00"
-
-        rows = []
-        with open(os.path.join(DATA_DIR, file)) as f:
-            for line in f:
-                s = line.rsplit(":", 1)
-                if len(s) == 2 and s[1].strip() != "NA":
-                    try:
-                        rows.append((s[0].strip(), float(s[1])))
-                    except:
-                        continue
-
-        df = pd.DataFrame(rows, columns=["stock", "price"])
-
-        for _, r in df.iterrows():
-            last_price[r["stock"]] = r["price"]
-
-        # ===== FORCE EXIT =====
-        if normalized_time == FORCE_EXIT_TIME and not force_exit_done:
-            for stock in list(open_positions):
-                execute_sell(normalized_time, stock, last_price.get(stock, open_positions[stock]["entry"]), "FORCED_SELL")
-            stop_trading = True
-            force_exit_done = True
-            continue
-
-        if stop_trading:
-            continue
-
-        # ===== STRATEGY EXECUTION =====
-        for _, r in df.iterrows():
-            stock, price = r["stock"], r["price"]
+        self.capital += proceeds
+        self.trade_log.append(time, stock, action, exec_price, pos["qty"], pnl, self.capital, self.used_buckets - 1)
+        self.equity_curve.add_trade(proceeds)
+        del self.open_positions[stock]
+        self.used_buckets -= 1
+
+    def check_exit(self, time_key, stock, price):
+        pos = self.open_positions[stock]
+        if pos["sl"] and price <= pos["sl"]:
+            self.execute_sell(time_key, stock, price, "SL_HIT")
+            return True
+        if pos["target"] and price >= pos["target"]:
+            self.execute_sell(time_key, stock, price, "TARGET_HIT")
+            return True
+        return False
+
+    def exit_all(self, time_key, action):
+        for stock in list(self.open_positions):
+            self.execute_sell(time_key, stock, self.last_price.get(stock, self.open_positions[stock]["entry"]), action)
+
+    # ================= SIGNAL RULES =================
+    def prev_record(self, stock):
+        if stock not in self._prev_cache:
+            self._prev_cache[stock] = get_prev_day_data(stock, self.prev_day_file)
+        return self._prev_cache[stock]
+
+    def rule_env(self, rows):
+        env = {"price": np.array([p for _, p in rows], dtype=np.float64)}
+        records = [self.prev_record(stock) for stock, _ in rows]
+        for field in PREV_DAY_FIELDS:
+            env[f"prev_{field}"] = np.array([r[field] if r else np.nan for r in records])
+        for var in self.rule.state_names:
+            env[var] = np.array([self.market_state[stock].get(var, np.nan) for stock, _ in rows])
+        return env
+
+    def run_rule_minute(self, time_key, rows):
+        open_positions = self.open_positions
+        for var in self.capture_times.get(time_key, ()):
+            for stock, price in rows:
+                self.market_state[stock][var] = price
+
+        mask = None
+        if time_key in self.rule.entry_times:
+            mask, sl, target = self.rule.evaluate(self.rule_env(rows), self.rule_params)
+            events = [j for j in range(len(rows)) if mask[j] or rows[j][0] in open_positions]
+        elif open_positions:
+            events = [j for j, (stock, _) in enumerate(rows) if stock in open_positions]
+        else:
+            return
 
+        # Walk the events in file order so bucket / capital effects match the per-stock loop
+        for j in events:
+            stock, price = rows[j]
+            if stock in open_positions and self.check_exit(time_key, stock, price):
+                continue
+            if mask is not None and mask[j] and self.can_open_new_trade() and stock not in open_positions:
+                self.execute_buy(
+                    time_key, stock, price,
+                    sl[j] if sl is not None else None,
+                    target[j] if target is not None else None,
+                )
+
+    # ================= PYTHON STRATEGIES =================
+    def run_strategy_minute(self, h, m, time_key, rows):
+        open_positions = self.open_positions
+        schedule = self.schedule
+        minute_active = schedule is None or schedule.active_at(time_key)
+
+        self.possible_calls += len(rows)
+        if not minute_active:
+            # Outside the schedule only held stocks need SL / target checks
+            if not open_positions:
+                return
+            rows = [r for r in rows if r[0] in open_positions]
+
+        for stock, price in rows:
             # SL / TARGET CHECK
-            if stock in open_positions:
-                pos = open_positions[stock]
-                if pos["sl"] and price <= pos["sl"]:
-                    execute_sell(normalized_time, stock, price, "SL_HIT")
-                    continue
-                if pos["target"] and price >= pos["target"]:
-                    execute_sell(normalized_time, stock, price, "TARGET_HIT")
-                    continue
+            if stock in open_positions and self.check_exit(time_key, stock, price):
+                continue
 
-            prev_ohlc = get_prev_day_data(stock)
+            if not minute_active and not schedule.on_position:
+                continue
 
+            prev_ohlc = get_prev_day_data(stock, self.prev_day_file)
+
+            self.strategy_calls += 1
             signal, sl, target = strategy_logic(
-                time_key=normalized_time,
+                time_key=time_key,
                 hour=h,
                 minute=m,
                 second=0,
                 stock=stock,
                 price=price,
                 position=open_positions.get(stock),
-                market_state=market_state,
-                can_trade=can_open_new_trade(),
+                market_state=self.market_state,
+                can_trade=self.can_open_new_trade(),
                 prev_day=prev_ohlc,
-                strategy_id=strategy_id,
+                strategy_id=self.strategy_id,
+                params=self.params,
             )
 
             if signal == "BUY" and stock not in open_positions:
-                execute_buy(normalized_time, stock, price, sl, target)
+                self.execute_buy(time_key, stock, price, sl, target)
             elif signal == "SELL" and stock in open_positions:
-                execute_sell(normalized_time, stock, price)
+                self.execute_sell(time_key, stock, price)
+
+    # ================= SESSION =================
+    def on_minute(self, time_key: str, rows, h: Optional[int] = None, m: Optional[int] = None,
+                  screened: bool = False):
+        """
+        Process one minute cross-section; `time_key` is 'HH-MM-00'. Rows are
+        restricted to the screened universe unless `screened` says the
+        caller already did.
+        """
+        if h is None:
+            h, m = int(time_key[:2]), int(time_key[3:5])
+
+        if not screened:
+            rows = self.screen_rows(rows)
+        self.last_price.update(rows)
+
+        # ===== FORCE EXIT =====
+        if time_key == FORCE_EXIT_TIME and not self.force_exit_done:
+            self.exit_all(time_key, "FORCED_SELL")
+            self.stop_trading = True
+            self.force_exit_done = True
 
-    # ===== FINAL EXIT =====
-    for stock in list(open_positions):
-        execute_sell("END", stock, last_price.get(stock, open_positions[stock]["entry"]), "FINAL_SELL")
+        # ===== STRATEGY EXECUTION =====
+        elif not self.stop_trading:
+            if self.rule is not None:
+                self.run_rule_minute(time_key, rows)
+            else:
+                self.run_strategy_minute(h, m, time_key, rows)
+
+        self.equity_curve.mark(self.minutes_seen, self.capital, self.open_positions, self.last_price)
+        self.minutes_seen += 1
+
+    def finish(self):
+        """Close whatever is still open at the last seen prices."""
+        if self.finished:
+            return
+        self.exit_all("END", "FINAL_SELL")
+        self.equity_curve.mark(self.minutes_seen, self.capital, self.open_positions, self.last_price)
+        self.finished = True
 
     # ================= RESULTS =================
-    df_trades = pd.DataFrame(
-        trade_log,
-        columns=["Time", "Stock", "Action", "Price", "Qty", "PnL", "Capital", "Used_Buckets"],
-    )
-
-    num_orders = len(df_trades)
-    brokerage = num_orders * BROKERAGE_PER_ORDER
-    amount_after_tax = capital - brokerage
-
-    roi_before = ((capital - START_CAPITAL) / START_CAPITAL) * 100
-    roi_after = ((amount_after_tax - START_CAPITAL) / START_CAPITAL) * 100
-
-    return {
-        "strategy_id": strategy_id,
-        "final_capital": capital,
-        "final_after_tax": amount_after_tax,
-        "roi_before": roi_before,
-        "roi_after": roi_after,
-        "orders": num_orders,
-        "brokerage": brokerage,
-        "max_drawdown": max_drawdown,
-    }
+    def results(self):
+        df_trades = self.trade_log.to_frame()
+        metrics = risk_metrics(self.equity_curve)
+        capital = self.capital
+
+        num_orders = len(df_trades)
+        brokerage = num_orders * BROKERAGE_PER_ORDER
+        amount_after_tax = capital - brokerage
+
+        roi_before = ((capital - START_CAPITAL) / START_CAPITAL) * 100
+        roi_after = ((amount_after_tax - START_CAPITAL) / START_CAPITAL) * 100
+
+        return {
+            "strategy_id": self.strategy_id,
+            "params": self.params,
+            "final_capital": capital,
+            "final_after_tax": amount_after_tax,
+            "roi_before": roi_before,
+            "roi_after": roi_after,
+            "orders": num_orders,
+            "brokerage": brokerage,
+            "max_drawdown": metrics["max_drawdown"],
+            "sharpe": metrics["sharpe"],
+            "sortino": metrics["sortino"],
+            "exposure": metrics["exposure"],
+            "time_in_market": metrics["time_in_market"],
+            "turnover": metrics["turnover"],
+            "equity_curve": self.equity_curve.equity[:self.minutes_seen + self.finished],
+            "strategy_calls": self.strategy_calls,
+            "strategy_calls_skipped": self.possible_calls - self.strategy_calls,
+            "universe": len(self.universe) if self.universe is not None else None,
+            "trade_log": df_trades,
+        }
+
+
+def run_strategy(strategy_id, data_dir: str = DATA_DIR, prev_day_file: str = PREV_DAY_FILE, params=None, screen=None):
+    """
+    Backtest one day of minute data (a directory of minute files or a .cbm
+    store, read through MarketDataQuery). `strategy_id` is either the id of
+    a Python strategy in StrategyTestBed or a SignalRule, whose entry
+    expression is evaluated for the whole minute cross-section at once.
+    `params` overrides the strategy's tunable constants (STRATEGY_PARAMS, or
+    a SignalRule's params);
+    `screen` replaces the strategy's UniverseScreen (STRATEGY_SCREENS).
+    """
+    query = MarketDataQuery(data_dir)
+    # One slot per minute, plus one after the final exit
+    engine = IntradayEngine(strategy_id, prev_day_file, params, minutes=len(query.time_keys) + 1, screen=screen)
+    replay(engine, query)
+    engine.finish()
+    return engine.results()
+
+
+def replay(engine: IntradayEngine, query: MarketDataQuery, start: int = 0, stop: Optional[int] = None):
+    """
+    Feed the stored minutes [start, stop) of `query` to `engine`. Replaying
+    a day in several pieces leaves the engine exactly as one replay would.
+    """
+    # Screened-out columns are dropped before the minute loop
+    columns = None
+    if engine.universe is not None:
+        columns = np.flatnonzero([engine.in_universe(name) for name in query.names])
+
+    for key, names, prices in query.minutes(columns=columns, start=start, stop=stop):
+        h, m, time_key = minute_time_key(key)
+        engine.on_minute(time_key, list(zip(names.tolist(), prices.tolist())), h, m, screened=True)
 
 
 # ================= RUN =================
-print("\n" + "="*80)
-print("TESTING STRATEGY 9 ONLY".center(80))
-print("="*80 + "\n")
-
-results = []
-for strategy_id in [9]:  # Only test strategy 9
-    print(f"\n[INFO] Testing Strategy {strategy_id}...")
-    result = run_strategy(strategy_id=strategy_id)
-    results.append(result)
-    
-    print(f"\n      ROI (before tax): {result['roi_before']:.2f}%")
-    print(f"      ROI (after tax):  {result['roi_after']:.2f}%")
-    print(f"      Final Capital:    ${result['final_capital']:.2f}")
-    print(f"      Max Drawdown:     {result['max_drawdown']:.2f}%")
-
-print("\n" + "="*80)
-print("SUMMARY - STRATEGIES RANKED BY ROI (AFTER TAX)".center(80))
-print("="*80 + "\n")
-
-# Sort by ROI after tax
-sorted_results = sorted(results, key=lambda x: x['roi_after'], reverse=True)
-
-print(f"{'Rank':<6} {'Strategy':<10} {'ROI %':<10} {'Capital':<15} {'Drawdown %':<12} {'Status':<15}")
-print("-" * 80)
-
-for rank, result in enumerate(sorted_results, 1):
-    strategy_id = result['strategy_id']
-    roi = result['roi_after']
-    capital = result['final_after_tax']
-    drawdown = result['max_drawdown']
-    status = "✓ GOOD" if roi > 0.5 else "✗ POOR" if roi < -0.5 else "→ NEUTRAL"
-    print(f"{rank:<6} {strategy_id:<10} {roi:>8.2f}%  ${capital:>13,.2f}  {drawdown:>10.2f}%  {status:<15}")
-
-print("\n" + "="*80)
-print("STRATEGIES PERFORMING BETTER THAN 0.5%".center(80))
-print("="*80 + "\n")
-
-good_strategies = [r for r in sorted_results if r['roi_after'] > 0.5]
-
-if good_strategies:
-    for result in good_strategies:
-        print(f"\n✓ Strategy {result['strategy_id']}: {result['roi_after']:.2f}% ROI")
-        print(f"  - Final Capital: ${result['final_after_tax']:.2f}")
-        print(f"  - Orders: {result['orders']}")
-        print(f"  - Brokerage: ${result['brokerage']:.2f}")
-        print(f"  - Max Drawdown: {result['max_drawdown']:.2f}%")
-else:
-    print("No strategies performed better than 0.5% ROI")
-    best = sorted_results[0]
-    print(f"\nBest performing strategy is #{best['strategy_id']} with {best['roi_after']:.2f}% ROI")
-
-print("\n" + "="*80)
\ No newline at end of file
+def main():
+    from RobustnessAnalysis import analyse, format_summary  # type: ignore
+    from ResultCache import cached_run_strategy  # type: ignore
+    from SweepResultsStore import SweepResultsStore  # type: ignore
+
+    # --incremental: only the minute files added since the last run are processed
+    incremental = "--incremental" in sys.argv
+    if incremental:
+        from IncrementalBacktest import run_incremental  # type: ignore
+
+    print("\n" + "="*80)
+    print("TESTING STRATEGY 9 ONLY".center(80))
+    print("="*80 + "\n")
+
+    # Whole-day runs are kept for SweepReport.py; incremental results are partial days
+    store = None if incremental else SweepResultsStore()
+    results = []
+    for strategy_id in [9]:  # Only test strategy 9
+        print(f"\n[INFO] Testing Strategy {strategy_id}...")
+        result = run_incremental(strategy_id) if incremental else cached_run_strategy(strategy_id)
+        results.append(result)
+        if store is not None:
+            store.append(result, DATA_DIR, PREV_DAY_FILE, sweep="framework")
+
+        print(f"\n      ROI (before tax): {result['roi_before']:.2f}%")
+        print(f"      ROI (after tax):  {result['roi_after']:.2f}%")
+        print(f"      Final Capital:    ${result['final_capital']:.2f}")
+        print(f"      Max Drawdown:     {result['max_drawdown']:.2f}% (mark-to-market)")
+        print(f"      Sharpe / Sortino: {result['sharpe']:.2f} / {result['sortino']:.2f}")
+        print(f"      Exposure:         {result['exposure']:.1f}% of equity, {result['time_in_market']:.1f}% of minutes")
+        print(f"      Turnover:         {result['turnover']:.2f}x capital")
+        print(f"      Strategy calls:   {result['strategy_calls']} ({result['strategy_calls_skipped']} skipped by schedule)")
+        if incremental:
+            print(f"      Incremental:      {result['minutes_processed']} new of {result['minutes_total']} minutes, "
+                  f"{len(result['open_positions'])} positions open")
+        if result.get("universe") is not None:
+            print(f"      Universe:         {result['universe']} stocks after the pre-market screen")
+        print(f"      Robustness:       {format_summary(analyse(result['trade_log']))}")
+
+    if store is not None:
+        store.flush()
+
+    print("\n" + "="*80)
+    print("SUMMARY - STRATEGIES RANKED BY ROI (AFTER TAX)".center(80))
+    print("="*80 + "\n")
+
+    # Sort by ROI after tax
+    sorted_results = sorted(results, key=lambda x: x['roi_after'], reverse=True)
+
+    print(f"{'Rank':<6} {'Strategy':<10} {'ROI %':<10} {'Capital':<15} {'Drawdown %':<12} {'Status':<15}")
+    print("-" * 80)
+
+    for rank, result in enumerate(sorted_results, 1):
+        strategy_id = result['strategy_id']
+        roi = result['roi_after']
+        capital = result['final_after_tax']
+        drawdown = result['max_drawdown']
+        status = "✓ GOOD" if roi > 0.5 else "✗ POOR" if roi < -0.5 else "→ NEUTRAL"
+        print(f"{rank:<6} {strategy_id:<10} {roi:>8.2f}%  ${capital:>13,.2f}  {drawdown:>10.2f}%  {status:<15}")
+
+    print("\n" + "="*80)
+    print("STRATEGIES PERFORMING BETTER THAN 0.5%".center(80))
+    print("="*80 + "\n")
+
+    good_strategies = [r for r in sorted_results if r['roi_after'] > 0.5]
+
+    if good_strategies:
+        for result in good_strategies:
+            print(f"\n✓ Strategy {result['strategy_id']}: {result['roi_after']:.2f}% ROI")
+            print(f"  - Final Capital: ${result['final_after_tax']:.2f}")
+            print(f"  - Orders: {result['orders']}")
+            print(f"  - Brokerage: ${result['brokerage']:.2f}")
+            print(f"  - Max Drawdown: {result['max_drawdown']:.2f}%")
+    else:
+        print("No strategies performed better than 0.5% ROI")
+        best = sorted_results[0]
+        print(f"\nBest performing strategy is #{best['strategy_id']} with {best['roi_after']:.2f}% ROI")
+
+    print("\n" + "="*80)
+
+
+if __name__ == "__main__":
+    main()
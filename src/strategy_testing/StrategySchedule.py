@@ -0,0 +1,49 @@
+from typing import Iterable, Tuple
+
+"""
+Declares when a strategy can produce a signal, so the engine only calls it
+for the minutes (and stocks) that matter.
+
+    Schedule(times=["09-15-00", "09-20-00"])            # exact minutes
+    Schedule(windows=[("09-30-00", "14-45-00")])        # inclusive ranges
+    Schedule(times=["09-20-00"], on_position=True)      # + every minute for held stocks
+    Schedule(times=["09-20-00"], independent_entries=True)
+
+Time keys are the engine's normalised "HH-MM-00" strings. Outside its
+schedule a strategy is not called at all, except for stocks with an open
+position when `on_position` is set. SL / target checks always run.
+
+`independent_entries=True` is the strategy's promise that its signals do
+not depend on holdings or capital, which lets ParallelEngine generate
+them in a separate pass called with position=None and can_trade=True:
+- `position` and `can_trade` may only suppress a BUY (no entry while
+  held / while trading is off); the engine applies the same checks
+  itself when allocating
+- state in market_state (captured opens, indicators) must be updated
+  the same way whatever their values
+- it never returns SELL
+Without the flag ParallelEngine falls back to run_strategy.
+"""
+
+
+class Schedule:
+    def __init__(
+        self,
+        times: Iterable[str] = (),
+        windows: Iterable[Tuple[str, str]] = (),
+        on_position: bool = False,
+        independent_entries: bool = False,
+    ):
+        self.times = frozenset(times)
+        self.windows = tuple(windows)
+        self.on_position = on_position
+        self.independent_entries = independent_entries
+
+    def __repr__(self):
+        return (f"Schedule(times={sorted(self.times)}, windows={list(self.windows)}, on_position={self.on_position}, "
+                f"independent_entries={self.independent_entries})")
+
+    def active_at(self, time_key: str) -> bool:
+        if time_key in self.times:
+            return True
+        return any(start <= time_key <= end for start, end in self.windows)
@@ -1,10 +1,31 @@
 """
 Strategy Test Bed - Strategy 9 Only
 Gap + Momentum at 9:20 Strategy
+
+Strategies that need indicators should keep streaming ones from
+Indicators.py in their per-stock state, e.g.
+    state_indicator(state, "ema", lambda: EMA(20)).update(price)
+so each tick costs O(1) instead of recomputing a window.
 """
 
+from SignalExpressions import SignalRule  # type: ignore
+from StrategySchedule import Schedule  # type: ignore
+from UniverseScreen import UniverseScreen  # type: ignore
+
+
+# Tunable constants per strategy; run_strategy(..., params=...) overrides them
+STRATEGY_PARAMS = {
+    9: {
+        "gap_mult": 1.005,        # prev_close -> assumed prev_high
+        "touch_mult": 0.998,      # within 0.2% of prev_high
+        "momentum_mult": 1.0015,  # 0.15% above today's open
+        "sl_mult": 0.9965,        # 0.35% below entry
+        "target_mult": 1.015,     # 1.5% above entry
+    },
+}
+
 
-def _strategy_9(time_key, state, position, price, prev_close, can_trade):
+def _strategy_9(time_key, state, position, price, prev_close, can_trade, params=STRATEGY_PARAMS[9]):
     """
     Strategy 9: Gap + Momentum at 9:20
     
@@ -17,14 +38,15 @@ def _strategy_9(time_key, state, position, price, prev_close, can_trade):
     - SL: 0.35% below entry
     - Target: 1.5% above entry
     """
-    if not can_trade:
-        return None, None, None
-
-    # Capture today's open at 9:15
+    # Capture today's open at 9:15 (whether or not trading is allowed, so the
+    # signal never depends on holdings: see STRATEGY_SCHEDULES)
     if time_key == "09-15-00":
         state["open"] = price
         return None, None, None
 
+    if not can_trade:
+        return None, None, None
+
     # Entry signal only at 9:20 and when no position
     if time_key != "09-20-00" or position is not None:
         return None, None, None
@@ -34,19 +56,51 @@ def _strategy_9(time_key, state, position, price, prev_close, can_trade):
         return None, None, None
 
     # Use prev_close as a proxy for prev_high (conservative approach)
-    prev_high = prev_close * 1.005  # Assume previous day had a small gap
+    prev_high = prev_close * params["gap_mult"]  # Assume previous day had a small gap
     
-    touches_high = price > prev_high * 0.998
-    momentum = price > today_open * 1.0015
+    touches_high = price > prev_high * params["touch_mult"]
+    momentum = price > today_open * params["momentum_mult"]
 
     if touches_high and momentum:
-        sl = price * 0.9965  # 0.35% below entry
-        target = price * 1.015  # 1.5% above entry
+        sl = price * params["sl_mult"]  # 0.35% below entry
+        target = price * params["target_mult"]  # 1.5% above entry
         return "BUY", sl, target
 
     return None, None, None
 
 
+# When each strategy can act; strategies without an entry are called every minute
+STRATEGY_SCHEDULES = {
+    # capture open, then entry; position / can_trade only suppress the BUY
+    9: Schedule(times=["09-15-00", "09-20-00"], independent_entries=True),
+}
+
+
+# Strategy 9 as a declarative rule: run_strategy(STRATEGY_9_RULE) evaluates
+# the 09:20 entry for every stock at once and trades identically to id 9.
+# It shares strategy 9's params, so params=... overrides apply to both
+STRATEGY_9_RULE = SignalRule(
+    name="9-rule",
+    capture={"open": "09-15-00"},
+    at="09-20-00",
+    entry="price > prev_close * gap_mult * touch_mult AND price > open * momentum_mult",
+    sl="price * sl_mult",
+    target="price * target_mult",
+    params=STRATEGY_PARAMS[9],
+)
+
+
+# Pre-market screens: stocks outside them are never fed to the strategy.
+# Strategy 9 can only enter above prev_close * gap_mult * touch_mult, so
+# stocks where one bucket cannot buy a single share at that price are out
+STRATEGY_SCREENS = {
+    9: UniverseScreen(entry_floor=("gap_mult", "touch_mult")),
+}
+# The rule has the same entry over the same param names, so the same screen
+# stays exact for it (named factors resolve against the rule's params)
+STRATEGY_SCREENS[STRATEGY_9_RULE.name] = STRATEGY_SCREENS[9]
+
+
 def strategy_logic(
     time_key,
     hour,
@@ -58,7 +112,8 @@ def strategy_logic(
     market_state,
     can_trade,
     prev_day=None,
-    strategy_id=9
+    strategy_id=9,
+    params=None
 ):
     """
     Strategy Logic Router
@@ -88,6 +143,8 @@ def strategy_logic(
         Previous day OHLCV data
     strategy_id : int
         Strategy ID (only 9 is active)
+    params : dict or None
+        Overrides for the strategy's STRATEGY_PARAMS entry
     
     Returns:
     --------
@@ -116,7 +173,8 @@ def strategy_logic(
     
     # Only Strategy 9 is active
     if strategy_id == 9:
-        return _strategy_9(time_key, state, position, price, prev_close, can_trade)
+        p = STRATEGY_PARAMS[9] if not params else {**STRATEGY_PARAMS[9], **params}
+        return _strategy_9(time_key, state, position, price, prev_close, can_trade, p)
     
     # Default: no signal
     return None, None, None
@@ -0,0 +1,176 @@
+import itertools
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from SweepResultsStore import SweepResultsStore, SWEEP_DIR, PARAM_PREFIX  # type: ignore
+from RobustnessAnalysis import analyse, format_summary  # type: ignore
+
+"""
+Comparative report over a SweepResultsStore.
+
+Runs of the same configuration (same strategy and params JSON) on
+different days are aggregated into one config row: mean / worst ROI, mean
+drawdown, days and orders. The report has:
+- the top configurations by a metric, after an optional filter
+- per-parameter tables: the metric's distribution for each value of a
+  parameter, over every config that uses it
+- a heatmap (PNG) for every pair of parameters: the configs' mean metric
+  per cell, averaged over the other parameters
+- for the top few configs only, their trade logs are loaded and run
+  through RobustnessAnalysis
+
+Only the needed columns are read (memory-mapped), and trade logs are read
+only for the top configs. Hundreds of thousands of runs report in seconds.
+
+Usage:
+    python SweepReport.py [store_dir] [out_dir] [--metric roi_after] [--where "orders > 0"]
+                          [--top 20] [--sweep NAME]
+"""
+
+# ================= CONFIG =================
+METRIC = "roi_after"
+TOP = 20
+ROBUSTNESS_TOP = 3                  # configs whose trade logs are resampled
+REPORT_COLUMNS = ("roi_after", "max_drawdown", "sharpe", "orders")
+
+
+# ================= TABLES =================
+def load_runs(store: SweepResultsStore, metric: str = METRIC, where: Optional[str] = None,
+              sweep: Optional[str] = None) -> pd.DataFrame:
+    params = store.params()
+    columns = list(dict.fromkeys(["strategy", "params", "day", "sweep", metric, *REPORT_COLUMNS, *params]))
+    available = set(store.columns())
+    df = store.runs([c for c in columns if c in available], where=where)
+    if sweep is not None:
+        df = df[df["sweep"] == sweep]
+    return df
+
+
+def config_table(runs: pd.DataFrame, metric: str = METRIC) -> pd.DataFrame:
+    """One row per configuration (strategy, params JSON), aggregated over its runs."""
+    params = [c for c in runs.columns if c.startswith(PARAM_PREFIX)]
+    grouped = runs.groupby(["strategy", "params"], sort=False)
+    table = grouped[params].first()
+    table[f"mean_{metric}"] = grouped[metric].mean()
+    table[f"worst_{metric}"] = grouped[metric].min()
+    if "max_drawdown" in runs:
+        table["mean_drawdown"] = grouped["max_drawdown"].mean()
+    if "orders" in runs:
+        table["orders"] = grouped["orders"].sum()
+    table["runs"] = grouped.size()
+    return table
+
+
+def rank(configs: pd.DataFrame, metric: str = METRIC, top: int = TOP) -> pd.DataFrame:
+    return configs.nlargest(top, f"mean_{metric}")
+
+
+def by_parameter(configs: pd.DataFrame, param: str, metric: str = METRIC) -> pd.DataFrame:
+    """Distribution of the configs' mean metric for each value of `param`."""
+    values = configs[f"mean_{metric}"]
+    return values.groupby(configs[param]).agg(["count", "mean", "median", "max", "min"])
+
+
+def heatmap_table(configs: pd.DataFrame, x: str, y: str, metric: str = METRIC, agg: str = "mean") -> pd.DataFrame:
+    return configs.pivot_table(index=y, columns=x, values=f"mean_{metric}", aggfunc=agg)
+
+
+def plot_heatmap(table: pd.DataFrame, x: str, y: str, metric: str, path: str) -> str:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(1.2 * len(table.columns) + 3, 0.6 * len(table.index) + 2))
+    im = ax.imshow(table.to_numpy(dtype=np.float64), cmap="RdYlGn", aspect="auto", origin="lower")
+    ax.set_xticks(range(len(table.columns)))
+    ax.set_xticklabels([f"{v:g}" if isinstance(v, float) else str(v) for v in table.columns], rotation=45)
+    ax.set_yticks(range(len(table.index)))
+    ax.set_yticklabels([f"{v:g}" if isinstance(v, float) else str(v) for v in table.index])
+    ax.set_xlabel(x[len(PARAM_PREFIX):])
+    ax.set_ylabel(y[len(PARAM_PREFIX):])
+    if table.size <= 400:
+        for (i, j), value in np.ndenumerate(table.to_numpy(dtype=np.float64)):
+            if not np.isnan(value):
+                ax.text(j, i, f"{value:.2f}", ha="center", va="center", fontsize=7)
+    fig.colorbar(im, ax=ax, label=f"mean {metric}")
+    fig.tight_layout()
+    fig.savefig(path, dpi=100)
+    plt.close(fig)
+    return path
+
+
+# ================= REPORT =================
+def build_report(store_dir: str = SWEEP_DIR, out_dir: str = "sweep_report", metric: str = METRIC,
+                 where: Optional[str] = None, top: int = TOP, sweep: Optional[str] = None) -> Dict:
+    started = time.perf_counter()
+    store = SweepResultsStore(store_dir)
+    runs = load_runs(store, metric, where, sweep)
+    if runs.empty:
+        raise SystemExit(f"No runs in {store_dir}" + (f" matching {where!r}" if where else ""))
+    configs = config_table(runs, metric)
+    params = [c for c in configs.columns if c.startswith(PARAM_PREFIX) and configs[c].nunique() > 1]
+    os.makedirs(out_dir, exist_ok=True)
+
+    lines: List[str] = [f"{len(runs)} runs, {len(configs)} configurations, metric {metric}"
+                        + (f", where {where}" if where else "") + (f", sweep {sweep}" if sweep else ""), ""]
+    best = rank(configs, metric, top)
+    shown = best.reset_index(level="strategy")
+    lines += [f"TOP {len(best)} CONFIGURATIONS", shown.to_string(index=False), ""]
+
+    for param in params:
+        lines += [f"BY {param[len(PARAM_PREFIX):]}", by_parameter(configs, param, metric).to_string(), ""]
+
+    heatmaps = []
+    for x, y in itertools.combinations(params, 2):
+        table = heatmap_table(configs, x, y, metric)
+        name = f"heatmap_{x[len(PARAM_PREFIX):]}_{y[len(PARAM_PREFIX):]}.png"
+        heatmaps.append(plot_heatmap(table, x, y, metric, os.path.join(out_dir, name)))
+
+    # Trade-level detail only for the leaders
+    leaders = best.index[:ROBUSTNESS_TOP]
+    config_keys = pd.MultiIndex.from_frame(runs[["strategy", "params"]])
+    lead_ids = runs.loc[config_keys.isin(leaders), ["run_id", "strategy", "params"]]
+    logs = store.trade_logs(lead_ids["run_id"])
+    for strategy, params_json in leaders:
+        mine = (lead_ids["strategy"] == strategy) & (lead_ids["params"] == params_json)
+        trades = [logs[int(r)] for r in lead_ids.loc[mine, "run_id"] if int(r) in logs and len(logs[int(r)])]
+        if trades:
+            summary = analyse(pd.concat(trades, ignore_index=True))
+            lines += [f"ROBUSTNESS {strategy} {params_json}", f"   {format_summary(summary)}"]
+
+    seconds = time.perf_counter() - started
+    lines += ["", f"Report built in {seconds:.2f}s"]
+    report_path = os.path.join(out_dir, "report.txt")
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    shown.to_csv(os.path.join(out_dir, "top_configs.csv"), index=False)
+    return {"report": report_path, "heatmaps": heatmaps, "runs": len(runs), "configs": len(configs),
+            "seconds": seconds, "text": "\n".join(lines)}
+
+
+# ================= MAIN =================
+def main():
+    args = sys.argv[1:]
+    options = {"--metric": METRIC, "--where": None, "--top": TOP, "--sweep": None}
+    for flag in list(options):
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = args[i + 1]
+            del args[i:i + 2]
+    store_dir = args[0] if args else SWEEP_DIR
+    out_dir = args[1] if len(args) > 1 else "sweep_report"
+
+    report = build_report(store_dir, out_dir, options["--metric"], options["--where"], int(options["--top"]),
+                          options["--sweep"])
+    pd.set_option("display.width", 200)
+    print(report["text"])
+    print(f"✅ {report['report']} and {len(report['heatmaps'])} heatmaps written to {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
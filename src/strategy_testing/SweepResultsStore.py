@@ -0,0 +1,280 @@
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from EquityCurve import ACTIONS, TRADE_LOG_COLUMNS  # type: ignore
+from SignalExpressions import SignalRule  # type: ignore
+
+"""
+Append-only columnar store of backtest runs, for sweeps of many thousands
+of run_strategy calls.
+
+Every run appends one row: the scalar results (ROI, drawdown, Sharpe,
+orders, ...), the params as one column each (param_<name>), the full
+params as JSON, strategy / day / sweep labels, and its trade log. Rows are
+buffered and written as a segment of one .npy file per column:
+
+    sweep_results/seg-<time>-<pid>-<n>/
+        meta.json                 rows, columns, trade stock names
+        run.<column>.npy          one value per run
+        trade.<field>.npy         trade logs of all runs back to back;
+                                  run.trade_start / run.trade_count index them
+
+A segment is written to a temporary directory and renamed into place, so
+readers never see half a segment and several sweep processes can append
+at once. Segments are never modified; compact() merges small ones.
+
+Reads are column-wise over memory-mapped files: runs(["roi_after",
+"param_sl_mult"]) touches only those two files per segment, and
+trade_logs(run_ids) slices out just the requested runs' trades.
+SweepReport.py ranks, filters, groups and draws heatmaps on top of it.
+
+Usage:
+    with SweepResultsStore() as store:
+        store.append(result, data_dir, prev_day_file, params, sweep="grid-01")
+    df = SweepResultsStore().runs(["roi_after", "param_touch_mult"], where="orders > 0")
+
+    python SweepResultsStore.py [store_dir] info | compact
+"""
+
+# ================= CONFIG =================
+SWEEP_DIR = "sweep_results"
+FLUSH_ROWS = 5000                   # buffered runs per segment
+PARAM_PREFIX = "param_"
+SKIP_KEYS = ("trade_log", "equity_curve", "params", "strategy_id", "phase_seconds", "open_positions")
+TEXT_COLUMNS = ("strategy", "day", "data_dir", "prev_day_file", "sweep", "key", "params")
+TRADE_FIELDS = ("time", "stock", "action", "price", "qty", "pnl", "capital", "used_buckets")
+
+
+def new_run_id() -> int:
+    return int.from_bytes(os.urandom(8), "little") >> 1
+
+
+def strategy_label(strategy_id) -> str:
+    return strategy_id.name if isinstance(strategy_id, SignalRule) else str(strategy_id)
+
+
+def text_array(values: List[str]) -> np.ndarray:
+    return np.array(values, dtype=f"U{max([1] + [len(v) for v in values])}")
+
+
+# ================= STORE =================
+class SweepResultsStore:
+    def __init__(self, path: str = SWEEP_DIR, flush_rows: int = FLUSH_ROWS):
+        self.path = path
+        self.flush_rows = flush_rows
+        self.pending: List[Dict] = []
+        self.written = 0
+        os.makedirs(path, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+    # ================= WRITE =================
+    def append(self, result: Dict, data_dir: str = "", prev_day_file: str = "", params: Optional[Dict] = None,
+               sweep: str = "", key: str = "", strategy_id=None) -> int:
+        """Buffer one run_strategy result; returns its run_id."""
+        params = params if params is not None else (result.get("params") or {})
+        row = {
+            "run_id": new_run_id(),
+            "created": time.time(),
+            "strategy": strategy_label(strategy_id if strategy_id is not None else result.get("strategy_id")),
+            "day": os.path.basename(os.path.normpath(data_dir)) if data_dir else "",
+            "data_dir": data_dir,
+            "prev_day_file": prev_day_file,
+            "sweep": sweep,
+            "key": key,
+            "params": json.dumps(params, sort_keys=True, default=str),
+        }
+        for name, value in result.items():
+            if name not in SKIP_KEYS and (value is None or isinstance(value, (int, float, np.number))):
+                row[name] = np.nan if value is None else float(value)
+        for name, value in params.items():
+            row[PARAM_PREFIX + name] = value
+        row["trades"] = result.get("trade_log")
+        self.pending.append(row)
+        if len(self.pending) >= self.flush_rows:
+            self.flush()
+        return row["run_id"]
+
+    def flush(self) -> Optional[str]:
+        """Write the buffered runs as one segment; returns its directory."""
+        if not self.pending:
+            return None
+        rows, self.pending = self.pending, []
+
+        columns: Dict[str, np.ndarray] = {"run_id": np.array([r["run_id"] for r in rows], dtype=np.int64)}
+        names = sorted({k for r in rows for k in r} - {"run_id", "trades"})
+        for name in names:
+            values = [r.get(name) for r in rows]
+            if name in TEXT_COLUMNS:
+                columns[name] = text_array(["" if v is None else v for v in values])
+                continue
+            try:
+                columns[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            except (TypeError, ValueError):
+                columns[name] = text_array(["" if v is None else str(v) for v in values])
+
+        # Trade logs back to back, stocks as codes into a per-segment table
+        stocks: Dict[str, int] = {}
+        action_ids = {a: i for i, a in enumerate(ACTIONS)}
+        counts = np.zeros(len(rows), dtype=np.int64)
+        parts = {field: [] for field in TRADE_FIELDS}
+        for i, r in enumerate(rows):
+            log = r["trades"]
+            if log is None or not len(log):
+                continue
+            counts[i] = len(log)
+            parts["time"].append(log["Time"].to_numpy(dtype="U8"))
+            parts["stock"].append(np.array([stocks.setdefault(s, len(stocks)) for s in log["Stock"]], dtype=np.int32))
+            parts["action"].append(np.array([action_ids[a] for a in log["Action"]], dtype=np.int8))
+            parts["price"].append(log["Price"].to_numpy(dtype=np.float64))
+            parts["qty"].append(log["Qty"].to_numpy(dtype=np.int64))
+            parts["pnl"].append(log["PnL"].to_numpy(dtype=np.float64))
+            parts["capital"].append(log["Capital"].to_numpy(dtype=np.float64))
+            parts["used_buckets"].append(log["Used_Buckets"].to_numpy(dtype=np.int16))
+        dtypes = {"time": "U8", "stock": np.int32, "action": np.int8, "price": np.float64, "qty": np.int64,
+                  "pnl": np.float64, "capital": np.float64, "used_buckets": np.int16}
+        columns["trade_count"] = counts
+        columns["trade_start"] = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+
+        name = f"seg-{time.time_ns()}-{os.getpid()}-{self.written}"
+        tmp = os.path.join(self.path, f".{name}.tmp")
+        os.makedirs(tmp)
+        for column, values in columns.items():
+            np.save(os.path.join(tmp, f"run.{column}.npy"), values)
+        for field in TRADE_FIELDS:
+            values = np.concatenate(parts[field]) if parts[field] else np.empty(0, dtype=dtypes[field])
+            np.save(os.path.join(tmp, f"trade.{field}.npy"), values)
+        meta = {"rows": len(rows), "columns": {c: v.dtype.str for c, v in columns.items()},
+                "stocks": list(stocks), "actions": list(ACTIONS)}
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        final = os.path.join(self.path, name)
+        os.rename(tmp, final)
+        self.written += 1
+        return final
+
+    # ================= READ =================
+    def segments(self) -> List[str]:
+        return sorted(os.path.join(self.path, d) for d in os.listdir(self.path)
+                      if d.startswith("seg-") and os.path.exists(os.path.join(self.path, d, "meta.json")))
+
+    def _meta(self, segment: str) -> Dict:
+        with open(os.path.join(segment, "meta.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def columns(self) -> List[str]:
+        """Every run column in any segment."""
+        seen: Dict[str, None] = {}
+        for segment in self.segments():
+            seen.update(dict.fromkeys(self._meta(segment)["columns"]))
+        return list(seen)
+
+    def params(self) -> List[str]:
+        return [c for c in self.columns() if c.startswith(PARAM_PREFIX)]
+
+    def column(self, name: str, segment: str, rows: int) -> np.ndarray:
+        path = os.path.join(segment, f"run.{name}.npy")
+        if os.path.exists(path):
+            return np.load(path, mmap_mode="r")
+        return np.full(rows, "" if name in TEXT_COLUMNS else np.nan)
+
+    def runs(self, columns: Optional[Iterable[str]] = None, where: Optional[str] = None) -> pd.DataFrame:
+        """
+        Run rows with only the requested columns loaded (all when None);
+        `where` is a DataFrame.query expression, and the columns it names
+        are loaded too.
+        """
+        available = self.columns()
+        wanted = list(available) if columns is None else ["run_id"] + [c for c in columns if c != "run_id"]
+        if where:
+            wanted += [c for c in available if c not in wanted and re.search(rf"\b{re.escape(c)}\b", where)]
+
+        parts = {c: [] for c in wanted}
+        for segment in self.segments():
+            rows = self._meta(segment)["rows"]
+            for c in wanted:
+                parts[c].append(self.column(c, segment, rows))
+        df = pd.DataFrame({c: np.concatenate(v) if v else np.empty(0) for c, v in parts.items()}, columns=wanted)
+        return df.query(where) if where else df
+
+    def trade_logs(self, run_ids: Iterable[int]) -> Dict[int, pd.DataFrame]:
+        """{run_id: trade log} for the given runs only."""
+        wanted = set(int(r) for r in run_ids)
+        logs: Dict[int, pd.DataFrame] = {}
+        for segment in self.segments():
+            ids = np.load(os.path.join(segment, "run.run_id.npy"), mmap_mode="r")
+            hits = np.flatnonzero(np.isin(ids, list(wanted)))
+            if not len(hits):
+                continue
+            meta = self._meta(segment)
+            stocks = np.asarray(meta["stocks"] or [""], dtype=object)
+            actions = np.asarray(meta["actions"], dtype=object)
+            start = np.load(os.path.join(segment, "run.trade_start.npy"), mmap_mode="r")
+            count = np.load(os.path.join(segment, "run.trade_count.npy"), mmap_mode="r")
+            fields = {f: np.load(os.path.join(segment, f"trade.{f}.npy"), mmap_mode="r") for f in TRADE_FIELDS}
+            for i in hits:
+                s = slice(int(start[i]), int(start[i] + count[i]))
+                logs[int(ids[i])] = pd.DataFrame({
+                    "Time": fields["time"][s].astype(object),
+                    "Stock": stocks[fields["stock"][s]],
+                    "Action": actions[fields["action"][s]],
+                    "Price": np.array(fields["price"][s]),
+                    "Qty": fields["qty"][s].astype(np.int64),
+                    "PnL": np.array(fields["pnl"][s]),
+                    "Capital": np.array(fields["capital"][s]),
+                    "Used_Buckets": fields["used_buckets"][s].astype(np.int64),
+                }, columns=TRADE_LOG_COLUMNS)
+        return logs
+
+    # ================= MAINTENANCE =================
+    def compact(self) -> int:
+        """Merge every segment into one; returns the number of segments merged."""
+        self.flush()
+        segments = self.segments()
+        if len(segments) < 2:
+            return 0
+        merged = SweepResultsStore(self.path, flush_rows=sys.maxsize)
+        frame = self.runs()
+        logs = self.trade_logs(frame["run_id"])
+        for row in frame.to_dict("records"):
+            row["trades"] = logs.get(int(row["run_id"]))
+            merged.pending.append({k: v for k, v in row.items() if k not in ("trade_start", "trade_count")})
+        merged.flush()
+        for segment in segments:
+            shutil.rmtree(segment)
+        return len(segments)
+
+    def info(self) -> Dict:
+        segments = self.segments()
+        rows = sum(self._meta(s)["rows"] for s in segments)
+        size = sum(os.path.getsize(os.path.join(s, f)) for s in segments for f in os.listdir(s))
+        return {"segments": len(segments), "runs": rows, "bytes": size, "params": self.params()}
+
+
+# ================= MAIN =================
+def main():
+    args = sys.argv[1:]
+    command = args.pop() if args and args[-1] in ("info", "compact") else "info"
+    store = SweepResultsStore(args[0] if args else SWEEP_DIR)
+    if command == "compact":
+        print(f"✅ Merged {store.compact()} segments")
+    info = store.info()
+    print(f"{info['runs']} runs in {info['segments']} segments, {info['bytes'] / 1e6:.1f} MB")
+    if info["params"]:
+        print(f"Params: {', '.join(p[len(PARAM_PREFIX):] for p in info['params'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+from typing import Dict, Iterable, Optional, Sequence, Union
+
+import numpy as np
+
+"""
+Pre-market screen of the instruments a strategy can possibly trade.
+
+Before the session the engine applies the strategy's screen to the
+prev-day OHLCV table as a handful of vectorised comparisons; only the
+stocks that pass are fed to the strategy minute by minute.
+
+    UniverseScreen(entry_floor=("gap_mult", "touch_mult"))    # exact: can never fill otherwise
+    UniverseScreen(min_price=50, min_turnover=5e7)            # opt-in liquidity filters
+
+- every screen drops stocks without prev-day data
+- entry_floor: the lowest entry price as a multiple of prev_close, as a
+  number or a sequence of numbers / strategy param names multiplied in
+  order. A stock whose floor, after buy slippage, is above the capital of
+  one bucket would be bought with qty 0, so it is dropped
+- min_price / max_price on prev_close, min_volume on prev-day volume and
+  min_turnover on prev_close * volume change results and are off by
+  default
+
+A screen built only from prev-day availability and entry_floor removes
+stocks that could not have traded anyway, so results stay identical.
+Today's opening gap is not known before 09:15 and stays in the strategy.
+"""
+
+Factor = Union[float, str]
+
+
+class UniverseScreen:
+    def __init__(
+        self,
+        entry_floor: Union[Factor, Sequence[Factor], None] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        min_volume: Optional[float] = None,
+        min_turnover: Optional[float] = None,
+    ):
+        if entry_floor is not None and isinstance(entry_floor, (int, float, str)):
+            entry_floor = (entry_floor,)
+        self.entry_floor = tuple(entry_floor) if entry_floor is not None else None
+        self.min_price = min_price
+        self.max_price = max_price
+        self.min_volume = min_volume
+        self.min_turnover = min_turnover
+
+    def __repr__(self):
+        return (f"UniverseScreen(entry_floor={self.entry_floor}, min_price={self.min_price}, "
+                f"max_price={self.max_price}, min_volume={self.min_volume}, min_turnover={self.min_turnover})")
+
+    @property
+    def exact(self) -> bool:
+        """True when the screen cannot change results."""
+        return all(v is None for v in (self.min_price, self.max_price, self.min_volume, self.min_turnover))
+
+    def mask(
+        self,
+        prev: Dict[str, np.ndarray],
+        params: Optional[Dict] = None,
+        bucket_capital: float = float("inf"),
+        slippage_pct: float = 0.0,
+    ) -> np.ndarray:
+        """
+        Boolean mask over the prev-day arrays {"close": ..., "volume": ...}.
+        `params` resolves named entry_floor factors.
+        """
+        close = prev["close"]
+        volume = prev["volume"]
+        keep = ~np.isnan(close)
+
+        if self.entry_floor is not None:
+            floor = close
+            for factor in self.entry_floor:
+                floor = floor * (params[factor] if isinstance(factor, str) else factor)
+            # Tolerance so float rounding never drops a stock that could fill
+            keep &= floor * (1 + slippage_pct) <= bucket_capital * (1 + 1e-9)
+
+        if self.min_price is not None:
+            keep &= close >= self.min_price
+        if self.max_price is not None:
+            keep &= close <= self.max_price
+        if self.min_volume is not None:
+            keep &= volume >= self.min_volume
+        if self.min_turnover is not None:
+            keep &= close * volume >= self.min_turnover
+        return keep
+
+    def select(self, names: Iterable[str], prev: Dict[str, np.ndarray], params=None,
+               bucket_capital: float = float("inf"), slippage_pct: float = 0.0) -> frozenset:
+        names = list(names)
+        keep = self.mask(prev, params, bucket_capital, slippage_pct)
+        return frozenset(names[i] for i in np.flatnonzero(keep))
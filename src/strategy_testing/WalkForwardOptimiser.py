@@ -0,0 +1,306 @@
+import hashlib
+import itertools
+import json
+import os
+import pickle
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from StrategyTestBed import STRATEGY_PARAMS  # type: ignore
+from SweepResultsStore import SweepResultsStore, SWEEP_DIR  # type: ignore
+
+"""
+Walk-forward parameter search on top of run_strategy.
+
+- Days are (data_dir, prev_day_file) pairs, discovered from DATA_ROOT/<date>/
+  minute folders and PREV_DAY_DIR/ohlcv_<date>.txt files
+- Each fold searches the parameter grid on TRAIN_DAYS days and scores the
+  winner on the following TEST_DAYS days (in-sample vs out-of-sample ROI)
+- Search is either the full grid or successive halving: every configuration
+  is first scored on the opening MINUTE_RUNGS minutes of the first few
+  training days, then on those whole days, and each rung the best 1/ETA
+  survive and get ETA times more budget, until the survivors have seen the
+  whole window. Engines are paused after an opening rung and survivors
+  continue from there instead of replaying the day from 09:15
+- Per-day results are memoised by (strategy, parameter hash, day), so folds
+  with overlapping training windows never re-run a day, and missing runs
+  are executed in parallel across cores; runs (opening-minute ones too)
+  are also stored in the on-disk ResultCache, so repeating a study only
+  re-runs what changed
+- Every executed whole-day run (results, params, trade log) is appended to the
+  SweepResultsStore under RESULTS_STORE, labelled with the study's sweep
+  name, for SweepReport.py
+
+Usage:
+    python WalkForwardOptimiser.py [data_root] [prev_day_dir]
+"""
+
+# ================= CONFIG =================
+STRATEGY_ID = 9
+DATA_ROOT = "Pure_Data"             # Pure_Data/YYYY-MM-DD/HH-MM-SS.txt
+PREV_DAY_DIR = "Resources"          # Resources/ohlcv_YYYY-MM-DD.txt
+
+PARAM_GRID = {
+    "touch_mult": [0.996, 0.998, 1.0],
+    "momentum_mult": [1.001, 1.0015, 1.0025],
+    "sl_mult": [0.995, 0.9965, 0.998],
+    "target_mult": [1.01, 1.015, 1.02],
+}
+
+TRAIN_DAYS = 5
+TEST_DAYS = 1
+SEARCH = "halving"                  # "halving" or "grid"
+ETA = 3                             # successive-halving reduction factor
+MINUTE_RUNGS = (45, 125)            # opening minutes scored before the whole-day rungs
+SCORE = "roi_after"
+WORKERS = os.cpu_count()
+RESULTS_STORE = SWEEP_DIR           # None = keep runs in memory only
+
+DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+
+# ================= DAYS =================
+def discover_days(data_root: str = DATA_ROOT, prev_day_dir: str = PREV_DAY_DIR) -> List[Tuple[str, str, str]]:
+    """[(date, data_dir, prev_day_file)] for every day that has an earlier prev-day file."""
+    prev_files = {}
+    for name in os.listdir(prev_day_dir):
+        m = DATE_RE.search(name)
+        if m and name.startswith("ohlcv_"):
+            prev_files[m.group(1)] = os.path.join(prev_day_dir, name)
+    prev_dates = sorted(prev_files)
+
+    days = []
+    for name in sorted(os.listdir(data_root)):
+        m = DATE_RE.fullmatch(name)
+        path = os.path.join(data_root, name)
+        if not m or not os.path.isdir(path):
+            continue
+        earlier = [d for d in prev_dates if d < name]
+        if earlier:
+            days.append((name, path, prev_files[earlier[-1]]))
+    return days
+
+
+# ================= PARAMETERS =================
+def expand_grid(grid: Dict[str, list]) -> List[Dict]:
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def param_hash(params: Dict) -> str:
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def replay_day(strategy_id, params, data_dir: str, prev_day_file: str, minutes: Optional[int] = None,
+               paused: Optional[Tuple[int, bytes]] = None):
+    """
+    Results of the first `minutes` minutes of a day (None = the whole day,
+    as run_strategy), open positions closed at their last prices. `paused`
+    is a (minutes done, pickled engine) from an earlier, shorter replay to
+    continue from. Returns (results, paused engine or None when the day is done).
+    """
+    from StrategyFramework import IntradayEngine, MarketDataQuery, replay  # type: ignore
+    query = MarketDataQuery(data_dir)
+    if paused is not None and (minutes is None or paused[0] <= minutes):
+        done, engine = paused[0], pickle.loads(paused[1])
+    else:
+        done, engine = 0, IntradayEngine(strategy_id, prev_day_file, params, minutes=len(query.time_keys) + 1)
+    replay(engine, query, start=done, stop=minutes)
+
+    snapshot = None
+    if minutes is not None and minutes < len(query.time_keys):
+        snapshot = (minutes, pickle.dumps(engine, protocol=pickle.HIGHEST_PROTOCOL))
+    engine.finish()
+    return engine.results(), snapshot
+
+
+def _run_day(job):
+    strategy_id, params, data_dir, prev_day_file, minutes, paused = job
+    from ResultCache import cache_key, default_cache, strategy_tag  # type: ignore
+    cache = default_cache()
+    tag, key = strategy_tag(strategy_id), cache_key(strategy_id, data_dir, prev_day_file, params)
+    if minutes is not None:
+        key = f"{key}_first{minutes}"
+    result, snapshot = cache.get(tag, key), None
+    if result is None:
+        result, snapshot = replay_day(strategy_id, params, data_dir, prev_day_file, minutes, paused)
+        cache.put(tag, key, result)
+    slim = {k: result[k] for k in ("roi_before", "roi_after", "max_drawdown", "orders")}
+    return slim, {k: v for k, v in result.items() if k != "equity_curve"}, snapshot
+
+
+class DayResultMemo:
+    """
+    (strategy, param hash, day, minutes) -> slim result dict, minutes None
+    for whole days; runs what is missing in parallel. Engines paused by an
+    opening-minute run are kept until the config's next run on that day.
+    """
+
+    def __init__(self, strategy_id, workers: Optional[int] = WORKERS, store: Optional[SweepResultsStore] = None,
+                 sweep: str = ""):
+        self.strategy_id = strategy_id
+        self.workers = workers
+        self.store = store
+        self.sweep = sweep
+        self.results: Dict[Tuple, Dict] = {}
+        self.paused: Dict[Tuple, Tuple[int, bytes]] = {}
+        self.runs = 0
+        self.opening_runs = 0
+
+    def key(self, params, day, minutes: Optional[int] = None):
+        return (self.strategy_id, param_hash(params), day[0], minutes)
+
+    def ensure(self, configs: List[Dict], days: List[Tuple], minutes: Optional[int] = None) -> None:
+        missing = {}
+        for params in configs:
+            for day in days:
+                k = self.key(params, day, minutes)
+                if k not in self.results and k not in missing:
+                    missing[k] = (self.strategy_id, params, day[1], day[2], minutes, self.paused.get(k[:3]))
+        if not missing:
+            return
+        keys, jobs = list(missing), list(missing.values())
+        if self.workers and self.workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                outputs = list(pool.map(_run_day, jobs))
+        else:
+            outputs = [_run_day(job) for job in jobs]
+        for k, (slim, _, snapshot) in zip(keys, outputs):
+            self.results[k] = slim
+            if snapshot is not None:
+                self.paused[k[:3]] = snapshot
+            elif minutes is None:
+                self.paused.pop(k[:3], None)
+
+        if minutes is not None:
+            self.opening_runs += len(jobs)
+            return
+        if self.store is not None:
+            for (strategy_id, params, data_dir, prev_day_file, _, _), (_, result, _) in zip(jobs, outputs):
+                self.store.append(result, data_dir, prev_day_file, params, sweep=self.sweep, strategy_id=strategy_id)
+        self.runs += len(jobs)
+
+    def release(self, configs: List[Dict], days: List[Tuple]) -> None:
+        """Drop the paused engines of configs that will not run again."""
+        for params in configs:
+            for day in days:
+                self.paused.pop(self.key(params, day)[:3], None)
+
+    def score(self, params: Dict, days: List[Tuple], metric: str = SCORE, minutes: Optional[int] = None) -> float:
+        self.ensure([params], days, minutes)
+        return sum(self.results[self.key(params, d, minutes)][metric] for d in days) / len(days)
+
+
+# ================= SEARCH =================
+def grid_search(memo: DayResultMemo, configs: List[Dict], days: List[Tuple]):
+    memo.ensure(configs, days)
+    return sorted(configs, key=lambda p: memo.score(p, days), reverse=True)
+
+
+def successive_halving(memo: DayResultMemo, configs: List[Dict], days: List[Tuple], eta: int = ETA,
+                       minute_rungs=MINUTE_RUNGS):
+    """
+    Survivors are re-scored on ETA x more budget each rung: first the opening
+    `minute_rungs` minutes of the first rung's days, then whole days, the
+    last rung using all days.
+    """
+    opening = [m for i, m in enumerate(minute_rungs) if len(configs) // eta ** i > eta]
+    remaining = max(1, len(configs) // eta ** len(opening))
+    rungs = 0
+    while remaining > eta ** (rungs + 1) and len(days) // eta ** (rungs + 1) >= 1:
+        rungs += 1
+
+    survivors = list(configs)
+    first_days = days[: max(1, len(days) // eta ** rungs)]
+    for minutes in opening:
+        memo.ensure(survivors, first_days, minutes)
+        survivors.sort(key=lambda p: memo.score(p, first_days, minutes=minutes), reverse=True)
+        keep = max(1, len(survivors) // eta)
+        memo.release(survivors[keep:], first_days)
+        survivors = survivors[:keep]
+
+    for r in range(rungs, -1, -1):
+        budget = days[: max(1, len(days) // eta ** r)]
+        memo.ensure(survivors, budget)
+        survivors.sort(key=lambda p: memo.score(p, budget), reverse=True)
+        if r:
+            survivors = survivors[: max(1, len(survivors) // eta)]
+    return survivors
+
+
+def walk_forward(
+    days: List[Tuple],
+    grid: Dict[str, list] = PARAM_GRID,
+    strategy_id=STRATEGY_ID,
+    train_days: int = TRAIN_DAYS,
+    test_days: int = TEST_DAYS,
+    search: str = SEARCH,
+    workers: Optional[int] = WORKERS,
+    store_dir: Optional[str] = RESULTS_STORE,
+) -> pd.DataFrame:
+    base = STRATEGY_PARAMS.get(strategy_id, {})
+    configs = [{**base, **p} for p in expand_grid(grid)]
+    store = SweepResultsStore(store_dir) if store_dir else None
+    sweep = f"walk-forward-{search}-{time.strftime('%Y%m%d-%H%M%S')}"
+    memo = DayResultMemo(strategy_id, workers, store, sweep)
+    searcher = successive_halving if search == "halving" else grid_search
+
+    folds = []
+    for start in range(train_days, len(days) - test_days + 1, test_days):
+        train, test = days[start - train_days:start], days[start:start + test_days]
+        best = searcher(memo, configs, train)[0]
+        memo.ensure([best, base] if base else [best], test)
+        baseline_oos = memo.score(base, test) if base else float("nan")
+        folds.append({
+            "train": f"{train[0][0]}..{train[-1][0]}",
+            "test": f"{test[0][0]}..{test[-1][0]}",
+            "is_roi": memo.score(best, train),
+            "oos_roi": memo.score(best, test),
+            "default_oos_roi": baseline_oos,
+            "params": {k: v for k, v in best.items() if k in grid},
+        })
+
+    if store is not None:
+        store.flush()
+
+    report = pd.DataFrame(folds)
+    report.attrs["sweep"] = sweep
+    report.attrs["runs"] = memo.runs
+    report.attrs["opening_runs"] = memo.opening_runs
+    report.attrs["possible_runs"] = len(configs) * len(days)
+    return report
+
+
+# ================= MAIN =================
+def main():
+    data_root = sys.argv[1] if len(sys.argv) > 1 else DATA_ROOT
+    prev_day_dir = sys.argv[2] if len(sys.argv) > 2 else PREV_DAY_DIR
+
+    days = discover_days(data_root, prev_day_dir)
+    if len(days) < TRAIN_DAYS + TEST_DAYS:
+        raise SystemExit(f"Need at least {TRAIN_DAYS + TEST_DAYS} days, found {len(days)}")
+
+    report = walk_forward(days)
+
+    print("\n" + "=" * 80)
+    print(f"WALK-FORWARD ({SEARCH}) - STRATEGY {STRATEGY_ID}".center(80))
+    print("=" * 80 + "\n")
+    pd.set_option("display.width", 200)
+    print(report.to_string(index=False))
+    print(f"\nMean in-sample ROI     : {report['is_roi'].mean():.2f}%")
+    print(f"Mean out-of-sample ROI : {report['oos_roi'].mean():.2f}%")
+    print(f"Default params OOS ROI : {report['default_oos_roi'].mean():.2f}%")
+    print(f"Day runs executed      : {report.attrs['runs']} (full grid x days: {report.attrs['possible_runs']})")
+    print(f"Opening-minute runs    : {report.attrs['opening_runs']}")
+    if RESULTS_STORE:
+        print(f"Runs stored in {RESULTS_STORE} as sweep {report.attrs['sweep']} "
+              f"(python SweepReport.py {RESULTS_STORE} --sweep {report.attrs['sweep']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import os
+import sys
+import time
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from testing import (  # type: ignore
+    START_CAPITAL, RISK_PER_TRADE, MAX_DAILY_LOSS_PCT, BROKERAGE,
+    ORB_START, ORB_END, TRADE_START, TRADE_END, generate_report,
+)
+from Kernels import atr as batch_atr, orb_sessions  # type: ignore  (path added by testing)
+
+"""
+Opening-range-breakout backtest over a whole universe and many days at once.
+
+Same rules as testing.run_backtest, which it reproduces trade for trade on a
+single time_close.txt, but:
+- ORB / trade windows are turned into minute-of-day integers once
+- ORB high, ATR and the breakout + momentum condition are computed for every
+  (day, instrument) column in one vectorised step over a (minutes x columns)
+  close matrix
+- only columns with at least one breakout candidate go through the
+  sequential position logic (Kernels.orb_sessions: one compiled loop over
+  every session with numba, candidate-to-candidate jumps with vectorised
+  exit scans without it)
+
+Each (day, instrument) is an independent session starting from START_CAPITAL,
+exactly like one run of testing.py. Input is minute bars on a uniform grid
+(e.g. SnapshotResampler output); columns that still contain NaN after the
+resampler's forward fill (no data at the open) are skipped.
+
+Usage:
+    python OrbUniverseBacktest.py bars_day1.npz bars_day2.npz ...
+    python OrbUniverseBacktest.py time_close.txt
+"""
+
+# ================= CONFIG =================
+ATR_PERIOD = 14
+MOMENTUM_LOOKBACK = 4           # prices[-5] in testing.py
+MOMENTUM_ATR_MULT = 0.5
+TARGET_ATR_MULT = 1.5
+
+
+# ================= TIME WINDOWS =================
+def minute_of_day(t: str) -> int:
+    h, m, *_ = map(int, t.replace("-", ":").split(":"))
+    return h * 60 + m
+
+
+def minute_label(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}:00"
+
+
+ORB_START_MIN, ORB_END_MIN = minute_of_day(ORB_START), minute_of_day(ORB_END)
+TRADE_START_MIN, TRADE_END_MIN = minute_of_day(TRADE_START), minute_of_day(TRADE_END)
+
+
+# ================= LOADERS =================
+def load_time_close(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """time_close.txt -> (minutes, close[minutes, 1])."""
+    minutes, close = [], []
+    with open(path) as f:
+        for line in f:
+            time_str, price = line.strip().split(",")
+            minutes.append(minute_of_day(time_str))
+            close.append(float(price))
+    return np.asarray(minutes), np.asarray(close)[:, None]
+
+
+def load_bar_days(paths: List[str]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """Resampled .npz days -> (minutes, close[days, minutes, instruments], names)."""
+    days = [np.load(p, allow_pickle=True) for p in paths]
+    width = min(z["close"].shape[1] for z in days)
+    minutes = days[0]["minutes"]
+    for z in days[1:]:
+        if not np.array_equal(z["minutes"], minutes):
+            raise ValueError("All days must share the same minute grid")
+    close = np.stack([z["close"][:, :width] for z in days])
+    return minutes, close, list(days[0]["names"][:width])
+
+
+# ================= VECTORISED SIGNALS =================
+def orb_signals(minutes: np.ndarray, close: np.ndarray):
+    """
+    close is (minutes, columns). Returns ORB high, ATR, the rows where exits
+    are evaluated (`tradable`) and the breakout candidate mask.
+    """
+    is_orb = (minutes >= ORB_START_MIN) & (minutes <= ORB_END_MIN)
+    if not is_orb.any():
+        empty = np.zeros(close.shape, dtype=bool)
+        return np.full(close.shape[1], np.nan), np.full(close.shape, np.nan), empty, empty
+
+    after_orb = np.arange(len(minutes)) > np.flatnonzero(is_orb)[-1]
+    in_trade = (minutes >= TRADE_START_MIN) & (minutes <= TRADE_END_MIN) & ~is_orb & after_orb
+
+    orb_high = close[is_orb].max(axis=0)
+    atr = batch_atr(close, ATR_PERIOD)
+
+    tradable = in_trade[:, None] & ~np.isnan(atr)
+    momentum = np.full(close.shape, False)
+    k = MOMENTUM_LOOKBACK
+    momentum[k:] = (close[k:] - close[:-k]) > MOMENTUM_ATR_MULT * atr[k:]
+    candidates = tradable & (close > orb_high) & momentum & (atr > 0)
+    return orb_high, atr, tradable, candidates
+
+
+# ================= SEQUENTIAL POSITION LOGIC =================
+def session_trades(labels, trades, i):
+    """
+    Trade i of orb_sessions as testing.py's BUY and SELL log rows; values
+    are Python floats so the rounding matches testing.py exactly.
+    """
+    qty = int(trades["qty"][i])
+    exit_row = int(trades["exit_row"][i])
+    pnl, capital = float(trades["pnl"][i]), float(trades["capital_after"][i])
+    return [
+        (labels[int(trades["entry_row"][i])], "BUY", round(float(trades["entry_price"][i]), 2), qty, 0,
+         round(float(trades["capital_before"][i]), 2)),
+        ("EOD" if exit_row < 0 else labels[exit_row], "SELL", round(float(trades["exit_price"][i]), 2), qty,
+         round(pnl, 2), round(capital, 2)),
+    ]
+
+
+# ================= ENGINE =================
+def run_orb_universe(minutes, close, names=None):
+    """
+    close: (minutes, instruments) or (days, minutes, instruments).
+    Returns (summary, trades) DataFrames indexed by day / instrument.
+    """
+    if close.ndim == 2:
+        close = close[None]
+    n_days, n_min, n_inst = close.shape
+    names = names or [str(i) for i in range(n_inst)]
+
+    # (minutes, days * instruments): one column per session
+    matrix = close.transpose(1, 0, 2).reshape(n_min, n_days * n_inst)
+    complete = ~np.isnan(matrix).any(axis=0)
+
+    _, atr, tradable, candidates = orb_signals(minutes, matrix)
+    active = np.flatnonzero(candidates.any(axis=0) & complete)
+
+    # Row-major per session so the per-column slices below are contiguous
+    P, A = np.ascontiguousarray(matrix.T), np.ascontiguousarray(atr.T)
+    T, C = np.ascontiguousarray(tradable.T), candidates.T
+
+    trades, final_capital = orb_sessions(
+        P, A, T, np.ascontiguousarray(C), active, START_CAPITAL, RISK_PER_TRADE, BROKERAGE,
+        START_CAPITAL * MAX_DAILY_LOSS_PCT, TARGET_ATR_MULT,
+    )
+    per_session = np.searchsorted(trades["col"], active, side="right") - np.searchsorted(trades["col"], active)
+
+    labels = [minute_label(int(m)) for m in minutes]
+    summary, trade_rows = [], []
+    i = 0
+    for col, capital, closed in zip(active, final_capital.tolist(), per_session.tolist()):
+        day, inst = divmod(int(col), n_inst)
+        for _ in range(closed):
+            for tr in session_trades(labels, trades, i):
+                trade_rows.append((day, names[inst]) + tr)
+            i += 1
+        summary.append((day, names[inst], capital, capital - START_CAPITAL, closed,
+                        (capital - START_CAPITAL) / START_CAPITAL * 100))
+
+    summary_df = pd.DataFrame(summary, columns=["day", "instrument", "final_capital", "net_pnl", "trades_closed", "roi"])
+    trades_df = pd.DataFrame(trade_rows, columns=["day", "instrument", "time", "action", "price", "qty", "pnl", "capital"])
+    summary_df.attrs["sessions"] = n_days * n_inst
+    summary_df.attrs["skipped_incomplete"] = int((~complete).sum())
+    return summary_df, trades_df
+
+
+# ================= MAIN =================
+def main():
+    paths = sys.argv[1:] or ["time_close.txt"]
+    start = time.time()
+
+    if len(paths) == 1 and paths[0].endswith(".txt"):
+        minutes, close = load_time_close(paths[0])
+        summary, trades = run_orb_universe(minutes, close, [os.path.basename(paths[0])])
+        final = summary["final_capital"].iloc[0] if len(summary) else START_CAPITAL
+        generate_report(trades.drop(columns=["day", "instrument"]).to_dict("records"), final)
+        return
+
+    minutes, close, names = load_bar_days(paths)
+    summary, trades = run_orb_universe(minutes, close, names)
+    elapsed = time.time() - start
+
+    print(f"\nORB study: {summary.attrs['sessions']} sessions "
+          f"({close.shape[0]} days x {close.shape[2]} instruments) in {elapsed:.2f}s")
+    print(f"Skipped (no data at open) : {summary.attrs['skipped_incomplete']}")
+    print(f"Sessions with trades      : {len(summary)}")
+    print(f"Trades closed             : {int(summary['trades_closed'].sum())}")
+    print(f"Mean ROI (traded sessions): {summary['roi'].mean() if len(summary) else 0:.3f} %")
+    print("\nTop sessions:")
+    print(summary.sort_values("roi", ascending=False).head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
+import os
+import sys
 from datetime import datetime
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Indicators import ATR  # type: ignore
+
 # ================= CONFIG =================
 DATA_FILE = "time_close.txt"
 
@@ -20,11 +25,6 @@ def parse_time(t):
 def in_range(t, start, end):
     return start <= t <= end
 
-def calculate_atr(prices, period=14):
-    if len(prices) < period + 1:
-        return None
-    return sum(abs(prices[i] - prices[i-1]) for i in range(-period, 0)) / period
-
 # ================= BACKTEST =================
 def run_backtest():
     capital = START_CAPITAL
@@ -33,11 +33,15 @@ def run_backtest():
 
     prices = []
     trade_log = []
+    atr_indicator = ATR(14)
 
     orb_prices = []
     orb_high = orb_low = None
     position = None
 
+    orb_start, orb_end = parse_time(ORB_START), parse_time(ORB_END)
+    trade_start, trade_end = parse_time(TRADE_START), parse_time(TRADE_END)
+
     with open(DATA_FILE) as f:
         for line in f:
             time_str, price = line.strip().split(",")
@@ -45,9 +49,10 @@ def run_backtest():
             t = parse_time(time_str)
 
             prices.append(price)
+            atr = atr_indicator.update(price)
 
             # -------- ORB COLLECTION --------
-            if in_range(t, parse_time(ORB_START), parse_time(ORB_END)):
+            if in_range(t, orb_start, orb_end):
                 orb_prices.append(price)
                 continue
 
@@ -59,10 +64,9 @@ def run_backtest():
                 continue
 
             # -------- TIME FILTER --------
-            if not in_range(t, parse_time(TRADE_START), parse_time(TRADE_END)):
+            if not in_range(t, trade_start, trade_end):
                 continue
 
-            atr = calculate_atr(prices)
             if atr is None:
                 continue
 
@@ -140,6 +144,7 @@ def run_backtest():
             })
 
     generate_report(trade_log, capital)
+    return trade_log, capital
 
 # ================= REPORT =================
 def generate_report(trades, final_capital):
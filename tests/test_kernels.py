@@ -0,0 +1,80 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.append(os.path.join(SRC_DIR, "strategy_testing"))
+import Indicators  # type: ignore
+import Kernels  # type: ignore
+from KernelBenchmark import orb_inputs, same, synthetic_universe  # type: ignore
+
+"""
+Equivalence of the Kernels backends: every kernel must return bit-identical
+results on "numba", "python" and the "numpy" reference. The numba cases
+are skipped where numba is not installed.
+
+    python -m pytest tests/test_kernels.py
+"""
+
+LOOP_BACKENDS = [
+    pytest.param("numba", marks=pytest.mark.skipif(not Kernels.HAVE_NUMBA, reason="numba not installed")),
+    "python",
+]
+MINUTES, INSTRUMENTS = 130, 40
+
+
+@pytest.fixture(scope="module")
+def close():
+    return synthetic_universe(INSTRUMENTS, MINUTES, seed=3)
+
+
+@pytest.mark.parametrize("backend", LOOP_BACKENDS)
+@pytest.mark.parametrize("period", [1, 2, 14, 30, MINUTES - 1, MINUTES])
+def test_atr(backend, period, close):
+    expected = Indicators.atr(close, period)
+    assert same(Kernels.atr(close, period, backend=backend), expected)
+    assert same(Kernels.atr(close[:, 0], period, backend=backend), expected[:, 0])
+    assert same(Kernels.atr(close, period, backend="numpy"), expected)
+
+
+@pytest.mark.parametrize("backend", LOOP_BACKENDS)
+@pytest.mark.parametrize("period", [1, 3, 30, MINUTES, MINUTES + 1])
+@pytest.mark.parametrize("kernel", ["rolling_high", "rolling_low"])
+def test_rolling_extremes(backend, period, kernel, close):
+    # Rounded prices repeat, which exercises ties in the monotonic deque
+    fn = getattr(Kernels, kernel)
+    assert same(fn(close, period, backend=backend), fn(close, period, backend="numpy"))
+    assert same(fn(close[:, 5], period, backend=backend), fn(close[:, 5], period, backend="numpy"))
+
+
+@pytest.mark.parametrize("backend", LOOP_BACKENDS)
+def test_first_exit(backend, close):
+    prices = np.ascontiguousarray(close[:, 0])
+    tradable = np.arange(MINUTES) % 7 != 0
+    p0 = float(prices[0])
+    cases = [
+        (1, p0 * 0.999, p0 * 1.001),        # hits almost at once
+        (1, p0 * 0.5, p0 * 10),             # never hits: -1
+        (MINUTES - 1, 0.0, np.inf),         # start at the last row
+        (MINUTES, p0, p0),                  # start past the end
+        (40, float(prices[60]), np.inf),    # SL only
+    ]
+    for start, sl, target in cases:
+        assert (Kernels.first_exit(prices, tradable, start, sl, target, backend=backend)
+                == Kernels.first_exit(prices, tradable, start, sl, target, backend="numpy"))
+
+
+@pytest.mark.parametrize("backend", LOOP_BACKENDS)
+@pytest.mark.parametrize("daily_loss_limit", [2000.0, 50.0])
+def test_orb_sessions(backend, daily_loss_limit, close):
+    P, A, T, C, cols = orb_inputs(close)
+    assert len(cols)
+    args = (P, A, T, C, cols, 100000, 0.003, 40, daily_loss_limit, 1.5)
+    assert same(Kernels.orb_sessions(*args, backend=backend), Kernels.orb_sessions(*args, backend="numpy"))
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        Kernels.resolve_backend("fortran")
@@ -0,0 +1,68 @@
+import os
+import sys
+
+import matplotlib
+import numpy as np
+import pytest
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.append(os.path.join(SRC_DIR, "helpers", "graph_generation"))
+import SeriesPlotter  # type: ignore  # noqa: E402
+
+"""
+SeriesPlotter on series with gaps: the running average must skip NaNs
+instead of going NaN for the rest of the line, and labelling must not
+fail on an all-NaN series.
+
+    python -m pytest tests/test_series_plotter.py
+"""
+
+
+def gappy_series(n=3000):
+    values = 100 + np.sin(np.arange(n) / 50.0)
+    values[:25] = np.nan            # leading gap
+    values[900:960] = np.nan        # interior gap
+    values[2000] = np.nan
+    return values
+
+
+def test_running_average_skips_nans():
+    values = np.array([np.nan, np.nan, 2.0, np.nan, 4.0, 6.0])
+    avg = SeriesPlotter.running_average(values)
+    assert np.isnan(avg[:2]).all()
+    assert np.allclose(avg[2:], [2.0, 2.0, 3.0, 4.0])
+
+
+def test_running_average_all_nan():
+    assert np.isnan(SeriesPlotter.running_average(np.full(4, np.nan))).all()
+
+
+@pytest.mark.parametrize("max_points", [SeriesPlotter.MAX_POINTS, 100])
+def test_plot_running_average_spans_gaps(max_points):
+    values = gappy_series()
+    fig, ax = plt.subplots(figsize=SeriesPlotter.FIG_SIZE)
+    try:
+        SeriesPlotter.plot_series(ax, values, "gaps", max_points=max_points)
+        avg_line = next(line for line in ax.get_lines() if line.get_label() == "Running Average")
+        x, y = avg_line.get_xdata(), avg_line.get_ydata()
+        assert np.isfinite(y).all()
+        assert x[0] == 25 and x[-1] == len(values) - 1
+    finally:
+        plt.close(fig)
+
+
+def test_plot_all_nan_series():
+    fig, ax = plt.subplots(figsize=SeriesPlotter.FIG_SIZE)
+    try:
+        SeriesPlotter.plot_series(ax, np.full(50, np.nan), "empty")
+    finally:
+        plt.close(fig)
+
+
+def test_label_indices_all_nan():
+    shown = np.arange(100)
+    picks = SeriesPlotter.label_indices(shown, np.full(100, np.nan), width_inches=4)
+    assert len(picks) and set(picks) <= set(shown)